@@ -0,0 +1,31 @@
+"""Add sheet_order to fixed_routes
+
+Revision ID: 6f2a9c41d7b3
+Revises: d8003d48c27a
+Create Date: 2026-10-17 14:05:27.641093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6f2a9c41d7b3'
+down_revision: Union[str, Sequence[str], None] = 'd8003d48c27a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('fixed_routes', sa.Column('sheet_order', sa.Integer(), nullable=True))
+
+    # Keep today's precedence (id order) until the next sheet sync
+    op.execute("UPDATE fixed_routes SET sheet_order = id")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('fixed_routes', 'sheet_order')
@@ -0,0 +1,46 @@
+"""Add distance_cache table
+
+Revision ID: d8003d48c27a
+Revises: 152761acce3c
+Create Date: 2026-10-17 09:12:41.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8003d48c27a'
+down_revision: Union[str, Sequence[str], None] = '152761acce3c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('distance_cache',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('cache_key', sa.String(length=64), nullable=False),
+    sa.Column('distance_meters', sa.Integer(), nullable=False),
+    sa.Column('duration_seconds', sa.Integer(), nullable=False),
+    sa.Column('distance_text', sa.String(length=50), nullable=True),
+    sa.Column('duration_text', sa.String(length=50), nullable=True),
+    sa.Column('origin_address', sa.String(length=255), nullable=True),
+    sa.Column('destination_address', sa.String(length=255), nullable=True),
+    sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=True),
+    sa.Column('expires_at', sa.TIMESTAMP(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_distance_cache_cache_key'), 'distance_cache', ['cache_key'], unique=True)
+    op.create_index(op.f('ix_distance_cache_expires_at'), 'distance_cache', ['expires_at'], unique=False)
+    op.create_index(op.f('ix_distance_cache_id'), 'distance_cache', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_distance_cache_id'), table_name='distance_cache')
+    op.drop_index(op.f('ix_distance_cache_expires_at'), table_name='distance_cache')
+    op.drop_index(op.f('ix_distance_cache_cache_key'), table_name='distance_cache')
+    op.drop_table('distance_cache')
@@ -9,15 +9,26 @@ from sqladmin import Admin, ModelView, BaseView, expose
 from markupsafe import Markup
 from wtforms import SelectField, SelectMultipleField, widgets
 from app.database import engine, SessionLocal
-from app.models.db_models import Vehicle, VehicleImage, FixedRoute, PricingConfig
+from app.models.db_models import Vehicle, VehicleImage, FixedRoute, PricingConfig, DistanceCache
 from app.core.constants import VEHICLE_TYPES, ISTANBUL_LOCATIONS, FEATURE_DEFINITIONS, FEATURE_CHOICES
 from app.services.data_manager import DataManager
 from app.services.init_db import init_routes_data
+from app.services.pricing_snapshot import pricing_snapshot_store
+from app.services.distance_cache import distance_cache
+from app.services.excel_writeback import excel_writeback
 
 
+class PricingDataAdminMixin:
+    """Bump the pricing snapshot version after every admin change"""
 
+    async def after_model_change(self, data, model, is_created, request):
+        pricing_snapshot_store.bump_version()
 
-class VehicleImageAdmin(ModelView, model=VehicleImage):
+    async def after_model_delete(self, model, request):
+        pricing_snapshot_store.bump_version()
+
+
+class VehicleImageAdmin(PricingDataAdminMixin, ModelView, model=VehicleImage):
     """Admin view for vehicle images"""
     name = "Vehicle Image"
     name_plural = "Vehicle Images"
@@ -110,6 +121,9 @@ class VehicleImageAdmin(ModelView, model=VehicleImage):
                     
                     print(f"✓ Created {len(created_images)} image records")
                     
+                    # Bypasses SQLAdmin's insert, so its after_model_change hook never runs
+                    pricing_snapshot_store.bump_version()
+                    
                     # Return first one (SQLAdmin expects a single object)
                     return created_images[0] if created_images else None
                     
@@ -301,7 +315,7 @@ class JsonFeatureField(SelectMultipleField):
         setattr(obj, name, formatted_features)
 
 
-class VehicleAdmin(ModelView, model=Vehicle):
+class VehicleAdmin(PricingDataAdminMixin, ModelView, model=Vehicle):
     """Admin view for vehicles"""
     name = "Vehicle"
     name_plural = "Vehicles"
@@ -376,7 +390,7 @@ class VehicleAdmin(ModelView, model=Vehicle):
     }
 
 
-class FixedRouteAdmin(ModelView, model=FixedRoute):
+class FixedRouteAdmin(PricingDataAdminMixin, ModelView, model=FixedRoute):
     """Admin view for fixed routes"""
     name = "Fixed Route"
     name_plural = "Fixed Routes"
@@ -441,8 +455,8 @@ class FixedRouteAdmin(ModelView, model=FixedRoute):
         from sqlalchemy.exc import IntegrityError, SQLAlchemyError
         try:
             result = await super().insert_model(request, data)
-            # Sync to Excel after successful insert
-            await self._sync_to_excel()
+            # Excel'e arka planda yazılır (art arda değişiklikler tek yazımda)
+            excel_writeback.schedule()
             return result
         except IntegrityError as e:
             # Unique constraint violation
@@ -456,8 +470,8 @@ class FixedRouteAdmin(ModelView, model=FixedRoute):
         from sqlalchemy.exc import IntegrityError, SQLAlchemyError
         try:
             result = await super().update_model(request, pk, data)
-            # Sync to Excel after successful update
-            await self._sync_to_excel()
+            # Excel'e arka planda yazılır (art arda değişiklikler tek yazımda)
+            excel_writeback.schedule()
             return result
         except IntegrityError as e:
              # Unique constraint violation
@@ -468,85 +482,15 @@ class FixedRouteAdmin(ModelView, model=FixedRoute):
             raise e
 
     async def delete_model(self, request, pk):
-        """Override delete to also sync to Excel"""
+        """Override delete to also write back to Excel"""
         result = await super().delete_model(request, pk)
-        # Sync to Excel after successful delete
-        await self._sync_to_excel()
+        # Excel'e arka planda yazılır (art arda değişiklikler tek yazımda)
+        excel_writeback.schedule()
         return result
 
-    async def _sync_to_excel(self):
-        """Sync current database state back to Excel file"""
-        from app.services.data_manager import DataManager
-        from app.database import SessionLocal
-        import pandas as pd
-        
-        db = SessionLocal()
-        try:
-            # Get all routes from DB grouped by origin/destination
-            routes = db.query(FixedRoute).all()
-            
-            # Group by origin-destination pairs
-            route_dict = {}
-            for route in routes:
-                key = (route.origin, route.destination)
-                if key not in route_dict:
-                    route_dict[key] = {
-                        "origin": route.origin,
-                        "destination": route.destination,
-                        "price_vito": 0,
-                        "price_sedan": 0,
-                        "price_vitovip": 0,
-                        "price_sprinter": 0,
-                        "active": True,
-                        "discount": 0,
-                        "comp_price": None,
-                        "notes": ""
-                    }
-                
-                # Map vehicle type to price key
-                vtype = route.vehicle.vehicle_type
-                if vtype == "vito":
-                    route_dict[key]["price_vito"] = float(route.price)
-                elif vtype == "sedan":
-                    route_dict[key]["price_sedan"] = float(route.price)
-                elif vtype == "vito_vip":
-                    route_dict[key]["price_vitovip"] = float(route.price)
-                elif vtype == "sprinter":
-                    route_dict[key]["price_sprinter"] = float(route.price)
-                
-                # Update other fields from first route encountered
-                route_dict[key]["active"] = route.active
-                route_dict[key]["discount"] = float(route.discount_percent) if route.discount_percent else 0
-                route_dict[key]["comp_price"] = float(route.competitor_price) if route.competitor_price else None
-                route_dict[key]["notes"] = route.notes or ""
-            
-            # Convert to list and save to Excel
-            excel_data = []
-            for idx, (key, route_data) in enumerate(sorted(route_dict.items()), start=1):
-                excel_data.append({
-                    "ID": idx,
-                    "Origin": route_data["origin"],
-                    "Destination": route_data["destination"],
-                    "Price_Sedan": int(route_data["price_sedan"]) if route_data["price_sedan"] > 0 else 0,
-                    "Price_Vito": int(route_data["price_vito"]) if route_data["price_vito"] > 0 else 0,
-                    "Price_VitoVIP": int(route_data["price_vitovip"]) if route_data["price_vitovip"] > 0 else 0,
-                    "Price_Sprinter": int(route_data["price_sprinter"]) if route_data["price_sprinter"] > 0 else 0,
-                    "Active": route_data["active"],
-                    "Discount": route_data["discount"],
-                    "Comp_Price": route_data["comp_price"],
-                    "Notes": route_data["notes"]
-                })
-            
-            # Write to Excel
-            df = pd.DataFrame(excel_data)
-            df.to_excel("static/istanbul_transfer.xlsx", index=False)
-            
-        finally:
-            db.close()
-
 
 
-class PricingConfigAdmin(ModelView, model=PricingConfig):
+class PricingConfigAdmin(PricingDataAdminMixin, ModelView, model=PricingConfig):
     """Admin view for pricing configuration"""
     name = "Pricing Config"
     name_plural = "Pricing Configurations"
@@ -584,6 +528,33 @@ class PricingConfigAdmin(ModelView, model=PricingConfig):
     can_view_details = True
 
 
+class DistanceCacheAdmin(ModelView, model=DistanceCache):
+    """Admin view for cached Distance Matrix results (read-only, deletable)"""
+    name = "Distance Cache"
+    name_plural = "Distance Cache"
+    icon = "fa-solid fa-route"
+    
+    column_list = ["id", "cache_key", "distance_text", "duration_text", "expires_at"]
+    column_searchable_list = ["cache_key", "origin_address", "destination_address"]
+    column_sortable_list = ["id", "cache_key", "expires_at"]
+    column_default_sort = ("id", True)
+    
+    column_labels = {
+        "cache_key": "Coordinates (snapped)",
+        "distance_text": "Distance",
+        "duration_text": "Duration",
+        "expires_at": "Expires At"
+    }
+    
+    can_create = False
+    can_edit = False
+    can_delete = True
+    can_view_details = True
+    
+    async def after_model_delete(self, model, request):
+        distance_cache.forget(model.cache_key)
+
+
 
 def setup_admin(app):
     """Initialize and configure the admin panel"""
@@ -603,5 +574,6 @@ def setup_admin(app):
     admin.add_view(VehicleImageAdmin)
     admin.add_view(FixedRouteAdmin)
     admin.add_view(PricingConfigAdmin)
+    admin.add_view(DistanceCacheAdmin)
     
     return admin
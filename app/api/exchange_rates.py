@@ -1,17 +1,36 @@
 # Exchange Rate API - Real-time currency conversion rates
-from fastapi import APIRouter, HTTPException
-from datetime import datetime, timedelta
+#
+# Rates are refreshed by a background task (started in the app lifespan)
+# ahead of expiry; requests are always answered from memory. A stale copy is
+# served while a refresh runs (stale-while-revalidate), the last good copy is
+# persisted to disk so a restart never waits on the network, and
+# FALLBACK_RATES are only used when nothing has ever been fetched.
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from fastapi import APIRouter
 import httpx
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
+from app.utils.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api", tags=["exchange-rates"])
 
-# Cache for exchange rates
-_exchange_rate_cache: Optional[Dict] = None
-_cache_timestamp: Optional[datetime] = None
-_CACHE_DURATION = timedelta(hours=1)  # Cache for 1 hour
+EXCHANGE_RATES_URL = "https://open.er-api.com/v6/latest/TRY"
+EXCHANGE_RATES_TTL_SECONDS = float(os.getenv("EXCHANGE_RATES_TTL_SECONDS", "3600"))  # 1 hour
+# Background refresh starts this long before the TTL lapses
+EXCHANGE_RATES_REFRESH_AHEAD_SECONDS = float(os.getenv("EXCHANGE_RATES_REFRESH_AHEAD_SECONDS", "300"))
+# Wait between attempts after a failed refresh
+EXCHANGE_RATES_RETRY_SECONDS = float(os.getenv("EXCHANGE_RATES_RETRY_SECONDS", "60"))
+EXCHANGE_RATES_FETCH_TIMEOUT = float(os.getenv("EXCHANGE_RATES_FETCH_TIMEOUT", "10"))
+# Last known good rates (survives restarts)
+EXCHANGE_RATES_CACHE_FILE = os.getenv("EXCHANGE_RATES_CACHE_FILE", "exchange_rates_cache.json")
 
-# Fallback rates (used if API fails)
+# Fallback rates (used only until the first successful fetch)
 FALLBACK_RATES = {
     "TRY": 1.0,
     "EUR": 0.029,
@@ -19,51 +38,197 @@ FALLBACK_RATES = {
     "GBP": 0.025
 }
 
+# Concurrent refreshes share one upstream request
+exchange_rate_flight = SingleFlight("exchange_rates")
+
 
 async def fetch_exchange_rates() -> Dict[str, float]:
     """
     Fetch current exchange rates from exchangerate-api.com
     Base currency: TRY (Turkish Lira)
+
+    Raises:
+        httpx.HTTPError / ValueError: If the API is unreachable or unsuccessful
     """
-    try:
-        # Using exchangerate-api.com free API (no key required for basic usage)
-        url = "https://open.er-api.com/v6/latest/TRY"
-        
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(url)
-            response.raise_for_status()
-            data = response.json()
-            
-            if data.get("result") == "success":
-                rates = data.get("rates", {})
-                return {
-                    "TRY": 1.0,  # Base currency
-                    "EUR": rates.get("EUR", FALLBACK_RATES["EUR"]),
-                    "USD": rates.get("USD", FALLBACK_RATES["USD"]),
-                    "GBP": rates.get("GBP", FALLBACK_RATES["GBP"])
-                }
-            else:
-                raise Exception("API returned unsuccessful result")
-                
-    except Exception as e:
-        print(f"Error fetching exchange rates: {e}")
-        # Return fallback rates
-        return FALLBACK_RATES
-
-
-def is_cache_valid() -> bool:
-    """Check if cached exchange rates are still valid"""
-    if _cache_timestamp is None or _exchange_rate_cache is None:
-        return False
-    return datetime.now() - _cache_timestamp < _CACHE_DURATION
+    rates = await exchange_rate_flight.do("TRY", _fetch_exchange_rates)
+    return dict(rates)
+
+
+async def _fetch_exchange_rates() -> Dict[str, float]:
+    # Using exchangerate-api.com free API (no key required for basic usage)
+    async with httpx.AsyncClient(timeout=EXCHANGE_RATES_FETCH_TIMEOUT) as client:
+        response = await client.get(EXCHANGE_RATES_URL)
+        response.raise_for_status()
+        data = response.json()
+
+    if data.get("result") != "success":
+        raise ValueError("API returned unsuccessful result")
+
+    rates = data.get("rates", {})
+    return {
+        "TRY": 1.0,  # Base currency
+        "EUR": rates.get("EUR", FALLBACK_RATES["EUR"]),
+        "USD": rates.get("USD", FALLBACK_RATES["USD"]),
+        "GBP": rates.get("GBP", FALLBACK_RATES["GBP"])
+    }
+
+
+class ExchangeRateStore:
+    """In-memory rates with background refresh and a persisted last-good copy"""
+
+    def __init__(
+        self,
+        cache_file: Optional[str] = EXCHANGE_RATES_CACHE_FILE,
+        ttl_seconds: float = EXCHANGE_RATES_TTL_SECONDS,
+        refresh_ahead_seconds: float = EXCHANGE_RATES_REFRESH_AHEAD_SECONDS,
+        retry_seconds: float = EXCHANGE_RATES_RETRY_SECONDS
+    ):
+        self.cache_file = cache_file
+        self.ttl_seconds = ttl_seconds
+        self.refresh_ahead_seconds = refresh_ahead_seconds
+        self.retry_seconds = retry_seconds
+        self.rates: Optional[Dict[str, float]] = None
+        self.fetched_at: Optional[float] = None  # epoch seconds
+        self.source = "fallback"
+        self.last_error: Optional[str] = None
+        self.refreshes = 0
+        self.failures = 0
+        self._loaded = False
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._loop_task: Optional[asyncio.Task] = None
+
+    def age(self) -> Optional[float]:
+        """Seconds since the rates were fetched (None when never fetched)"""
+        return None if self.fetched_at is None else time.time() - self.fetched_at
+
+    def is_stale(self) -> bool:
+        age = self.age()
+        return age is None or age >= self.ttl_seconds
+
+    def load(self) -> bool:
+        """Read the persisted copy (once); returns True if rates were loaded"""
+        self._loaded = True
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return False
+        try:
+            with open(self.cache_file, encoding="utf-8") as f:
+                data = json.load(f)
+            rates, fetched_at = dict(data["rates"]), float(data["fetched_at"])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring exchange rate cache file {self.cache_file}: {e}")
+            return False
+        if self.fetched_at is None or fetched_at > self.fetched_at:
+            self.rates, self.fetched_at, self.source = rates, fetched_at, "disk"
+        return True
+
+    def _save(self):
+        if not self.cache_file:
+            return
+        tmp_path = f"{self.cache_file}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"rates": self.rates, "fetched_at": self.fetched_at}, f)
+            os.replace(tmp_path, self.cache_file)
+        except OSError as e:
+            logger.warning(f"Could not persist exchange rates: {e}")
+
+    async def refresh(self) -> bool:
+        """Fetch fresh rates; on failure the current ones stay in place"""
+        try:
+            rates = await fetch_exchange_rates()
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            logger.warning(f"Error fetching exchange rates: {e}")
+            return False
+
+        self.rates, self.fetched_at, self.source = rates, time.time(), "live"
+        self.last_error = None
+        self.refreshes += 1
+        self._save()
+        return True
+
+    def schedule_refresh(self):
+        """Refresh in the background unless a refresh is already running"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self.refresh())
+
+    def current(self) -> Dict[str, Any]:
+        """
+        Rates for a request, never waiting on the network
+
+        Stale (or missing) rates trigger a background refresh and are served as is.
+        """
+        if not self._loaded:
+            self.load()
+        stale = self.is_stale()
+        if stale:
+            self.schedule_refresh()
+
+        fetched = self.fetched_at is not None
+        return {
+            "rates": dict(self.rates) if fetched else dict(FALLBACK_RATES),
+            "last_updated": (
+                datetime.fromtimestamp(self.fetched_at, tz=timezone.utc).isoformat() if fetched else None
+            ),
+            "cached": True,
+            "stale": stale,
+            "source": self.source if fetched else "fallback"
+        }
+
+    def _seconds_until_refresh(self) -> float:
+        age = self.age()
+        if age is None:
+            return 0.0
+        return max(0.0, self.ttl_seconds - self.refresh_ahead_seconds - age)
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self._seconds_until_refresh())
+            if not await self.refresh():
+                await asyncio.sleep(self.retry_seconds)
+
+    def start(self):
+        """Load the persisted copy and start the background refresher (app startup)"""
+        if not self._loaded:
+            self.load()
+        if self._loop_task is None or self._loop_task.done():
+            self._loop_task = asyncio.ensure_future(self._refresh_loop())
+
+    async def stop(self):
+        """Stop the background refresher (app shutdown)"""
+        for task in (self._loop_task, self._refresh_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._loop_task = self._refresh_task = None
+
+    def stats(self) -> Dict[str, Any]:
+        age = self.age()
+        return {
+            "source": self.source if self.fetched_at is not None else "fallback",
+            "age_seconds": None if age is None else round(age, 1),
+            "stale": self.is_stale(),
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "background_refresher": self._loop_task is not None and not self._loop_task.done()
+        }
+
+
+# Singleton instance
+exchange_rate_store = ExchangeRateStore()
 
 
 @router.get("/exchange-rates")
 async def get_exchange_rates():
     """
     Get current exchange rates for TRY base currency.
-    Results are cached for 1 hour to reduce API calls.
-    
+    Served from memory; refreshed in the background every hour.
+
     Returns:
         {
             "rates": {
@@ -72,29 +237,10 @@ async def get_exchange_rates():
                 "USD": 0.031,
                 "GBP": 0.025
             },
-            "last_updated": "2024-01-04T02:54:00Z",
-            "cached": true/false
+            "last_updated": "2024-01-04T02:54:00+00:00",
+            "cached": true,
+            "stale": false,
+            "source": "live" | "disk" | "fallback"
         }
     """
-    global _exchange_rate_cache, _cache_timestamp
-    
-    # Return cached rates if still valid
-    if is_cache_valid():
-        return {
-            "rates": _exchange_rate_cache,
-            "last_updated": _cache_timestamp.isoformat(),
-            "cached": True
-        }
-    
-    # Fetch fresh rates
-    rates = await fetch_exchange_rates()
-    
-    # Update cache
-    _exchange_rate_cache = rates
-    _cache_timestamp = datetime.now()
-    
-    return {
-        "rates": rates,
-        "last_updated": _cache_timestamp.isoformat(),
-        "cached": False
-    }
+    return exchange_rate_store.current()
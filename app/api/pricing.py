@@ -1,44 +1,102 @@
 # Shuttleport Backend - Pricing API Endpoints (Database-driven)
 
-from fastapi import APIRouter, HTTPException
-from typing import List
+import os
+from fastapi import APIRouter, Depends, HTTPException, Request
+from typing import Any, Dict, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.pricing import (
-    VehicleType, VehicleInfo, PricingRequest, PricingResponse,
-    VehiclePricing, get_vehicle_configs,
-    check_fixed_route, calculate_vehicle_price
+    VehicleInfo, PricingRequest, PricingResponse,
+    BatchPricingResponse, calculate_vehicle_price
 )
-from app.database import SessionLocal
-from app.models.db_models import FixedRoute, Vehicle
+from app.api import exchange_rates
+from app.database import get_async_db
+from app.services.currency_conversion import UnsupportedCurrencyError, convert_responses, unsupported_currencies
+from app.services.pricing_snapshot import PricingSnapshot, pricing_snapshot_store
+from app.services.distance_estimator import with_estimated_distance
+from app.services.pricing_engine import calculate_batch_pricing
+from app.services.quote_cache import quote_cache, build_pricing_response
+from app.utils.http_cache import VersionedBodyCache, cached_response
 
 router = APIRouter(prefix="/api/pricing", tags=["pricing"])
 
+# Upper bound on itineraries per batch request
+BATCH_MAX_ITEMS = int(os.getenv("PRICING_BATCH_MAX_ITEMS", "5000"))
+
+# Serialized + compressed catalog bodies, one per pricing snapshot
+catalog_bodies = VersionedBodyCache()
+
 
 @router.get("/vehicles", response_model=List[VehicleInfo])
-async def get_vehicles():
-    """Tüm araç tiplerini ve özelliklerini döndür (database'den)"""
-    vehicle_configs = get_vehicle_configs()
-    return list(vehicle_configs.values())
+async def get_vehicles(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Tüm araç tiplerini ve özelliklerini döndür (pricing snapshot'tan, ETag destekli)"""
+    snapshot = await pricing_snapshot_store.get_async(db)
+    cached = catalog_bodies.get(
+        "vehicles",
+        snapshot.stamp,
+        lambda: [vehicle.model_dump(mode="json") for vehicle in snapshot.vehicles.values()]
+    )
+    return cached_response(request, cached)
 
 
 @router.post("/calculate", response_model=PricingResponse)
-async def calculate_pricing(request: PricingRequest):
+async def calculate_pricing(request: PricingRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Transfer için fiyat hesapla (database-driven)
     - Mesafe bazlı hesaplama
     - Sabit rotalar için özel fiyatlar (database'den)
     - Round-trip indirimi (database config'den)
     - Havalimanı transferi ek ücreti
+    - distance_km yoksa koordinatlardan tahmini mesafe ile ön fiyat
+    - currencies verilirse fiyatlar o para birimlerine de çevrilir
     """
     
-    # Get vehicle configs from database
-    vehicle_configs = get_vehicle_configs()
+    # Araç ve fiyat kuralları bellekteki snapshot'tan (sorgu yok)
+    snapshot = await pricing_snapshot_store.get_async(db)
     
-    # Sabit fiyatlı rota kontrolü (database'den)
-    db = SessionLocal()
+    # Mesafe henüz gelmediyse anlık tahmin; gerçek mesafeyle tekrar sorulunca kesinleşir
+    request, distance_estimated = with_estimated_distance(request)
+    response = price_itinerary(snapshot, request, distance_estimated)
+    return convert_currencies(snapshot, [response], [request.currencies])[0]
+
+
+def convert_currencies(
+    snapshot: PricingSnapshot,
+    responses: List[PricingResponse],
+    currencies: List[List[str]],
+    exchange: Optional[Dict[str, Any]] = None
+) -> List[PricingResponse]:
+    """İstenen para birimlerindeki fiyatları ekle (bellekteki kur tablosundan, tek geçişte)"""
+    if not any(currencies):
+        return responses
+    if exchange is None:
+        exchange = exchange_rates.exchange_rate_store.current()
     try:
-        fixed_route_prices = check_fixed_route(request.origin_name, request.destination_name, db)
-    finally:
-        db.close()
+        converted = convert_responses(responses, currencies, exchange["rates"], snapshot.rules)
+    except UnsupportedCurrencyError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    for response, codes in zip(converted, currencies):
+        if codes:
+            response.route_info["exchange_rates_updated"] = exchange["last_updated"]
+    return converted
+
+
+def price_itinerary(
+    snapshot: PricingSnapshot,
+    request: PricingRequest,
+    distance_estimated: bool = False
+) -> PricingResponse:
+    """Tek güzergahı snapshot'a göre fiyatla (önbellek + sabit rota matrisi + mesafe bazlı)"""
+    vehicle_configs = snapshot.vehicles
+    
+    # Aynı güzergah + aynı fiyat verisi için önbellekteki teklif
+    cache_key = quote_cache.make_key(snapshot, request)
+    cached = quote_cache.get(cache_key, request, distance_estimated)
+    if cached is not None:
+        return cached
+    
+    # Sabit fiyatlı rota kontrolü (snapshot'taki önceden hesaplanmış fiyat matrisinden)
+    route_matrix = snapshot.route_matrix
+    fixed_route_row = route_matrix.match_row(request.origin_name, request.destination_name)
     
     vehicles_pricing = []
     
@@ -47,19 +105,18 @@ async def calculate_pricing(request: PricingRequest):
         if request.passenger_count > vehicle_config.capacity:
             continue  # Bu araç yolcu sayısını taşıyamaz
         
-        # Sabit fiyat varsa kullan (database'den gelen)
-        fixed_price = None
-        if fixed_route_prices:
-            fixed_price = fixed_route_prices.get(vehicle_type)
-        
-        # Fiyat hesapla
-        pricing = calculate_vehicle_price(
-            vehicle_config=vehicle_config,
-            distance_km=request.distance_km,
-            is_round_trip=request.is_round_trip,
-            is_airport_transfer=request.is_airport_transfer,
-            fixed_price=fixed_price
-        )
+        # Sabit fiyat varsa matristen oku, yoksa mesafe bazlı hesapla
+        pricing = None
+        if fixed_route_row is not None:
+            pricing = route_matrix.vehicle_pricing(fixed_route_row, vehicle_config, request.is_round_trip)
+        if pricing is None:
+            pricing = calculate_vehicle_price(
+                vehicle_config=vehicle_config,
+                distance_km=request.distance_km,
+                is_round_trip=request.is_round_trip,
+                is_airport_transfer=request.is_airport_transfer,
+                rules=snapshot.rules
+            )
         
         vehicles_pricing.append(pricing)
     
@@ -72,53 +129,72 @@ async def calculate_pricing(request: PricingRequest):
     # Fiyata göre sırala (en ucuzdan en pahalıya)
     vehicles_pricing.sort(key=lambda x: x.final_price)
     
-    return PricingResponse(
-        route_info={
-            "origin": request.origin_name,
-            "destination": request.destination_name,
-            "distance_km": request.distance_km,
-            "duration_minutes": request.duration_minutes,
-            "is_round_trip": request.is_round_trip,
-            "is_airport_transfer": request.is_airport_transfer,
-            "is_fixed_route": fixed_route_prices is not None
-        },
-        vehicles=vehicles_pricing
+    response = build_pricing_response(request, vehicles_pricing, fixed_route_row is not None, distance_estimated)
+    quote_cache.set(cache_key, response)
+    return response
+
+
+@router.get("/cache-stats")
+async def get_quote_cache_stats():
+    """Teklif önbelleği istatistikleri (hit/miss/eviction)"""
+    return quote_cache.stats()
+
+
+@router.post("/calculate-batch", response_model=BatchPricingResponse)
+async def calculate_pricing_batch(
+    requests: List[PricingRequest],
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Birden fazla güzergah için tek istekte fiyat hesapla
+    - Sabit rotalar tek geçişte çözülür
+    - Tüm (güzergah x araç) fiyatları vektörel hesaplanır
+    - Sonuçlar istek sırasıyla, güzergah bazında hata ile döner
+    - Para birimi çevrimleri de tüm güzergahlar için tek geçişte yapılır
+    """
+    if not requests:
+        raise HTTPException(status_code=400, detail="En az bir güzergah gönderilmeli")
+    if len(requests) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Tek istekte en fazla {BATCH_MAX_ITEMS} güzergah hesaplanabilir"
+        )
+    
+    snapshot = await pricing_snapshot_store.get_async(db)
+    filled = [with_estimated_distance(r) for r in requests]
+    results = calculate_batch_pricing(snapshot, [r for r, _ in filled])
+    for item, (_, distance_estimated) in zip(results, filled):
+        if distance_estimated and item.result is not None:
+            item.result.route_info["distance_estimated"] = True
+    
+    priced = [(item, request) for item, request in zip(results, requests) if item.result is not None]
+    exchange = None
+    if any(request.currencies for _, request in priced):
+        # Desteklenmeyen para birimi yalnızca o güzergahı hatalı yapar
+        exchange = exchange_rates.exchange_rate_store.current()
+        for item, request in priced:
+            unknown = unsupported_currencies(request.currencies, exchange["rates"])
+            if unknown:
+                item.result, item.error = None, str(UnsupportedCurrencyError(unknown))
+        priced = [(item, request) for item, request in priced if item.result is not None]
+    converted = convert_currencies(
+        snapshot,
+        [item.result for item, _ in priced],
+        [request.currencies for _, request in priced],
+        exchange
     )
+    for (item, _), response in zip(priced, converted):
+        item.result = response
+    return BatchPricingResponse(results=results)
 
 
 @router.get("/fixed-routes")
-async def get_fixed_routes():
-    """Sabit fiyatlı popüler rotaları döndür (database'den)"""
-    db = SessionLocal()
-    try:
-        routes_dict = {}
-        
-        # Get all active fixed routes from database
-        fixed_routes = db.query(FixedRoute).filter(FixedRoute.active == True).all()
-        
-        for route in fixed_routes:
-            # Get vehicle info
-            vehicle = db.query(Vehicle).filter(Vehicle.id == route.vehicle_id).first()
-            if not vehicle:
-                continue
-            
-            # Create route key
-            route_key = (route.origin, route.destination)
-            
-            if route_key not in routes_dict:
-                routes_dict[route_key] = {
-                    "origin": route.origin.title(),
-                    "destination": route.destination.title(),
-                    "prices": {}
-                }
-            
-            # Add price for this vehicle type
-            final_price = float(route.price)
-            if route.discount_percent and route.discount_percent > 0:
-                final_price = final_price * (1 - float(route.discount_percent) / 100)
-            
-            routes_dict[route_key]["prices"][vehicle.vehicle_type] = final_price
-        
-        return {"routes": list(routes_dict.values())}
-    finally:
-        db.close()
+async def get_fixed_routes(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Sabit fiyatlı popüler rotaları döndür (snapshot'taki fiyat matrisinden, ETag destekli)"""
+    snapshot = await pricing_snapshot_store.get_async(db)
+    cached = catalog_bodies.get(
+        "fixed-routes",
+        snapshot.stamp,
+        lambda: {"routes": snapshot.route_matrix.catalog()}
+    )
+    return cached_response(request, cached)
@@ -0,0 +1,119 @@
+# Shuttleport Backend - One-shot Quote Endpoint (distance + pricing in one request)
+
+import asyncio
+import os
+from typing import Any, Dict, Optional
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.pricing import convert_currencies, price_itinerary
+from app.core.exceptions import GoogleMapsAPIError
+from app.database import get_async_db
+from app.models.pricing import PricingRequest, QuoteRequest, QuoteResponse, QuoteDistance
+from app.services.distance_estimator import calculate_distance, format_duration_tr, with_estimated_distance
+from app.services.pricing_snapshot import PricingSnapshot, pricing_snapshot_store
+from app.utils.google_maps import get_maps_client
+
+router = APIRouter(prefix="/api", tags=["quote"])
+
+GOOGLE_MAPS_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY")
+
+
+def needs_distance(snapshot: PricingSnapshot, request: QuoteRequest) -> bool:
+    """Yolcu sayısına uygun araçlardan en az biri mesafe bazlı fiyatlanıyorsa True"""
+    route_matrix = snapshot.route_matrix
+    row = route_matrix.match_row(request.origin_name, request.destination_name)
+    if row is None:
+        return True
+    return any(
+        route_matrix.final_price(row, vehicle.type.value, request.is_round_trip, request.is_airport_transfer) is None
+        for vehicle in snapshot.vehicles.values()
+        if request.passenger_count <= vehicle.capacity
+    )
+
+
+async def lookup_distance(request: QuoteRequest) -> Dict[str, Any]:
+    """Mesafe: Google, tahmin ya da Google yavaşsa tahmin (distance_mode)"""
+    if request.distance_mode == "google" and not GOOGLE_MAPS_API_KEY:
+        raise HTTPException(status_code=500, detail="Google Maps API key yapılandırılmamış")
+
+    use_google = GOOGLE_MAPS_API_KEY and request.distance_mode != "estimate"
+    maps_client = get_maps_client(GOOGLE_MAPS_API_KEY) if use_google else None
+    return await calculate_distance(
+        maps_client,
+        request.origin_lat, request.origin_lng,
+        request.destination_lat, request.destination_lng,
+        mode=request.distance_mode
+    )
+
+
+def _discard_result(task: asyncio.Task):
+    # Sonucu kullanılmayan mesafe sorgusu (mesafe önbelleğini yine de doldurur)
+    if not task.cancelled():
+        task.exception()
+
+
+@router.post("/quote", response_model=QuoteResponse)
+async def quote(request: QuoteRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Mesafe + fiyat tek istekte
+    - Snapshot bellekteyse önce sabit rota kontrolü; uygun araçların hepsi
+      sabit fiyatlıysa mesafe sorgusu hiç yapılmaz
+    - Snapshot soğuksa snapshot yükleme ve mesafe sorgusu eşzamanlı çalışır
+    - Yanıt /api/pricing/calculate ile aynı + kullanılan mesafe bilgisi
+    """
+    distance_task: Optional[asyncio.Task] = None
+    if not pricing_snapshot_store.is_warm:
+        distance_task = asyncio.ensure_future(lookup_distance(request))
+
+    try:
+        snapshot = await pricing_snapshot_store.get_async(db)
+        if needs_distance(snapshot, request):
+            if distance_task is None:
+                distance_task = asyncio.ensure_future(lookup_distance(request))
+            distance = await distance_task
+        else:
+            distance = None
+            if distance_task is not None and not distance_task.done():
+                distance_task.add_done_callback(_discard_result)
+    except GoogleMapsAPIError as e:
+        if "element" in e.details:
+            raise HTTPException(status_code=400, detail=f"Rota bulunamadı: {e.details.get('status')}")
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+    except BaseException:
+        if distance_task is not None:
+            distance_task.cancel()
+        raise
+
+    pricing_request = PricingRequest(
+        origin_lat=request.origin_lat,
+        origin_lng=request.origin_lng,
+        origin_name=request.origin_name,
+        destination_lat=request.destination_lat,
+        destination_lng=request.destination_lng,
+        destination_name=request.destination_name,
+        distance_km=round(distance["distance_meters"] / 1000, 1) if distance else None,
+        duration_minutes=round(distance["duration_seconds"] / 60) if distance else None,
+        passenger_count=request.passenger_count,
+        is_round_trip=request.is_round_trip,
+        is_airport_transfer=request.is_airport_transfer,
+        currencies=request.currencies
+    )
+    # Sabit rotada fiyat mesafeye bağlı değil; gösterim için yerel tahmin yeterli
+    pricing_request, distance_estimated = with_estimated_distance(pricing_request)
+    distance_estimated = distance_estimated or bool(distance and distance.get("estimated"))
+    pricing = price_itinerary(snapshot, pricing_request, distance_estimated)
+    pricing = convert_currencies(snapshot, [pricing], [request.currencies])[0]
+
+    return QuoteResponse(
+        route_info=pricing.route_info,
+        vehicles=pricing.vehicles,
+        distance=QuoteDistance(
+            distance_km=pricing_request.distance_km,
+            distance_text=distance["distance_text"] if distance else f"{pricing_request.distance_km:.1f} km",
+            duration_minutes=pricing_request.duration_minutes,
+            duration_text=distance["duration_text"] if distance else format_duration_tr(pricing_request.duration_minutes * 60),
+            origin_address=distance["origin_address"] if distance else None,
+            destination_address=distance["destination_address"] if distance else None,
+            source="estimate" if distance_estimated else "google"
+        )
+    )
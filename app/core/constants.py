@@ -60,6 +60,59 @@ ISTANBUL_LOCATIONS = [
     ("Zeytinburnu", "Zeytinburnu")
 ]
 
+# Approximate coordinates (airport terminal / district centre) for ISTANBUL_LOCATIONS
+ISTANBUL_LOCATION_COORDINATES = {
+    "İstanbul Havalimanı (IST)": (41.2753, 28.7519),
+    "Sabiha Gökçen Havalimanı (SAW)": (40.8986, 29.3092),
+    "Sultanahmet (Fatih)": (41.0054, 28.9768),
+    "Taksim (Beyoğlu)": (41.0370, 28.9850),
+    "Beşiktaş": (41.0422, 29.0083),
+    "Kadıköy": (40.9909, 29.0303),
+    "Şişli": (41.0602, 28.9877),
+    "Üsküdar": (41.0227, 29.0150),
+    "Adalar": (40.8760, 29.0910),
+    "Arnavutköy": (41.1840, 28.7400),
+    "Ataşehir": (40.9923, 29.1244),
+    "Avcılar": (40.9796, 28.7217),
+    "Bağcılar": (41.0390, 28.8567),
+    "Bahçelievler": (41.0003, 28.8614),
+    "Bakırköy": (40.9819, 28.8772),
+    "Başakşehir": (41.0931, 28.8020),
+    "Bayrampaşa": (41.0350, 28.9120),
+    "Beykoz": (41.1340, 29.0930),
+    "Beylikdüzü": (40.9820, 28.6400),
+    "Büyükçekmece": (41.0210, 28.5850),
+    "Çatalca": (41.1430, 28.4610),
+    "Çekmeköy": (41.0330, 29.1780),
+    "Esenler": (41.0430, 28.8760),
+    "Esenyurt": (41.0290, 28.6720),
+    "Eyüpsultan": (41.0480, 28.9330),
+    "Fatih": (41.0190, 28.9400),
+    "Gaziosmanpaşa": (41.0630, 28.9120),
+    "Güngören": (41.0220, 28.8720),
+    "Kağıthane": (41.0790, 28.9720),
+    "Kartal": (40.9060, 29.1900),
+    "Küçükçekmece": (41.0000, 28.7800),
+    "Maltepe": (40.9350, 29.1310),
+    "Pendik": (40.8770, 29.2350),
+    "Sancaktepe": (41.0020, 29.2310),
+    "Sarıyer": (41.1670, 29.0500),
+    "Silivri": (41.0730, 28.2460),
+    "Sultanbeyli": (40.9680, 29.2620),
+    "Sultangazi": (41.1060, 28.8670),
+    "Şile": (41.1760, 29.6120),
+    "Tuzla": (40.8160, 29.3030),
+    "Ümraniye": (41.0160, 29.1240),
+    "Zeytinburnu": (40.9940, 28.9040)
+}
+
+# Extra search names for seeded locations
+ISTANBUL_LOCATION_ALIASES = {
+    "İstanbul Havalimanı (IST)": ["Istanbul Airport", "Istanbul New Airport"],
+    "Sabiha Gökçen Havalimanı (SAW)": ["Sabiha Gokcen Airport"],
+    "Taksim (Beyoğlu)": ["Taksim Square", "Taksim Meydanı"]
+}
+
 # Features Configuration
 FEATURE_DEFINITIONS = {
     "wifi": ("📶", "Ücretsiz Wi-Fi"),
@@ -3,6 +3,7 @@ Database connection and session management
 """
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
@@ -25,6 +26,37 @@ engine = create_engine(
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def to_async_database_url(url: str) -> str:
+    """Swap the sync driver in a database URL for its asyncio counterpart"""
+    scheme, sep, rest = url.partition("://")
+    dialect = scheme.split("+", 1)[0]
+    async_drivers = {
+        "postgresql": "postgresql+asyncpg",
+        "postgres": "postgresql+asyncpg",
+        "sqlite": "sqlite+aiosqlite",
+    }
+    return f"{async_drivers.get(dialect, scheme)}{sep}{rest}"
+
+
+# Async engine for request handlers (asyncpg in production, aiosqlite in tests)
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", to_async_database_url(DATABASE_URL))
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    echo=True if os.getenv("DEBUG", "false").lower() == "true" else False,
+    pool_pre_ping=True,
+    pool_size=5,
+    max_overflow=10
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Create base class for models
 Base = declarative_base()
 
@@ -39,3 +71,13 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """
+    Async database session dependency for FastAPI endpoints
+    
+    Queries run on the event loop without blocking it.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
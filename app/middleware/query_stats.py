@@ -0,0 +1,190 @@
+"""
+Per-request SQL query statistics and N+1 detection
+
+Engine event hooks attribute every statement (and its time) to the request
+being served. At the end of the request the middleware logs the totals,
+flags statements repeated with different parameters as probable N+1s and,
+when QUERY_STATS_HEADERS=true, adds the numbers as response headers.
+"""
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.middleware.base import BaseHTTPMiddleware
+
+logger = logging.getLogger(__name__)
+
+# Response headers are opt-in (they reveal internals)
+QUERY_STATS_HEADERS = os.getenv("QUERY_STATS_HEADERS", "false").lower() == "true"
+# Same statement this many times with different parameters = probable N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("QUERY_STATS_N_PLUS_ONE_THRESHOLD", "3"))
+
+
+@dataclass
+class StatementStats:
+    """Executions of one SQL string within a request"""
+    count: int = 0
+    total_ms: float = 0.0
+    parameter_sets: Set[int] = field(default_factory=set)
+
+
+@dataclass
+class RequestQueryStats:
+    """Every statement executed while serving one request"""
+    query_count: int = 0
+    db_time_ms: float = 0.0
+    statements: Dict[str, StatementStats] = field(default_factory=dict)
+
+    def record(self, statement: str, parameters, elapsed_ms: float):
+        """Add one execution"""
+        self.query_count += 1
+        self.db_time_ms += elapsed_ms
+        stats = self.statements.get(statement)
+        if stats is None:
+            stats = self.statements[statement] = StatementStats()
+        stats.count += 1
+        stats.total_ms += elapsed_ms
+        # Only distinctness matters; cap memory for huge loops
+        if len(stats.parameter_sets) <= N_PLUS_ONE_THRESHOLD:
+            try:
+                stats.parameter_sets.add(hash(repr(parameters)))
+            except Exception:
+                pass
+
+    def n_plus_one_suspects(self) -> List[str]:
+        """Statements repeated with differing parameters"""
+        return [
+            statement for statement, stats in self.statements.items()
+            if stats.count >= N_PLUS_ONE_THRESHOLD and len(stats.parameter_sets) > 1
+        ]
+
+
+@dataclass
+class EndpointQueryTotals:
+    """Running totals for one endpoint"""
+    requests: int = 0
+    query_count: int = 0
+    db_time_ms: float = 0.0
+    n_plus_one_requests: int = 0
+
+
+_current_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def current_query_stats() -> Optional[RequestQueryStats]:
+    """Stats of the request being served (None outside a request)"""
+    return _current_stats.get()
+
+
+class QueryStatsRegistry:
+    """Per-endpoint totals across requests"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals: Dict[str, EndpointQueryTotals] = {}
+
+    def add(self, endpoint: str, stats: RequestQueryStats, suspects: List[str]):
+        with self._lock:
+            totals = self._totals.get(endpoint)
+            if totals is None:
+                totals = self._totals[endpoint] = EndpointQueryTotals()
+            totals.requests += 1
+            totals.query_count += stats.query_count
+            totals.db_time_ms += stats.db_time_ms
+            if suspects:
+                totals.n_plus_one_requests += 1
+
+    def summary(self) -> Dict[str, dict]:
+        """Totals and per-request averages by endpoint"""
+        with self._lock:
+            return {
+                endpoint: {
+                    "requests": t.requests,
+                    "query_count": t.query_count,
+                    "db_time_ms": round(t.db_time_ms, 2),
+                    "avg_queries": round(t.query_count / t.requests, 2),
+                    "avg_db_time_ms": round(t.db_time_ms / t.requests, 2),
+                    "n_plus_one_requests": t.n_plus_one_requests
+                }
+                for endpoint, t in self._totals.items()
+            }
+
+    def clear(self):
+        with self._lock:
+            self._totals.clear()
+
+
+# Singleton instance
+query_stats_registry = QueryStatsRegistry()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_stats_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    started = conn.info.get("query_stats_started")
+    if not started:
+        return
+    stats.record(statement, parameters, (time.perf_counter() - started.pop()) * 1000)
+
+
+def install_query_stats(*engines):
+    """
+    Attach the statement hooks to engines (idempotent)
+
+    Args:
+        engines: Sync engines; for an AsyncEngine pass its .sync_engine
+    """
+    for engine in engines:
+        target = getattr(engine, "sync_engine", engine)
+        if not isinstance(target, Engine):
+            continue
+        if not event.contains(target, "before_cursor_execute", _before_cursor_execute):
+            event.listen(target, "before_cursor_execute", _before_cursor_execute)
+            event.listen(target, "after_cursor_execute", _after_cursor_execute)
+
+
+class QueryStatsMiddleware(BaseHTTPMiddleware):
+    """Collects SQL statistics for every request"""
+
+    async def dispatch(self, request: Request, call_next):
+        stats = RequestQueryStats()
+        token = _current_stats.set(stats)
+        try:
+            response = await call_next(request)
+        finally:
+            _current_stats.reset(token)
+
+        route = request.scope.get("route")
+        endpoint = f"{request.method} {getattr(route, 'path', request.url.path)}"
+        suspects = stats.n_plus_one_suspects()
+        query_stats_registry.add(endpoint, stats, suspects)
+
+        if stats.query_count:
+            logger.info(
+                f"DB: {endpoint} - {stats.query_count} queries - {stats.db_time_ms:.2f}ms"
+            )
+        for statement in suspects:
+            repeated = stats.statements[statement]
+            logger.warning(
+                f"Probable N+1 in {endpoint}: executed {repeated.count}x "
+                f"({repeated.total_ms:.2f}ms) - {' '.join(statement.split())[:200]}"
+            )
+
+        if QUERY_STATS_HEADERS:
+            response.headers["X-DB-Query-Count"] = str(stats.query_count)
+            response.headers["X-DB-Time-Ms"] = f"{stats.db_time_ms:.2f}"
+            response.headers["X-DB-N-Plus-One"] = str(len(suspects))
+
+        return response
@@ -67,6 +67,8 @@ class FixedRoute(Base):
     competitor_price = Column(Numeric(15, 2))  # For reference
     notes = Column(Text)  # 'Rakip: 2050₺ | Bizim: 2000₺ (50₺ ucuz)'
     active = Column(Boolean, default=True)
+    # Row position in the route sheet; the first matching route in this order wins
+    sheet_order = Column(Integer)
     created_at = Column(TIMESTAMP, server_default=func.now())
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
 
@@ -91,3 +93,22 @@ class PricingConfig(Base):
 
     def __repr__(self):
         return f"<PricingConfig({self.config_key}={self.config_value})>"
+
+
+class DistanceCache(Base):
+    """Cached Distance Matrix results keyed on quantized coordinates"""
+    __tablename__ = "distance_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String(64), unique=True, nullable=False, index=True)  # '3:41.275,28.752|41.005,28.977'
+    distance_meters = Column(Integer, nullable=False)
+    duration_seconds = Column(Integer, nullable=False)
+    distance_text = Column(String(50))
+    duration_text = Column(String(50))
+    origin_address = Column(String(255))
+    destination_address = Column(String(255))
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    expires_at = Column(TIMESTAMP, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<DistanceCache({self.cache_key}={self.distance_meters}m)>"
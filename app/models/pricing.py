@@ -1,11 +1,12 @@
 # Shuttleport Backend - Pricing Models and Configuration (Database-driven)
 
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Literal
 from pydantic import BaseModel, Field
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from app.database import SessionLocal
-from app.models.db_models import Vehicle, FixedRoute, PricingConfig
+from app.models.db_models import Vehicle, PricingConfig
 
 
 class VehicleType(str, Enum):
@@ -40,11 +41,22 @@ class PricingRequest(BaseModel):
     destination_lat: float
     destination_lng: float
     destination_name: str
-    distance_km: float
-    duration_minutes: int
+    # Boş bırakılırsa koordinatlardan tahmin edilir (ön fiyat)
+    distance_km: Optional[float] = None
+    duration_minutes: Optional[int] = None
     passenger_count: int = 1
     is_round_trip: bool = False
     is_airport_transfer: bool = False
+    # Fiyatların ayrıca çevrileceği para birimleri (ör. ["EUR", "USD"])
+    currencies: List[str] = []
+
+
+class ConvertedPrice(BaseModel):
+    """Başka para birimine çevrilmiş araç fiyatı"""
+    currency: str
+    rate: float = Field(description="1 TL karşılığı")
+    final_price: float
+    price_breakdown: Dict[str, float]
 
 
 class VehiclePricing(BaseModel):
@@ -64,6 +76,8 @@ class VehiclePricing(BaseModel):
     image_url: Optional[str] = None
     images: List[str] = []
     price_breakdown: Dict[str, float]
+    # currencies ile istenen para birimlerinde fiyat
+    converted_prices: Dict[str, ConvertedPrice] = {}
 
 
 class PricingResponse(BaseModel):
@@ -72,32 +86,151 @@ class PricingResponse(BaseModel):
     vehicles: List[VehiclePricing]
 
 
-def get_vehicle_configs() -> Dict[VehicleType, VehicleInfo]:
-    """Get vehicle configurations from database"""
-    db = SessionLocal()
+class BatchPricingItem(BaseModel):
+    """Toplu fiyat hesaplamada tek bir güzergahın sonucu"""
+    index: int
+    result: Optional[PricingResponse] = None
+    error: Optional[str] = None
+
+
+class BatchPricingResponse(BaseModel):
+    """Toplu fiyat hesaplama response (istek sırasıyla)"""
+    results: List[BatchPricingItem]
+
+
+class QuoteRequest(BaseModel):
+    """Tek adımda mesafe + fiyat request (/api/quote)"""
+    origin_lat: float
+    origin_lng: float
+    origin_name: str
+    destination_lat: float
+    destination_lng: float
+    destination_name: str
+    passenger_count: int = 1
+    is_round_trip: bool = False
+    is_airport_transfer: bool = False
+    # google: sadece Distance Matrix, auto: Google yavaşsa tahmin, estimate: sadece tahmin
+    distance_mode: Literal["google", "estimate", "auto"] = "auto"
+    currencies: List[str] = []
+
+
+class QuoteDistance(BaseModel):
+    """Teklifte kullanılan mesafe bilgisi"""
+    distance_km: float
+    distance_text: str
+    duration_minutes: int
+    duration_text: str
+    origin_address: Optional[str] = None
+    destination_address: Optional[str] = None
+    # google | estimate
+    source: str
+
+
+class QuoteResponse(PricingResponse):
+    """PricingResponse + mesafe bilgisi"""
+    distance: QuoteDistance
+
+
+@dataclass(frozen=True)
+class PricingRules:
+    """PricingConfig tablosundan çözümlenmiş fiyat kuralları"""
+    base_fare: float = 50.0
+    airport_fee: float = 100.0
+    round_trip_discount: float = 10.0
+    global_minimum_fare: Optional[float] = None
+    per_km_rates: Dict[str, float] = field(default_factory=dict)
+    vehicle_minimum_fares: Dict[str, float] = field(default_factory=dict)
+    # Para birimi -> yuvarlama adımı (ör. EUR: 0.5, USD: 1)
+    currency_rounding: Dict[str, float] = field(default_factory=dict)
+
+    def per_km_rate_for(self, vehicle_type: str) -> float:
+        """Araç tipine özel KM ücreti (tanımlı değilse 12 TL)"""
+        return self.per_km_rates.get(vehicle_type, 12.0)
+
+    def minimum_fare_for(self, vehicle_type: str) -> float:
+        """Global minimum varsa onu, yoksa araç tipine özel minimumu döndür"""
+        if self.global_minimum_fare is not None:
+            return self.global_minimum_fare
+        return self.vehicle_minimum_fares.get(vehicle_type, 0)
+
+    def rounding_step_for(self, currency: str) -> float:
+        """Çevrilmiş fiyatların yuvarlama adımı (tanımlı değilse 0.01)"""
+        return self.currency_rounding.get(currency, 0.01)
+
+
+def load_pricing_rules(db: Session = None) -> PricingRules:
+    """Load all pricing rules with a single PricingConfig query"""
+    should_close = False
+    if db is None:
+        db = SessionLocal()
+        should_close = True
+
     try:
-        vehicles = db.query(Vehicle).filter(Vehicle.active == True).all()
+        base_fare = 50.0
+        airport_fee = 100.0
+        round_trip_discount = 10.0
+        global_minimum_fare = None
+        per_km_rates = {}
+        vehicle_minimum_fares = {}
+        currency_rounding = {}
+
+        for config in db.query(PricingConfig).all():
+            key = config.config_key
+            if key == "base_fare":
+                base_fare = float(config.config_value)
+            elif key == "airport_fee":
+                airport_fee = float(config.config_value)
+            elif key == "round_trip_discount":
+                round_trip_discount = float(config.config_value)
+            elif key.startswith("per_km_rate_"):
+                per_km_rates[key[len("per_km_rate_"):]] = float(config.config_value)
+            elif key == "minimum_fare":
+                # Sadece araç tipi atanmamış kayıt global minimumdur
+                if config.vehicle_type is None:
+                    global_minimum_fare = float(config.config_value)
+            elif key.startswith("minimum_fare_"):
+                vehicle_minimum_fares[key[len("minimum_fare_"):]] = float(config.config_value)
+            elif key.startswith("currency_rounding_"):
+                step = float(config.config_value)
+                if step > 0:
+                    currency_rounding[key[len("currency_rounding_"):].upper()] = step
+
+        return PricingRules(
+            base_fare=base_fare,
+            airport_fee=airport_fee,
+            round_trip_discount=round_trip_discount,
+            global_minimum_fare=global_minimum_fare,
+            per_km_rates=per_km_rates,
+            vehicle_minimum_fares=vehicle_minimum_fares,
+            currency_rounding=currency_rounding
+        )
+    finally:
+        if should_close:
+            db.close()
+
+
+def get_vehicle_configs(db: Session = None, rules: Optional[PricingRules] = None) -> Dict[VehicleType, VehicleInfo]:
+    """
+    Get vehicle configurations from database
+    
+    Vehicles and their images are loaded eagerly and pricing rules come from
+    one PricingConfig query, so the query count doesn't grow with the fleet.
+    """
+    should_close = False
+    if db is None:
+        db = SessionLocal()
+        should_close = True
+    
+    try:
+        if rules is None:
+            rules = load_pricing_rules(db)
+        
+        vehicles = db.query(Vehicle).options(
+            selectinload(Vehicle.images)
+        ).filter(Vehicle.active == True).all()
         
         configs = {}
         for vehicle in vehicles:
-            # Get pricing config for this vehicle type
-            per_km_config = db.query(PricingConfig).filter(
-                PricingConfig.config_key == f"per_km_rate_{vehicle.vehicle_type}"
-            ).first()
-            
-            per_km_rate = float(per_km_config.config_value) if per_km_config else 12.0
-            
-            # Get base fare and airport fee from global configs
-            base_fare_config = db.query(PricingConfig).filter(
-                PricingConfig.config_key == "base_fare"
-            ).first()
-            airport_fee_config = db.query(PricingConfig).filter(
-                PricingConfig.config_key == "airport_fee"
-            ).first()
-            
-            base_fare = float(base_fare_config.config_value) if base_fare_config else 50.0
-            airport_fee = float(airport_fee_config.config_value) if airport_fee_config else 100.0
-            
             # Convert features JSON to list of strings
             features_list = []
             if vehicle.features and isinstance(vehicle.features, list):
@@ -144,103 +277,46 @@ def get_vehicle_configs() -> Dict[VehicleType, VehicleInfo]:
                 image_url=image_url,
                 images=images_list,
                 features=features_list,
-                base_fare=base_fare,
-                per_km_rate=per_km_rate,
-                airport_fee=airport_fee
+                base_fare=rules.base_fare,
+                per_km_rate=rules.per_km_rate_for(vehicle.vehicle_type),
+                airport_fee=rules.airport_fee
             )
         
         return configs
     finally:
-        db.close()
+        if should_close:
+            db.close()
+
+
+# Türkçe karakterler tek geçişte ASCII karşılıklarına çevrilir
+_TURKISH_CHARS = str.maketrans({"ı": "i", "ğ": "g", "ş": "s", "ç": "c", "ü": "u", "ö": "o"})
+_PARENTHESES = str.maketrans("", "", "()")
 
 
 def normalize_location_name(name: str) -> str:
     """Konum adını normalize et (karşılaştırma için)"""
-    normalized = name.lower().replace("ı", "i").replace("ğ", "g").replace("ş", "s").replace("ç", "c").replace("ü", "u").replace("ö", "o")
+    normalized = name.lower().translate(_TURKISH_CHARS)
     # Handle common Turkish-English translations
-    normalized = normalized.replace("havalimani", "airport").replace("havalimanı", "airport")
-    normalized = normalized.replace("ist", "").replace("(", "").replace(")", "").strip()
-    return normalized
+    normalized = normalized.replace("havalimani", "airport").replace("ist", "")
+    return normalized.translate(_PARENTHESES).strip()
 
 
 def check_fixed_route(origin: str, destination: str, db: Session = None) -> Optional[Dict[VehicleType, float]]:
-    """Check if there's a fixed price route in database"""
-    should_close = False
+    """
+    Check if there's a fixed price route in database
+    
+    Uses the matcher from the pricing snapshot; when a session is given the
+    matcher is built from that session instead (one query).
+    """
+    from app.services.route_matcher import FixedRouteMatcher
+    from app.services.pricing_snapshot import pricing_snapshot_store
+    
     if db is None:
-        db = SessionLocal()
-        should_close = True
+        matcher = pricing_snapshot_store.get().route_matcher
+    else:
+        matcher = FixedRouteMatcher.from_db(db)
     
-    try:
-        origin_norm = normalize_location_name(origin)
-        destination_norm = normalize_location_name(destination)
-        
-        # Query all fixed routes
-        routes = db.query(FixedRoute).filter(FixedRoute.active == True).all()
-        
-        # Find matching route
-        for route in routes:
-            route_origin_norm = normalize_location_name(route.origin)
-            route_dest_norm = normalize_location_name(route.destination)
-            
-            # Check forward direction (bidirectional matching for Turkish/English names)
-            origin_match = (route_origin_norm in origin_norm or origin_norm in route_origin_norm)
-            dest_match = (route_dest_norm in destination_norm or destination_norm in route_dest_norm)
-            
-            if origin_match and dest_match:
-                # Get all vehicle prices for this route
-                all_routes = db.query(FixedRoute).filter(
-                    FixedRoute.origin == route.origin,
-                    FixedRoute.destination == route.destination,
-                    FixedRoute.active == True
-                ).all()
-                
-                prices = {}
-                for r in all_routes:
-                    vehicle = db.query(Vehicle).filter(Vehicle.id == r.vehicle_id).first()
-                    if vehicle:
-                        try:
-                            vehicle_type = VehicleType(vehicle.vehicle_type)
-                            # Apply discount if any
-                            final_price = float(r.price)
-                            if r.discount_percent and r.discount_percent > 0:
-                                final_price = final_price * (1 - float(r.discount_percent) / 100)
-                            prices[vehicle_type] = final_price
-                        except ValueError:
-                            continue
-                
-                return prices if prices else None
-            
-            # Check reverse direction (bidirectional matching for Turkish/English names)
-            origin_match_rev = (route_dest_norm in origin_norm or origin_norm in route_dest_norm)
-            dest_match_rev = (route_origin_norm in destination_norm or destination_norm in route_origin_norm)
-            
-            if origin_match_rev and dest_match_rev:
-                # Same logic for reverse
-                all_routes = db.query(FixedRoute).filter(
-                    FixedRoute.origin == route.origin,
-                    FixedRoute.destination == route.destination,
-                    FixedRoute.active == True
-                ).all()
-                
-                prices = {}
-                for r in all_routes:
-                    vehicle = db.query(Vehicle).filter(Vehicle.id == r.vehicle_id).first()
-                    if vehicle:
-                        try:
-                            vehicle_type = VehicleType(vehicle.vehicle_type)
-                            final_price = float(r.price)
-                            if r.discount_percent and r.discount_percent > 0:
-                                final_price = final_price * (1 - float(r.discount_percent) / 100)
-                            prices[vehicle_type] = final_price
-                        except ValueError:
-                            continue
-                
-                return prices if prices else None
-        
-        return None
-    finally:
-        if should_close:
-            db.close()
+    return matcher.match(origin, destination)
 
 
 def calculate_vehicle_price(
@@ -248,7 +324,8 @@ def calculate_vehicle_price(
     distance_km: float,
     is_round_trip: bool,
     is_airport_transfer: bool,
-    fixed_price: Optional[float] = None
+    fixed_price: Optional[float] = None,
+    rules: Optional[PricingRules] = None
 ) -> VehiclePricing:
     """Tek bir araç için fiyat hesapla (minimum fiyat kontrolü ile)"""
     
@@ -265,37 +342,11 @@ def calculate_vehicle_price(
     
     subtotal = base_price + distance_price + airport_fee
     
-    # Round-trip indirimi ve minimum fiyat (database'den al)
-    db = SessionLocal()
-    try:
-        discount_config = db.query(PricingConfig).filter(
-            PricingConfig.config_key == "round_trip_discount"
-        ).first()
-        discount_percent = float(discount_config.config_value) if discount_config else 10.0
-        
-        # Minimum fare kontrolü - önce global, sonra araç tipine özel
-        vehicle_type_str = vehicle_config.type.value
-        
-        # Global minimum fare kontrolü
-        global_minimum_config = db.query(PricingConfig).filter(
-            PricingConfig.config_key == "minimum_fare",
-            PricingConfig.vehicle_type == None
-        ).first()
-        
-        # Vehicle-specific minimum fare kontrolü
-        vehicle_minimum_config = db.query(PricingConfig).filter(
-            PricingConfig.config_key == f"minimum_fare_{vehicle_type_str}"
-        ).first()
-        
-        # Global varsa onu kullan, yoksa vehicle-specific kullan
-        if global_minimum_config:
-            minimum_fare = float(global_minimum_config.config_value)
-        elif vehicle_minimum_config:
-            minimum_fare = float(vehicle_minimum_config.config_value)
-        else:
-            minimum_fare = 0
-    finally:
-        db.close()
+    # Round-trip indirimi ve minimum fiyat (snapshot'tan veya database'den)
+    if rules is None:
+        rules = load_pricing_rules()
+    discount_percent = rules.round_trip_discount
+    minimum_fare = rules.minimum_fare_for(vehicle_config.type.value)
     
     round_trip_discount = subtotal * (discount_percent / 100) if is_round_trip else 0
     
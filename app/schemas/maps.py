@@ -2,7 +2,7 @@
 Maps API schemas for requests and responses
 """
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Literal
 
 
 class DistanceRequest(BaseModel):
@@ -11,6 +11,10 @@ class DistanceRequest(BaseModel):
     origin_lng: float = Field(..., description="Origin longitude")
     destination_lat: float = Field(..., description="Destination latitude")
     destination_lng: float = Field(..., description="Destination longitude")
+    mode: Literal["google", "estimate", "auto"] = Field(
+        "google",
+        description="google: Distance Matrix; estimate: offline estimate; auto: estimate if Google is slow or down"
+    )
     
     class Config:
         json_schema_extra = {
@@ -31,6 +35,7 @@ class DistanceResponse(BaseModel):
     duration_text: str = Field(..., description="Formatted duration text")
     origin_address: str = Field(..., description="Origin address")
     destination_address: str = Field(..., description="Destination address")
+    is_estimate: bool = Field(False, description="Distance is an offline estimate")
 
 
 class PlaceSearchRequest(BaseModel):
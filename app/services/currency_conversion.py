@@ -0,0 +1,114 @@
+"""
+Server-side currency conversion for quotes
+
+Every priced vehicle of every response is converted into every requested
+currency in one NumPy pass (vehicles x breakdown fields x currencies), using
+the in-memory exchange-rate table and the per-currency rounding steps from
+PricingConfig (`currency_rounding_<code>`). Cached responses are never
+modified; converted vehicles are copies.
+"""
+from decimal import Decimal
+from typing import Dict, List, Sequence
+import numpy as np
+from app.models.pricing import ConvertedPrice, PricingResponse, PricingRules
+
+# price_breakdown keys, in matrix column order ("final" is final_price)
+BREAKDOWN_FIELDS = (
+    "base_fare", "distance_charge", "airport_fee", "subtotal", "discount", "minimum_applied", "final"
+)
+
+
+class UnsupportedCurrencyError(ValueError):
+    """Requested currency is not in the exchange-rate table"""
+
+    def __init__(self, currencies: Sequence[str]):
+        self.currencies = list(currencies)
+        super().__init__(f"Desteklenmeyen para birimi: {', '.join(self.currencies)}")
+
+
+def normalize_currencies(currencies: Sequence[str]) -> List[str]:
+    """Upper-case, de-duplicated, in request order"""
+    return list(dict.fromkeys(code.strip().upper() for code in currencies if code.strip()))
+
+
+def unsupported_currencies(currencies: Sequence[str], rates: Dict[str, float]) -> List[str]:
+    """Requested codes (normalized) that have no rate"""
+    return [code for code in normalize_currencies(currencies) if code not in rates]
+
+
+def _decimals(step: float) -> int:
+    # 0.05 -> 2, 0.5 -> 1, 1 -> 0; removes float noise left by step rounding
+    return max(0, -Decimal(str(step)).normalize().as_tuple().exponent)
+
+
+def convert_responses(
+    responses: Sequence[PricingResponse],
+    currencies: Sequence[Sequence[str]],
+    rates: Dict[str, float],
+    rules: PricingRules
+) -> List[PricingResponse]:
+    """
+    Attach converted prices to each response
+
+    Args:
+        responses: Priced itineraries (TRY)
+        currencies: Requested currencies per response
+        rates: Units of currency per 1 TRY
+        rules: Pricing rules holding the rounding steps
+
+    Returns:
+        Responses whose vehicles carry `converted_prices`
+
+    Raises:
+        UnsupportedCurrencyError: A currency has no rate
+    """
+    wanted = [normalize_currencies(codes) for codes in currencies]
+    codes = list(dict.fromkeys(code for row in wanted for code in row))
+    if not codes:
+        return list(responses)
+    unknown = unsupported_currencies(codes, rates)
+    if unknown:
+        raise UnsupportedCurrencyError(unknown)
+
+    vehicles = [vehicle for response, row in zip(responses, wanted) if row for vehicle in response.vehicles]
+    if not vehicles:
+        return list(responses)
+
+    # (v, f) amounts in TRY
+    amounts = np.array(
+        [[vehicle.price_breakdown.get(name, 0.0) for name in BREAKDOWN_FIELDS[:-1]] + [vehicle.final_price]
+         for vehicle in vehicles],
+        dtype=np.float64
+    )
+    # (c, 1, 1) rates and rounding steps
+    rate = np.array([rates[code] for code in codes], dtype=np.float64)[:, None, None]
+    step = np.array([rules.rounding_step_for(code) for code in codes], dtype=np.float64)[:, None, None]
+
+    converted = np.round(amounts[None, :, :] * rate / step) * step
+    converted = [
+        np.round(converted[i], _decimals(rules.rounding_step_for(code))).tolist()
+        for i, code in enumerate(codes)
+    ]
+
+    column = {code: i for i, code in enumerate(codes)}
+    results = []
+    position = 0
+    for response, row in zip(responses, wanted):
+        if not row:
+            results.append(response)
+            continue
+        priced = []
+        for vehicle in response.vehicles:
+            prices = {}
+            for code in row:
+                values = converted[column[code]][position]
+                prices[code] = ConvertedPrice(
+                    currency=code,
+                    rate=rates[code],
+                    final_price=values[-1],
+                    price_breakdown=dict(zip(BREAKDOWN_FIELDS, values))
+                )
+            priced.append(vehicle.model_copy(update={"converted_prices": prices}))
+            position += 1
+        results.append(response.model_copy(update={"vehicles": priced}))
+    return results
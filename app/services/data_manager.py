@@ -1,18 +1,143 @@
 import pandas as pd
+import numpy as np
 import os
-from typing import List, Dict
+from dataclasses import dataclass, field
+from typing import List, Dict, Iterator, Optional
 
 FILE_PATH = "static/istanbul_transfer.xlsx"
 
+# Rows per batch in streaming mode (bounded memory for large sheets)
+ROUTE_BATCH_SIZE = int(os.getenv("ROUTE_BATCH_SIZE", "5000"))
+
+# Excel column -> route key
+PRICE_COLUMNS = {
+    "Price_Vito": "price_vito",
+    "Price_Sedan": "price_sedan",
+    "Price_Sprinter": "price_sprinter",
+    "Price_VitoVIP": "price_vitovip",
+}
+
+
+@dataclass
+class RouteTable:
+    """
+    Routes in columnar form (one array per column)
+
+    Missing prices and competitor prices are NaN; rows without an origin or
+    destination are already dropped.
+    """
+    ids: List[Optional[int]] = field(default_factory=list)
+    origin: List[str] = field(default_factory=list)
+    destination: List[str] = field(default_factory=list)
+    prices: Dict[str, np.ndarray] = field(default_factory=dict)
+    active: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=bool))
+    discount: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.float64))
+    comp_price: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.float64))
+    notes: List[str] = field(default_factory=list)
+
+    def __len__(self):
+        return len(self.origin)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "RouteTable":
+        """Parse a sheet (header row as columns) with column-wise operations"""
+        if "Price_Vito" not in df.columns:
+            return cls()
+
+        df = df[df["Origin"].notna() & df["Destination"].notna()]
+        rows = len(df)
+
+        def numeric(column: str, default: float) -> np.ndarray:
+            if column not in df.columns:
+                return np.full(rows, default, dtype=np.float64)
+            values = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=np.float64)
+            if not np.isnan(default):
+                values = np.where(np.isnan(values), default, values)
+            return values
+
+        if "ID" in df.columns:
+            ids = pd.to_numeric(df["ID"], errors="coerce")
+            ids = [None if pd.isna(v) else int(v) for v in ids.tolist()]
+        else:
+            ids = [None] * rows
+
+        if "Active" in df.columns:
+            active = df["Active"].where(df["Active"].notna(), True).astype(bool).to_numpy()
+        else:
+            active = np.ones(rows, dtype=bool)
+
+        if "Notes" in df.columns:
+            notes = df["Notes"].where(df["Notes"].notna(), "").astype(str).tolist()
+        else:
+            notes = [""] * rows
+
+        return cls(
+            ids=ids,
+            origin=df["Origin"].astype(str).str.strip().tolist(),
+            destination=df["Destination"].astype(str).str.strip().tolist(),
+            prices={key: numeric(column, np.nan) for column, key in PRICE_COLUMNS.items()},
+            active=active,
+            discount=numeric("Discount", 0.0),
+            comp_price=numeric("Comp_Price", np.nan),
+            notes=notes
+        )
+
+    @classmethod
+    def concat(cls, tables: List["RouteTable"]) -> "RouteTable":
+        """Join batches into one table"""
+        tables = [t for t in tables if len(t)]
+        if not tables:
+            return cls()
+        return cls(
+            ids=[v for t in tables for v in t.ids],
+            origin=[v for t in tables for v in t.origin],
+            destination=[v for t in tables for v in t.destination],
+            prices={key: np.concatenate([t.prices[key] for t in tables]) for key in tables[0].prices},
+            active=np.concatenate([t.active for t in tables]),
+            discount=np.concatenate([t.discount for t in tables]),
+            comp_price=np.concatenate([t.comp_price for t in tables]),
+            notes=[v for t in tables for v in t.notes]
+        )
+
+    def rows(self) -> List[Dict]:
+        """Row dicts in the load_routes() format"""
+        prices = {key: values.tolist() for key, values in self.prices.items()}
+        active = self.active.tolist()
+        discount = self.discount.tolist()
+        comp_price = self.comp_price.tolist()
+        optional = lambda v: None if v != v else v  # NaN -> None
+
+        return [
+            {
+                "id": self.ids[i],
+                "origin": self.origin[i],
+                "destination": self.destination[i],
+                "price_vito": prices["price_vito"][i],
+
+                # Prices
+                "price_sedan": optional(prices["price_sedan"][i]),
+                "price_sprinter": optional(prices["price_sprinter"][i]),
+                "price_vitovip": optional(prices["price_vitovip"][i]),
+
+                # Extra Parameters
+                "active": active[i],
+                "discount": discount[i],
+                "comp_price": optional(comp_price[i]),
+                "notes": self.notes[i]
+            }
+            for i in range(len(self))
+        ]
+
+
 class DataManager:
     @staticmethod
     def ensure_file_exists():
         """Create file with headers if not exists"""
         if not os.path.exists(FILE_PATH):
-            cols = ["ID", "Origin", "Destination", 
+            cols = ["ID", "Origin", "Destination",
                     "Price_Sedan", "Price_Vito", "Price_VitoVIP", "Price_Sprinter",
                     "Active", "Discount", "Comp_Price", "Notes"]
-            
+
             df = pd.DataFrame(columns=cols)
             # Ensure directory exists
             os.makedirs(os.path.dirname(FILE_PATH), exist_ok=True)
@@ -24,43 +149,56 @@ class DataManager:
         """
         Load routes from Excel.
         """
+        return DataManager.load_route_table().rows()
+
+    @staticmethod
+    def load_route_table() -> RouteTable:
+        """
+        Load the whole sheet as a RouteTable (bulk parse, no per-row work)
+        """
         if not os.path.exists(FILE_PATH):
-            return []
+            return RouteTable()
 
         try:
-            df = pd.read_excel(FILE_PATH)
-            routes = []
-            
-            if "Price_Vito" in df.columns:
-                for _, row in df.iterrows():
-                    if pd.notna(row["Origin"]) and pd.notna(row["Destination"]):
-                        # Parse ID if exists
-                        route_id = int(row["ID"]) if "ID" in df.columns and pd.notna(row["ID"]) else None
-
-                        routes.append({
-                            "id": route_id,
-                            "origin": str(row["Origin"]).strip(),
-                            "destination": str(row["Destination"]).strip(),
-                            "price_vito": float(row["Price_Vito"]),
-                            
-                            # Prices
-                            "price_sedan": float(row["Price_Sedan"]) if "Price_Sedan" in df.columns and pd.notna(row["Price_Sedan"]) else None,
-                            "price_sprinter": float(row["Price_Sprinter"]) if "Price_Sprinter" in df.columns and pd.notna(row["Price_Sprinter"]) else None,
-                            "price_vitovip": float(row["Price_VitoVIP"]) if "Price_VitoVIP" in df.columns and pd.notna(row["Price_VitoVIP"]) else None,
-                            
-                            # Extra Parameters
-                            "active": bool(row["Active"]) if "Active" in df.columns and pd.notna(row["Active"]) else True,
-                            "discount": float(row["Discount"]) if "Discount" in df.columns and pd.notna(row["Discount"]) else 0,
-                            "comp_price": float(row["Comp_Price"]) if "Comp_Price" in df.columns and pd.notna(row["Comp_Price"]) else None,
-                            "notes": str(row["Notes"]) if "Notes" in df.columns and pd.notna(row["Notes"]) else ""
-                        })
-                return routes
-            
-            return []
-
+            return RouteTable.from_frame(pd.read_excel(FILE_PATH))
         except (FileNotFoundError, pd.errors.EmptyDataError, pd.errors.ParserError) as e:
             print(f"Error loading routes from Excel: {e}")
-            return []
+            return RouteTable()
         except Exception as e:
             print(f"Unexpected error loading routes: {e}")
-            return []
+            return RouteTable()
+
+    @staticmethod
+    def iter_route_batches(batch_size: Optional[int] = None) -> Iterator[RouteTable]:
+        """
+        Stream the sheet in RouteTable batches (read-only openpyxl)
+
+        Memory stays bounded by batch_size rows, so very large sheets can be
+        imported without loading the workbook at once.
+        """
+        if not os.path.exists(FILE_PATH):
+            return
+        batch_size = batch_size or ROUTE_BATCH_SIZE
+
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(FILE_PATH, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            columns = [str(name) if name is not None else "" for name in header]
+            if "Price_Vito" not in columns:
+                return
+
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    yield RouteTable.from_frame(pd.DataFrame.from_records(batch, columns=columns))
+                    batch = []
+            if batch:
+                yield RouteTable.from_frame(pd.DataFrame.from_records(batch, columns=columns))
+        finally:
+            workbook.close()
@@ -0,0 +1,207 @@
+"""
+Distance Matrix result cache
+
+Two tiers around GoogleMapsClient.calculate_distance_matrix:
+an in-process LRU (fast, per worker) backed by the distance_cache table
+(survives restarts, shared by all workers). Coordinates are snapped to a
+grid of DISTANCE_CACHE_PRECISION decimal places (3 = ~110 m), so users
+picking the same hotel or terminal share one paid API call.
+"""
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import AsyncSessionLocal
+from app.models.db_models import DistanceCache
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+DISTANCE_CACHE_ENABLED = os.getenv("DISTANCE_CACHE_ENABLED", "true").lower() == "true"
+DISTANCE_CACHE_PRECISION = int(os.getenv("DISTANCE_CACHE_PRECISION", "3"))
+DISTANCE_CACHE_TTL_SECONDS = float(os.getenv("DISTANCE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+DISTANCE_CACHE_MAX_ROWS = int(os.getenv("DISTANCE_CACHE_MAX_ROWS", "200000"))
+DISTANCE_CACHE_MEMORY_ENTRIES = int(os.getenv("DISTANCE_CACHE_MEMORY_ENTRIES", "10000"))
+# Kept short so a purge in one worker reaches the others' memory tier soon
+DISTANCE_CACHE_MEMORY_TTL_SECONDS = float(os.getenv("DISTANCE_CACHE_MEMORY_TTL_SECONDS", "3600"))
+# Expired/excess rows are pruned after this many writes
+DISTANCE_CACHE_PRUNE_EVERY = int(os.getenv("DISTANCE_CACHE_PRUNE_EVERY", "500"))
+
+_RESULT_FIELDS = (
+    "distance_meters", "distance_text", "duration_seconds", "duration_text",
+    "origin_address", "destination_address"
+)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class DistanceMatrixCache:
+    """Memory + database cache for Distance Matrix results"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        precision: int = DISTANCE_CACHE_PRECISION,
+        ttl_seconds: float = DISTANCE_CACHE_TTL_SECONDS,
+        max_rows: int = DISTANCE_CACHE_MAX_ROWS,
+        memory_entries: int = DISTANCE_CACHE_MEMORY_ENTRIES,
+        memory_ttl_seconds: float = DISTANCE_CACHE_MEMORY_TTL_SECONDS,
+        enabled: bool = DISTANCE_CACHE_ENABLED
+    ):
+        self.session_factory = session_factory
+        self.precision = precision
+        self.ttl_seconds = ttl_seconds
+        self.max_rows = max_rows
+        self.enabled = enabled
+        self.memory = TTLCache(maxsize=memory_entries, ttl_seconds=min(memory_ttl_seconds, ttl_seconds))
+        self.db_hits = 0
+        self.db_misses = 0
+        self.writes = 0
+        self.db_errors = 0
+        self._writes_since_prune = 0
+
+    def make_key(
+        self,
+        origin_lat: float,
+        origin_lng: float,
+        destination_lat: float,
+        destination_lng: float
+    ) -> str:
+        """Cache key from coordinates snapped to the grid (precision is part of the key)"""
+        p = self.precision
+        return (
+            f"{p}:{origin_lat:.{p}f},{origin_lng:.{p}f}"
+            f"|{destination_lat:.{p}f},{destination_lng:.{p}f}"
+        )
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached result from memory, then the database"""
+        if not self.enabled:
+            return None
+
+        result = self.memory.get(key)
+        if result is not None:
+            return result
+
+        try:
+            async with self.session_factory() as db:
+                row = (await db.execute(
+                    select(DistanceCache).where(
+                        DistanceCache.cache_key == key,
+                        DistanceCache.expires_at > _utcnow()
+                    )
+                )).scalar_one_or_none()
+        except Exception as e:
+            self.db_errors += 1
+            logger.warning(f"Distance cache read failed: {e}")
+            return None
+
+        if row is None:
+            self.db_misses += 1
+            return None
+
+        self.db_hits += 1
+        result = {field: getattr(row, field) for field in _RESULT_FIELDS}
+        self.memory.set(key, result)
+        return result
+
+    async def set(self, key: str, result: Dict[str, Any]):
+        """Store a result in both tiers"""
+        if not self.enabled:
+            return
+
+        self.memory.set(key, result)
+        values = {field: result[field] for field in _RESULT_FIELDS}
+        expires_at = _utcnow() + timedelta(seconds=self.ttl_seconds)
+
+        try:
+            async with self.session_factory() as db:
+                row = (await db.execute(
+                    select(DistanceCache).where(DistanceCache.cache_key == key)
+                )).scalar_one_or_none()
+                if row is None:
+                    db.add(DistanceCache(cache_key=key, expires_at=expires_at, **values))
+                else:
+                    for field, value in values.items():
+                        setattr(row, field, value)
+                    row.expires_at = expires_at
+                try:
+                    await db.commit()
+                except IntegrityError:
+                    # Another worker stored the same key first
+                    await db.rollback()
+                    return
+
+                self.writes += 1
+                self._writes_since_prune += 1
+                if self._writes_since_prune >= DISTANCE_CACHE_PRUNE_EVERY:
+                    self._writes_since_prune = 0
+                    await self._prune(db)
+        except Exception as e:
+            self.db_errors += 1
+            logger.warning(f"Distance cache write failed: {e}")
+
+    async def _prune(self, db: AsyncSession) -> int:
+        """Delete expired rows, then the soonest-expiring ones above max_rows"""
+        removed = (await db.execute(
+            delete(DistanceCache).where(DistanceCache.expires_at <= _utcnow())
+        )).rowcount or 0
+
+        excess = (await db.execute(select(func.count(DistanceCache.id)))).scalar_one() - self.max_rows
+        if excess > 0:
+            oldest = select(DistanceCache.id).order_by(DistanceCache.expires_at).limit(excess)
+            removed += (await db.execute(
+                delete(DistanceCache).where(DistanceCache.id.in_(oldest.scalar_subquery()))
+            )).rowcount or 0
+
+        await db.commit()
+        return removed
+
+    async def prune(self) -> int:
+        """Enforce TTL and size bounds on the table; returns removed rows"""
+        async with self.session_factory() as db:
+            return await self._prune(db)
+
+    async def purge(self) -> int:
+        """Drop every cached result (both tiers); returns removed rows"""
+        self.memory.clear()
+        async with self.session_factory() as db:
+            removed = (await db.execute(delete(DistanceCache))).rowcount or 0
+            await db.commit()
+        return removed
+
+    def forget(self, key: str):
+        """Drop one key from the memory tier"""
+        self.memory.delete(key)
+
+    async def row_count(self) -> int:
+        """Rows currently in the table"""
+        async with self.session_factory() as db:
+            return (await db.execute(select(func.count(DistanceCache.id)))).scalar_one()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for both tiers"""
+        memory = self.memory.stats()
+        lookups = memory["hits"] + memory["misses"]
+        hits = memory["hits"] + self.db_hits
+        return {
+            "enabled": self.enabled,
+            "precision": self.precision,
+            "ttl_seconds": self.ttl_seconds,
+            "max_rows": self.max_rows,
+            "memory": memory,
+            "db_hits": self.db_hits,
+            "db_misses": self.db_misses,
+            "db_errors": self.db_errors,
+            "writes": self.writes,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0
+        }
+
+
+# Singleton instance
+distance_cache = DistanceMatrixCache()
@@ -0,0 +1,318 @@
+"""
+Offline road-distance estimator
+
+Predicts driving distance and duration from coordinates alone: straight-line
+(haversine) distance times a road-detour factor, and a typical speed, both
+learned per zone pair from real Distance Matrix results. Zones are grid cells
+of DISTANCE_ESTIMATE_ZONE_DEG degrees, so e.g. trips crossing the Bosphorus
+learn a larger detour than trips inside one district.
+
+Zone statistics are shrunk towards the per-cell and then the global average
+until they have enough samples, so a zone with one odd trip does not skew
+its estimates.
+"""
+import asyncio
+import logging
+import math
+import os
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Tuple
+from sqlalchemy import select
+from app.core.exceptions import GoogleMapsAPIError
+from app.models.db_models import DistanceCache
+from app.models.pricing import PricingRequest
+
+logger = logging.getLogger(__name__)
+
+DISTANCE_ESTIMATE_ZONE_DEG = float(os.getenv("DISTANCE_ESTIMATE_ZONE_DEG", "0.1"))
+DISTANCE_ESTIMATE_DEFAULT_FACTOR = float(os.getenv("DISTANCE_ESTIMATE_DEFAULT_FACTOR", "1.35"))
+DISTANCE_ESTIMATE_DEFAULT_SPEED_KMH = float(os.getenv("DISTANCE_ESTIMATE_DEFAULT_SPEED_KMH", "35"))
+# Pseudo-samples of the parent average mixed into every zone average
+DISTANCE_ESTIMATE_PRIOR_WEIGHT = float(os.getenv("DISTANCE_ESTIMATE_PRIOR_WEIGHT", "3"))
+# "auto" mode: how long to wait for Google before answering with an estimate
+DISTANCE_ESTIMATE_FALLBACK_TIMEOUT = float(os.getenv("DISTANCE_ESTIMATE_FALLBACK_TIMEOUT", "1.5"))
+
+DISTANCE_MODES = ("google", "estimate", "auto")
+
+# Observations outside these bounds are noise (ferries, GPS errors, tiny hops)
+_MIN_STRAIGHT_KM = 0.5
+_FACTOR_BOUNDS = (1.0, 4.0)
+_SPEED_BOUNDS_KMH = (5.0, 130.0)
+
+Zone = Tuple[int, int]
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance in km"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(h))
+
+
+def format_duration_tr(seconds: int) -> str:
+    """'25 dk' / '1 saat 5 dk' like Distance Matrix with language=tr"""
+    minutes = max(1, round(seconds / 60))
+    hours, minutes = divmod(minutes, 60)
+    if hours and minutes:
+        return f"{hours} saat {minutes} dk"
+    if hours:
+        return f"{hours} saat"
+    return f"{minutes} dk"
+
+
+@dataclass
+class _Stats:
+    count: int = 0
+    factor_sum: float = 0.0
+    speed_sum: float = 0.0
+
+    def add(self, factor: float, speed: float):
+        self.count += 1
+        self.factor_sum += factor
+        self.speed_sum += speed
+
+    def blend(self, prior_factor: float, prior_speed: float, weight: float) -> Tuple[float, float]:
+        """Sample means shrunk towards the prior"""
+        total = self.count + weight
+        return (
+            (self.factor_sum + prior_factor * weight) / total,
+            (self.speed_sum + prior_speed * weight) / total
+        )
+
+
+class DistanceEstimator:
+    """Haversine x learned detour factor, per zone pair"""
+
+    def __init__(
+        self,
+        zone_deg: float = DISTANCE_ESTIMATE_ZONE_DEG,
+        default_factor: float = DISTANCE_ESTIMATE_DEFAULT_FACTOR,
+        default_speed_kmh: float = DISTANCE_ESTIMATE_DEFAULT_SPEED_KMH,
+        prior_weight: float = DISTANCE_ESTIMATE_PRIOR_WEIGHT
+    ):
+        self.zone_deg = zone_deg
+        self.default_factor = default_factor
+        self.default_speed_kmh = default_speed_kmh
+        self.prior_weight = prior_weight
+        self.clear()
+
+    def clear(self):
+        """Forget everything learned"""
+        self._global = _Stats()
+        self._cells: Dict[Zone, _Stats] = {}
+        self._pairs: Dict[Tuple[Zone, Zone], _Stats] = {}
+        self.estimates = 0
+
+    def zone(self, lat: float, lng: float) -> Zone:
+        return math.floor(lat / self.zone_deg), math.floor(lng / self.zone_deg)
+
+    def _pair(self, origin: Zone, destination: Zone) -> Tuple[Zone, Zone]:
+        # Detours are (nearly) symmetric, so A->B and B->A share statistics
+        return (origin, destination) if origin <= destination else (destination, origin)
+
+    def observe(
+        self,
+        origin_lat: float,
+        origin_lng: float,
+        destination_lat: float,
+        destination_lng: float,
+        distance_meters: float,
+        duration_seconds: float
+    ) -> bool:
+        """Learn from one real driving distance; returns False if it was discarded"""
+        straight_km = haversine_km(origin_lat, origin_lng, destination_lat, destination_lng)
+        if straight_km < _MIN_STRAIGHT_KM or duration_seconds <= 0:
+            return False
+
+        road_km = distance_meters / 1000
+        factor = road_km / straight_km
+        speed = road_km / (duration_seconds / 3600)
+        if not (_FACTOR_BOUNDS[0] <= factor <= _FACTOR_BOUNDS[1]
+                and _SPEED_BOUNDS_KMH[0] <= speed <= _SPEED_BOUNDS_KMH[1]):
+            return False
+
+        origin = self.zone(origin_lat, origin_lng)
+        destination = self.zone(destination_lat, destination_lng)
+        self._global.add(factor, speed)
+        for cell in {origin, destination}:
+            self._cells.setdefault(cell, _Stats()).add(factor, speed)
+        self._pairs.setdefault(self._pair(origin, destination), _Stats()).add(factor, speed)
+        return True
+
+    def _parameters(self, origin: Zone, destination: Zone) -> Tuple[float, float, int]:
+        """(detour factor, speed km/h, samples of the zone pair)"""
+        factor, speed = self._global.blend(self.default_factor, self.default_speed_kmh, self.prior_weight)
+
+        cells = [self._cells[cell] for cell in {origin, destination} if cell in self._cells]
+        if cells:
+            merged = _Stats(
+                count=sum(c.count for c in cells),
+                factor_sum=sum(c.factor_sum for c in cells),
+                speed_sum=sum(c.speed_sum for c in cells)
+            )
+            factor, speed = merged.blend(factor, speed, self.prior_weight)
+
+        pair = self._pairs.get(self._pair(origin, destination))
+        if pair is None:
+            return factor, speed, 0
+        factor, speed = pair.blend(factor, speed, self.prior_weight)
+        return factor, speed, pair.count
+
+    def estimate(
+        self,
+        origin_lat: float,
+        origin_lng: float,
+        destination_lat: float,
+        destination_lng: float
+    ) -> Dict[str, Any]:
+        """
+        Estimated distance/duration in the calculate_distance_matrix result shape
+
+        Adds "estimated": True, the detour factor used and the zone-pair samples
+        it was learned from.
+        """
+        straight_km = haversine_km(origin_lat, origin_lng, destination_lat, destination_lng)
+        factor, speed, samples = self._parameters(
+            self.zone(origin_lat, origin_lng), self.zone(destination_lat, destination_lng)
+        )
+        road_km = straight_km * factor
+        duration_seconds = round(road_km / speed * 3600)
+        self.estimates += 1
+
+        return {
+            "distance_meters": round(road_km * 1000),
+            "distance_text": f"{road_km:.1f} km",
+            "duration_seconds": duration_seconds,
+            "duration_text": format_duration_tr(duration_seconds),
+            "origin_address": f"{origin_lat:.5f}, {origin_lng:.5f}",
+            "destination_address": f"{destination_lat:.5f}, {destination_lng:.5f}",
+            "estimated": True,
+            "detour_factor": round(factor, 3),
+            "samples": samples
+        }
+
+    async def train(self, session_factory=None) -> int:
+        """
+        Learn from the unexpired rows of the distance cache
+
+        Coordinates are read back from the cache keys ("p:lat,lng|lat,lng").
+        Returns the number of rows used.
+        """
+        if session_factory is None:
+            from app.services.distance_cache import distance_cache
+            session_factory = distance_cache.session_factory
+
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        async with session_factory() as db:
+            rows = (await db.execute(
+                select(DistanceCache.cache_key, DistanceCache.distance_meters, DistanceCache.duration_seconds)
+                .where(DistanceCache.expires_at > now)
+            )).all()
+
+        used = 0
+        for cache_key, distance_meters, duration_seconds in rows:
+            try:
+                _, coordinates = cache_key.split(":", 1)
+                origin, destination = coordinates.split("|")
+                origin_lat, origin_lng = map(float, origin.split(","))
+                destination_lat, destination_lng = map(float, destination.split(","))
+            except ValueError:
+                continue
+            used += self.observe(origin_lat, origin_lng, destination_lat, destination_lng,
+                                 distance_meters, duration_seconds)
+        return used
+
+    def stats(self) -> Dict[str, Any]:
+        """What the estimator has learned so far"""
+        factor, speed = self._global.blend(self.default_factor, self.default_speed_kmh, self.prior_weight)
+        return {
+            "samples": self._global.count,
+            "zones": len(self._cells),
+            "zone_pairs": len(self._pairs),
+            "zone_deg": self.zone_deg,
+            "detour_factor": round(factor, 3),
+            "speed_kmh": round(speed, 1),
+            "estimates": self.estimates
+        }
+
+
+def with_estimated_distance(request: PricingRequest) -> Tuple[PricingRequest, bool]:
+    """
+    Fill a missing distance/duration from the coordinates
+
+    Returns the (possibly updated) request and whether the distance is an estimate.
+    """
+    if request.distance_km is not None and request.duration_minutes is not None:
+        return request, False
+
+    estimate = distance_estimator.estimate(
+        request.origin_lat, request.origin_lng, request.destination_lat, request.destination_lng
+    )
+    update = {}
+    if request.distance_km is None:
+        update["distance_km"] = round(estimate["distance_meters"] / 1000, 1)
+    if request.duration_minutes is None:
+        update["duration_minutes"] = round(estimate["duration_seconds"] / 60)
+    return request.model_copy(update=update), "distance_km" in update
+
+
+# Google calls still running after "auto" mode answered with an estimate
+_background_lookups = set()
+
+
+async def calculate_distance(
+    maps_client,
+    origin_lat: float,
+    origin_lng: float,
+    destination_lat: float,
+    destination_lng: float,
+    mode: str = "google",
+    timeout: float = DISTANCE_ESTIMATE_FALLBACK_TIMEOUT
+) -> Dict[str, Any]:
+    """
+    Distance through Google, the estimator, or Google with an estimate fallback
+
+    Modes:
+        google: Distance Matrix only (errors propagate)
+        estimate: offline estimate, no outbound call
+        auto: Distance Matrix, but answer with an estimate when Google is not
+            configured, fails to respond or takes longer than timeout; a slow
+            call keeps running so its result still lands in the distance cache
+
+    Raises:
+        GoogleMapsAPIError: In google mode, and in auto mode when Google
+            answered that the route does not exist
+    """
+    if mode not in DISTANCE_MODES:
+        raise ValueError(f"Unknown distance mode: {mode}")
+
+    coordinates = (origin_lat, origin_lng, destination_lat, destination_lng)
+    if mode == "estimate" or (mode == "auto" and maps_client is None):
+        return distance_estimator.estimate(*coordinates)
+    if mode == "google":
+        return await maps_client.calculate_distance_matrix(*coordinates)
+
+    task = asyncio.ensure_future(maps_client.calculate_distance_matrix(*coordinates))
+    try:
+        return await asyncio.wait_for(asyncio.shield(task), timeout)
+    except asyncio.TimeoutError:
+        logger.info("Distance Matrix slower than %.1fs, answering with an estimate", timeout)
+        _background_lookups.add(task)
+        task.add_done_callback(_finish_background_lookup)
+    except GoogleMapsAPIError as e:
+        if "element" in e.details:
+            # Google answered: there is no route
+            raise
+        logger.warning(f"Distance Matrix unavailable, answering with an estimate: {e.message}")
+    return distance_estimator.estimate(*coordinates)
+
+
+def _finish_background_lookup(task: asyncio.Task):
+    _background_lookups.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Background Distance Matrix lookup failed: {task.exception()}")
+
+
+# Singleton instance
+distance_estimator = DistanceEstimator()
@@ -0,0 +1,149 @@
+"""
+Debounced Excel write-back for admin route edits
+
+Admin inserts/updates/deletes only mark the route sheet dirty. A background
+task waits until no change has arrived for EXCEL_WRITEBACK_QUIET_SECONDS
+(but never longer than EXCEL_WRITEBACK_MAX_DELAY_SECONDS after the first
+pending change) and then exports once, in a worker thread: one streamed,
+joined query for routes and vehicle types (see route_export), written to a
+temp file and atomically renamed over the sheet. A burst of edits therefore
+costs one export, and request handling never waits for it.
+"""
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from typing import Any, Callable, Dict, Optional
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.services import data_manager
+from app.services.route_export import iter_sheet_rows, write_xlsx
+
+logger = logging.getLogger(__name__)
+
+EXCEL_WRITEBACK_QUIET_SECONDS = float(os.getenv("EXCEL_WRITEBACK_QUIET_SECONDS", "2"))
+EXCEL_WRITEBACK_MAX_DELAY_SECONDS = float(os.getenv("EXCEL_WRITEBACK_MAX_DELAY_SECONDS", "30"))
+
+
+def export_routes(path: Optional[str] = None, session_factory: Callable[[], Session] = SessionLocal) -> int:
+    """
+    Write every FixedRoute to the route sheet (one row per origin/destination)
+
+    Returns:
+        Number of sheet rows written
+    """
+    path = path or data_manager.FILE_PATH
+
+    # Temp file in the same directory, then atomic rename: readers never see a half-written sheet
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".routes-", suffix=".xlsx")
+    os.close(fd)
+    db = session_factory()
+    try:
+        # Single joined query, streamed and pivoted row by row
+        count = write_xlsx(tmp_path, iter_sheet_rows(db))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        db.close()
+    return count
+
+
+class ExcelWriteBack:
+    """Coalesces route changes into one background export after a quiet period"""
+
+    def __init__(
+        self,
+        export: Callable[[], int] = export_routes,
+        quiet_seconds: float = EXCEL_WRITEBACK_QUIET_SECONDS,
+        max_delay_seconds: float = EXCEL_WRITEBACK_MAX_DELAY_SECONDS
+    ):
+        self._export = export
+        self.quiet_seconds = quiet_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._flush_now = False
+        self._first_change = 0.0
+        self._last_change = 0.0
+        self._dirty = False
+        self.changes = 0
+        self.writes = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.last_duration_ms: Optional[float] = None
+
+    def schedule(self):
+        """Mark the sheet dirty; returns immediately"""
+        now = time.monotonic()
+        if not self._dirty:
+            self._first_change = now
+        self._dirty = True
+        self._last_change = now
+        self.changes += 1
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+
+    def _delay(self) -> float:
+        if self._flush_now:
+            return 0.0
+        now = time.monotonic()
+        return max(0.0, min(
+            self._last_change + self.quiet_seconds - now,
+            self._first_change + self.max_delay_seconds - now
+        ))
+
+    async def _run(self):
+        while self._dirty:
+            delay = self._delay()
+            if delay > 0:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            # Changes arriving during the export start a new round
+            self._dirty = False
+            started = time.perf_counter()
+            try:
+                await asyncio.to_thread(self._export)
+                self.writes += 1
+                self.last_error = None
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                logger.warning(f"Excel write-back failed: {e}")
+            self.last_duration_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    async def flush(self):
+        """Write pending changes now, skipping the quiet period (shutdown)"""
+        if self._task is None or self._task.done():
+            return
+        self._flush_now = True
+        self._wake.set()
+        try:
+            await self._task
+        finally:
+            self._flush_now = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self._dirty,
+            "changes": self.changes,
+            "writes": self.writes,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "last_duration_ms": self.last_duration_ms
+        }
+
+
+# Singleton instance
+excel_writeback = ExcelWriteBack()
@@ -1,6 +1,6 @@
 from sqlalchemy.orm import Session
 from app.database import SessionLocal
-from app.models.db_models import PricingConfig, Vehicle, FixedRoute
+from app.models.db_models import PricingConfig, Vehicle
 
 def init_pricing_data(db: Session):
     """Initialize default pricing configuration if empty"""
@@ -107,83 +107,42 @@ def init_vehicle_data(db: Session):
             db.add(new_vehicle)
     db.commit()
 
-def init_routes_data(db: Session):
+def init_routes_data(db: Session, full_reload: bool = False):
     """
-    Initialize fixed routes: STRICT LOAD from Excel.
+    Initialize fixed routes: STRICT SYNC from Excel.
     The Excel file (istanbul_transfer.xlsx) is the Single Source of Truth.
-    Existing DB data is CLEARED and re-populated from Excel on startup.
+    The DB is diffed against the sheet and only inserts, updates and deletes
+    are applied, in one transaction (unchanged routes keep their IDs).
+    full_reload=True replaces the whole table with a bulk load (COPY on PostgreSQL).
     If Excel file doesn't exist, no routes are loaded.
+    Returns the RouteSyncResult (None when there is no Excel file).
     """
     import os
+    from app.services import data_manager
     from app.services.data_manager import DataManager
-    
-    excel_path = "static/istanbul_transfer.xlsx"
+    from app.services.route_sync import reload_fixed_routes, sync_fixed_routes
     
     # Check if Excel file exists
-    if not os.path.exists(excel_path):
+    if not os.path.exists(data_manager.FILE_PATH):
         print("⚠️  No Excel file found. Skipping route initialization.")
-        return
+        return None
     
     print("Initializing Routes from Excel (Strict Mode)...")
     
-    # 1. Load Vehicles Map
-    vehicles_map = {v.vehicle_type: v for v in db.query(Vehicle).all()}
-    
-    # Excel Column Key -> Vehicle Type Key
-    type_map = {
-        "price_vito": "vito",
-        "price_sedan": "luxury_sedan",  # Fixed: matches DB vehicle_type
-        "price_sprinter": "sprinter",
-        "price_vitovip": "vito_vip" 
-    }
+    vehicle_ids = {v.vehicle_type: v.id for v in db.query(Vehicle).all()}
     
-    # 2. Strict Sync: CLEAR existing routes first
-    # This ensures if user removes a row in Excel, it's gone from DB.
-    deleted_count = db.query(FixedRoute).delete()
-    db.commit()
-    print(f"  -> Cleared {deleted_count} existing routes from DB to sync with Excel.")
+    # Sheet is streamed in batches; removed rows are deleted, so an empty sheet empties the table
+    sync = reload_fixed_routes if full_reload else sync_fixed_routes
+    result = sync(db, DataManager.iter_route_batches(), vehicle_ids)
     
-    # 3. Load Excel Data
-    excel_routes = DataManager.load_routes()
-    
-    if not excel_routes:
+    if not result.sheet_rows:
         print("  -> Excel file is empty! Database routes will be empty.")
-        return
-
-    print(f"  -> Loading {len(excel_routes)} routes from Excel...")
-    
-    count = 0
-    for r in excel_routes:
-        origin = r["origin"]
-        destination = r["destination"]
-        
-        for price_key, vehicle_type in type_map.items():
-            price_val = r.get(price_key)
-            
-            # Ensure vehicle exists
-            vehicle = vehicles_map.get(vehicle_type)
-            if not vehicle:
-                continue
-
-            # Only add if price is valid (>1.0)
-            if price_val and price_val > 1.0:
-                 new_route = FixedRoute(
-                    origin=origin,
-                    destination=destination,
-                    vehicle_id=vehicle.id,
-                    price=price_val,
-                    
-                    # Extra Params from Excel
-                    active=r.get("active", True),
-                    discount_percent=r.get("discount", 0),
-                    competitor_price=r.get("comp_price", None),
-                    notes=r.get("notes", "")
-                )
-                 db.add(new_route)
-                 count += 1
-    
-    db.commit()
-    print(f"✅ Excel Sync Complete. Imported {count} price entries.")
+    print(
+        f"✅ Excel Sync Complete. {result.sheet_rows} routes: {result.inserted} inserted, "
+        f"{result.updated} updated, {result.deleted} deleted, {result.unchanged} unchanged "
+        f"({result.timings_ms})"
+    )
+    return result
 
 def init_db_data():
     """Main initialization entry point"""
@@ -9,7 +9,9 @@ from app.schemas.maps import (
     Place,
     MapsKeyResponse
 )
-from app.utils.google_maps import google_maps_client
+from app.services.distance_estimator import calculate_distance
+from app.services.place_index import place_index
+from app.utils.google_maps import GoogleMapsClient, get_maps_client
 from app.core.config import settings
 from app.core.exceptions import GoogleMapsAPIError
 
@@ -17,8 +19,10 @@ from app.core.exceptions import GoogleMapsAPIError
 class MapsService:
     """Service for maps-related business logic"""
     
-    def __init__(self):
-        self.maps_client = google_maps_client
+    @property
+    def maps_client(self) -> GoogleMapsClient:
+        """Shared client (created on first use)"""
+        return get_maps_client()
     
     async def calculate_distance(self, request: DistanceRequest) -> DistanceResponse:
         """
@@ -30,11 +34,13 @@ class MapsService:
         Returns:
             Distance calculation response
         """
-        result = await self.maps_client.calculate_distance_matrix(
+        result = await calculate_distance(
+            self.maps_client if request.mode != "estimate" else None,
             origin_lat=request.origin_lat,
             origin_lng=request.origin_lng,
             destination_lat=request.destination_lat,
-            destination_lng=request.destination_lng
+            destination_lng=request.destination_lng,
+            mode=request.mode
         )
         
         # Convert to response format
@@ -47,7 +53,8 @@ class MapsService:
             duration_minutes=duration_minutes,
             duration_text=result["duration_text"],
             origin_address=result["origin_address"],
-            destination_address=result["destination_address"]
+            destination_address=result["destination_address"],
+            is_estimate=result.get("estimated", False)
         )
     
     async def search_places(self, request: PlaceSearchRequest) -> PlaceSearchResponse:
@@ -64,10 +71,14 @@ class MapsService:
         if request.location_lat and request.location_lng:
             location = (request.location_lat, request.location_lng)
         
-        places_data = await self.maps_client.search_places(
-            query=request.query,
-            location=location
-        )
+        # Hot places are answered from the local index
+        places_data = place_index.search(request.query)
+        if places_data is None:
+            places_data = await self.maps_client.search_places(
+                query=request.query,
+                location=location
+            )
+            place_index.learn(places_data)
         
         places = [Place(**place) for place in places_data]
         
@@ -0,0 +1,260 @@
+"""
+Local place search index
+
+Answers /api/search-places for the hot set (airports, ISTANBUL_LOCATIONS
+districts and places Google already returned) from memory. Names are folded
+Turkish-aware ("İSTANBUL", "istanbul" and "Istanbul" are the same token),
+the last query token matches as a prefix (autocomplete) and tokens of 4+
+letters tolerate one typo via a deletion-variant table.
+
+A query is answered locally only when every query token matches one indexed
+name; anything else falls through to Google and the results are learned.
+Like Google's location bias, a search location only breaks ties: equally
+good matches are returned nearest first.
+"""
+import math
+import os
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from app.core.constants import ISTANBUL_LOCATIONS, ISTANBUL_LOCATION_COORDINATES, ISTANBUL_LOCATION_ALIASES
+
+PLACE_INDEX_ENABLED = os.getenv("PLACE_INDEX_ENABLED", "true").lower() == "true"
+PLACE_INDEX_MAX_LEARNED = int(os.getenv("PLACE_INDEX_MAX_LEARNED", "5000"))
+PLACE_INDEX_MIN_QUERY_LENGTH = int(os.getenv("PLACE_INDEX_MIN_QUERY_LENGTH", "3"))
+PLACE_INDEX_MAX_RESULTS = int(os.getenv("PLACE_INDEX_MAX_RESULTS", "10"))
+
+# Token match scores
+EXACT_SCORE = 1.0
+PREFIX_SCORE = 0.9
+FUZZY_SCORE = 0.8
+FUZZY_MIN_LENGTH = 4
+MAX_PREFIX_TOKENS = 200
+
+_TURKISH_FOLD = str.maketrans({
+    "İ": "i", "I": "i", "ı": "i",
+    "Ş": "s", "ş": "s", "Ğ": "g", "ğ": "g",
+    "Ü": "u", "ü": "u", "Ö": "o", "ö": "o", "Ç": "c", "ç": "c"
+})
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def fold(text: str) -> str:
+    """Lowercase ASCII form of a place name (Turkish letters folded first)"""
+    text = unicodedata.normalize("NFKD", text.translate(_TURKISH_FOLD).lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _NON_ALNUM.sub(" ", text).strip()
+
+
+def tokenize(text: str) -> Tuple[str, ...]:
+    return tuple(fold(text).split())
+
+
+def _distance_sq(place: Dict[str, Any], location: Tuple[float, float]) -> float:
+    # Equirectangular approximation; only used to order nearby candidates
+    dlat = place["lat"] - location[0]
+    dlng = (place["lng"] - location[1]) * math.cos(math.radians(location[0]))
+    return dlat * dlat + dlng * dlng
+
+
+def _variants(token: str) -> Set[str]:
+    """The token and, if long enough, every single-letter deletion of it"""
+    variants = {token}
+    if len(token) >= FUZZY_MIN_LENGTH:
+        variants.update(token[:i] + token[i + 1:] for i in range(len(token)))
+    return variants
+
+
+class PlaceIndex:
+    """In-memory token/prefix index over place names"""
+
+    def __init__(self, max_learned: int = PLACE_INDEX_MAX_LEARNED, enabled: bool = PLACE_INDEX_ENABLED):
+        self.max_learned = max_learned
+        self.enabled = enabled
+        self._places: Dict[str, Dict[str, Any]] = {}
+        self._hits: Dict[str, int] = {}
+        self._place_docs: Dict[str, List[int]] = {}
+        self._learned: "OrderedDict[str, None]" = OrderedDict()
+        # doc = one searchable name (a place can have aliases)
+        self._docs: Dict[int, Tuple[str, Tuple[str, ...]]] = {}
+        self._next_doc = 0
+        self._postings: Dict[str, Set[int]] = {}
+        self._vocabulary: List[str] = []
+        self._fuzzy: Dict[str, Set[str]] = {}
+        self._seed_names: Set[str] = set()
+        self.lookups = 0
+        self.local_hits = 0
+        self.fallbacks = 0
+        self._seed()
+
+    def _seed(self):
+        for name, _ in ISTANBUL_LOCATIONS:
+            lat, lng = ISTANBUL_LOCATION_COORDINATES[name]
+            place = {
+                "place_id": "local-" + fold(name).replace(" ", "-"),
+                "name": name,
+                "address": f"{name}, İstanbul, Türkiye",
+                "lat": lat,
+                "lng": lng
+            }
+            self._add(place, [name, *ISTANBUL_LOCATION_ALIASES.get(name, [])])
+            self._seed_names.add(fold(name))
+
+    def _add(self, place: Dict[str, Any], names: Iterable[str]):
+        place_id = place["place_id"]
+        self._places[place_id] = place
+        self._hits.setdefault(place_id, 0)
+        docs = self._place_docs.setdefault(place_id, [])
+        for name in names:
+            tokens = tokenize(name)
+            if not tokens:
+                continue
+            doc_id = self._next_doc
+            self._next_doc += 1
+            self._docs[doc_id] = (place_id, tokens)
+            docs.append(doc_id)
+            for token in set(tokens):
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = set()
+                    insort(self._vocabulary, token)
+                    for variant in _variants(token):
+                        self._fuzzy.setdefault(variant, set()).add(token)
+                postings.add(doc_id)
+
+    def _remove(self, place_id: str):
+        self._places.pop(place_id, None)
+        self._hits.pop(place_id, None)
+        for doc_id in self._place_docs.pop(place_id, []):
+            _, tokens = self._docs.pop(doc_id)
+            for token in set(tokens):
+                postings = self._postings[token]
+                postings.discard(doc_id)
+                if postings:
+                    continue
+                del self._postings[token]
+                del self._vocabulary[bisect_left(self._vocabulary, token)]
+                for variant in _variants(token):
+                    tokens_for_variant = self._fuzzy[variant]
+                    tokens_for_variant.discard(token)
+                    if not tokens_for_variant:
+                        del self._fuzzy[variant]
+
+    def learn(self, places: Iterable[Dict[str, Any]]):
+        """Index places returned by Google (oldest learned ones are evicted)"""
+        for place in places:
+            place_id = place.get("place_id")
+            if not place_id or not place.get("name") or place_id.startswith("local-"):
+                continue
+            if fold(place["name"]) in self._seed_names:
+                # Already answered by the seeded entry
+                continue
+            if place_id in self._learned:
+                self._learned.move_to_end(place_id)
+                self._remove(place_id)
+            self._learned[place_id] = None
+            self._add(dict(place), [place["name"]])
+
+        while len(self._learned) > self.max_learned:
+            oldest, _ = self._learned.popitem(last=False)
+            self._remove(oldest)
+
+    def clear_learned(self):
+        """Forget every learned place and reset counters (seeds stay)"""
+        for place_id in list(self._learned):
+            self._remove(place_id)
+        self._learned.clear()
+        for place_id in self._hits:
+            self._hits[place_id] = 0
+        self.lookups = self.local_hits = self.fallbacks = 0
+
+    def _token_matches(self, token: str, allow_prefix: bool) -> Dict[str, float]:
+        """Indexed tokens matching one query token, with their scores"""
+        matches: Dict[str, float] = {}
+        if allow_prefix:
+            start = bisect_left(self._vocabulary, token)
+            for candidate in self._vocabulary[start:start + MAX_PREFIX_TOKENS]:
+                if not candidate.startswith(token):
+                    break
+                matches[candidate] = PREFIX_SCORE
+        if token in self._postings:
+            matches[token] = EXACT_SCORE
+        elif len(token) >= FUZZY_MIN_LENGTH:
+            for variant in _variants(token):
+                for candidate in self._fuzzy.get(variant, ()):
+                    if abs(len(candidate) - len(token)) <= 1:
+                        matches.setdefault(candidate, FUZZY_SCORE)
+        return matches
+
+    def search(self, query: str, location: Optional[Tuple[float, float]] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Places for a query, or None when the index is not confident
+
+        Every query token must match a token of the same name: exactly, as a
+        prefix (last token only) or with one typo (4+ letters). With a
+        (lat, lng) location, equally scored places are ordered nearest first.
+        """
+        if not self.enabled:
+            return None
+        self.lookups += 1
+
+        tokens = tokenize(query)
+        if len("".join(tokens)) < PLACE_INDEX_MIN_QUERY_LENGTH:
+            self.fallbacks += 1
+            return None
+
+        doc_scores: Optional[Dict[int, float]] = None
+        for i, token in enumerate(tokens):
+            scores: Dict[int, float] = {}
+            for candidate, score in self._token_matches(token, allow_prefix=i == len(tokens) - 1).items():
+                for doc_id in self._postings[candidate]:
+                    if score > scores.get(doc_id, 0.0):
+                        scores[doc_id] = score
+            if doc_scores is None:
+                doc_scores = scores
+            else:
+                doc_scores = {doc_id: doc_scores[doc_id] + score for doc_id, score in scores.items() if doc_id in doc_scores}
+            if not doc_scores:
+                self.fallbacks += 1
+                return None
+
+        # Best name per place; names without extra words rank first
+        place_scores: Dict[str, float] = {}
+        for doc_id, total in doc_scores.items():
+            place_id, doc_tokens = self._docs[doc_id]
+            score = total / len(tokens) + 0.1 * min(1.0, len(tokens) / len(doc_tokens))
+            if score > place_scores.get(place_id, 0.0):
+                place_scores[place_id] = score
+
+        def rank(place_id: str):
+            distance = _distance_sq(self._places[place_id], location) if location else 0.0
+            return -place_scores[place_id], distance, -self._hits[place_id]
+
+        ranked = sorted(place_scores, key=rank)
+        ranked = ranked[:PLACE_INDEX_MAX_RESULTS]
+        for place_id in ranked:
+            self._hits[place_id] += 1
+            if place_id in self._learned:
+                self._learned.move_to_end(place_id)
+
+        self.local_hits += 1
+        return [dict(self._places[place_id]) for place_id in ranked]
+
+    def stats(self) -> Dict[str, Any]:
+        """Index size and local answer rate"""
+        return {
+            "enabled": self.enabled,
+            "places": len(self._places),
+            "learned": len(self._learned),
+            "tokens": len(self._postings),
+            "lookups": self.lookups,
+            "local_hits": self.local_hits,
+            "fallbacks": self.fallbacks,
+            "local_hit_rate": round(self.local_hits / self.lookups, 4) if self.lookups else 0.0
+        }
+
+
+# Singleton instance
+place_index = PlaceIndex()
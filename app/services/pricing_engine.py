@@ -0,0 +1,155 @@
+"""
+Vectorized pricing engine
+
+Computes prices for every (itinerary x vehicle) pair at once with NumPy.
+The arithmetic mirrors calculate_vehicle_price() step for step so a batch
+quote returns exactly the same numbers as the single-quote endpoint.
+"""
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.models.pricing import (
+    VehicleType, PricingRequest, PricingResponse, VehiclePricing,
+    BatchPricingItem
+)
+from app.services.pricing_snapshot import PricingSnapshot
+
+
+def resolve_fixed_routes(
+    snapshot: PricingSnapshot,
+    requests: List[PricingRequest]
+) -> List[Optional[Dict[VehicleType, float]]]:
+    """Match fixed routes for all itineraries, each distinct pair only once"""
+    matches: Dict[Tuple[str, str], Optional[Dict[VehicleType, float]]] = {}
+    resolved = []
+    for request in requests:
+        key = (request.origin_name, request.destination_name)
+        if key not in matches:
+            matches[key] = snapshot.route_matcher.match(*key)
+        resolved.append(matches[key])
+    return resolved
+
+
+def calculate_batch_pricing(
+    snapshot: PricingSnapshot,
+    requests: List[PricingRequest]
+) -> List[BatchPricingItem]:
+    """
+    Price many itineraries in one pass
+
+    Args:
+        snapshot: Pricing snapshot to quote from
+        requests: Itineraries, in the order results should be returned
+
+    Returns:
+        One item per request, holding either a PricingResponse or an error
+    """
+    vehicles = list(snapshot.vehicles.values())
+    rules = snapshot.rules
+    fixed_routes = resolve_fixed_routes(snapshot, requests)
+
+    # Per-vehicle columns (m,)
+    base_fare = np.array([v.base_fare for v in vehicles], dtype=np.float64)
+    per_km_rate = np.array([v.per_km_rate for v in vehicles], dtype=np.float64)
+    airport_fee = np.array([v.airport_fee for v in vehicles], dtype=np.float64)
+    capacity = np.array([v.capacity for v in vehicles], dtype=np.int64)
+    minimum_fare = np.array([rules.minimum_fare_for(v.type.value) for v in vehicles], dtype=np.float64)
+
+    # Per-itinerary rows (n, 1)
+    distance_km = np.array([r.distance_km for r in requests], dtype=np.float64)[:, None]
+    is_round_trip = np.array([r.is_round_trip for r in requests], dtype=bool)[:, None]
+    is_airport = np.array([r.is_airport_transfer for r in requests], dtype=bool)[:, None]
+    passengers = np.array([r.passenger_count for r in requests], dtype=np.int64)[:, None]
+
+    # Fixed prices (n, m); 0 or missing means distance-based, as in calculate_vehicle_price
+    fixed_price = np.zeros((len(requests), len(vehicles)), dtype=np.float64)
+    for row, prices in enumerate(fixed_routes):
+        if prices:
+            for col, vehicle in enumerate(vehicles):
+                fixed_price[row, col] = prices.get(vehicle.type, 0)
+    is_fixed = fixed_price != 0
+
+    base_price = np.where(is_fixed, 0.0, base_fare)
+    distance_price = np.where(is_fixed, fixed_price, distance_km * per_km_rate)
+    airport_charge = np.where(is_fixed | ~is_airport, 0.0, airport_fee)
+    subtotal = base_price + distance_price + airport_charge
+
+    round_trip_discount = np.where(is_round_trip, subtotal * (rules.round_trip_discount / 100), 0.0)
+    final_price = subtotal - round_trip_discount
+    # Round-trip ise çift yön hesapla (sabit fiyatta değil)
+    final_price = np.where(is_round_trip & ~is_fixed, final_price * 2 - round_trip_discount, final_price)
+
+    minimum_applied = ~is_fixed & (minimum_fare > 0) & (final_price < minimum_fare)
+    final_price = np.where(minimum_applied, minimum_fare, final_price)
+
+    eligible = passengers <= capacity
+
+    # Python floats for building the response models
+    base_price = base_price.tolist()
+    distance_price = distance_price.tolist()
+    airport_charge = airport_charge.tolist()
+    subtotal = subtotal.tolist()
+    round_trip_discount = round_trip_discount.tolist()
+    final_price = final_price.tolist()
+    minimum_applied = minimum_applied.tolist()
+    minimum_fare = minimum_fare.tolist()
+
+    results = []
+    for row, request in enumerate(requests):
+        columns = np.flatnonzero(eligible[row]).tolist()
+        if not columns:
+            results.append(BatchPricingItem(
+                index=row,
+                error=f"Yolcu sayısı ({request.passenger_count}) için uygun araç bulunamadı"
+            ))
+            continue
+
+        vehicles_pricing = []
+        for col in columns:
+            vehicle = vehicles[col]
+            final = round(final_price[row][col], 2)
+            # Values are already typed, so skip re-validation
+            vehicles_pricing.append(VehiclePricing.model_construct(
+                vehicle_type=vehicle.type,
+                vehicle_name=vehicle.name,
+                vehicle_name_tr=vehicle.name_tr,
+                capacity=vehicle.capacity,
+                base_price=base_price[row][col],
+                distance_price=distance_price[row][col],
+                airport_fee=airport_charge[row][col],
+                subtotal=subtotal[row][col],
+                round_trip_discount=round_trip_discount[row][col],
+                final_price=final,
+                image_url=vehicle.image_url,
+                images=vehicle.images,
+                price_breakdown={
+                    "base_fare": base_price[row][col],
+                    "distance_charge": distance_price[row][col],
+                    "airport_fee": airport_charge[row][col],
+                    "subtotal": subtotal[row][col],
+                    "discount": round_trip_discount[row][col],
+                    "minimum_applied": minimum_fare[col] if minimum_applied[row][col] else 0,
+                    "final": final
+                }
+            ))
+
+        # Fiyata göre sırala (en ucuzdan en pahalıya)
+        vehicles_pricing.sort(key=lambda x: x.final_price)
+
+        results.append(BatchPricingItem(
+            index=row,
+            result=PricingResponse(
+                route_info={
+                    "origin": request.origin_name,
+                    "destination": request.destination_name,
+                    "distance_km": request.distance_km,
+                    "duration_minutes": request.duration_minutes,
+                    "is_round_trip": request.is_round_trip,
+                    "is_airport_transfer": request.is_airport_transfer,
+                    "is_fixed_route": fixed_routes[row] is not None,
+                    "distance_estimated": False
+                },
+                vehicles=vehicles_pricing
+            )
+        ))
+
+    return results
@@ -0,0 +1,191 @@
+"""
+Pricing snapshot - process-wide, immutable view of the pricing data
+
+Quotes read vehicles, pricing rules and the fixed route matcher from the
+current snapshot without touching the database. Admin changes and Excel
+imports bump the version stamp; the snapshot is then rebuilt in the
+background and swapped in atomically, while requests keep reading the
+previous one.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models.pricing import (
+    VehicleType, VehicleInfo, PricingRules,
+    get_vehicle_configs, load_pricing_rules
+)
+from app.services.route_matcher import FixedRouteMatcher
+from app.services.route_price_matrix import FixedRoutePriceMatrix
+
+logger = logging.getLogger(__name__)
+
+# Other workers only see admin changes through this age limit
+SNAPSHOT_MAX_AGE_SECONDS = float(os.getenv("PRICING_SNAPSHOT_MAX_AGE_SECONDS", "300"))
+
+
+@dataclass(frozen=True)
+class PricingSnapshot:
+    """Immutable pricing data used by quotes"""
+    version: int
+    vehicles: Dict[VehicleType, VehicleInfo]
+    rules: PricingRules
+    route_matcher: FixedRouteMatcher
+    route_matrix: FixedRoutePriceMatrix
+    built_at: float
+
+    @property
+    def stamp(self) -> Tuple[int, float]:
+        """Identifies this exact build (max-age rebuilds keep the version)"""
+        return (self.version, self.built_at)
+
+
+def build_pricing_snapshot(db: Session, version: int) -> PricingSnapshot:
+    """Load everything a quote needs from the database (constant query count)"""
+    rules = load_pricing_rules(db)
+    route_matcher = FixedRouteMatcher.from_db(db)
+    return PricingSnapshot(
+        version=version,
+        vehicles=get_vehicle_configs(db, rules),
+        rules=rules,
+        route_matcher=route_matcher,
+        route_matrix=FixedRoutePriceMatrix(route_matcher, rules),
+        built_at=time.monotonic()
+    )
+
+
+class PricingSnapshotStore:
+    """Holds the current snapshot and rebuilds it when the version changes"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        max_age_seconds: float = SNAPSHOT_MAX_AGE_SECONDS
+    ):
+        self.session_factory = session_factory
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._version = 0
+        self._snapshot: Optional[PricingSnapshot] = None
+        self._rebuilding = False
+
+    @property
+    def version(self) -> int:
+        """Current pricing data version"""
+        return self._version
+
+    @property
+    def is_warm(self) -> bool:
+        """Whether get()/get_async() can answer without building a snapshot"""
+        return self._snapshot is not None
+
+    def bump_version(self) -> int:
+        """
+        Mark pricing data as changed and rebuild the snapshot in the background
+
+        Returns:
+            The new version number
+        """
+        with self._lock:
+            self._version += 1
+            version = self._version
+        self._schedule_rebuild()
+        return version
+
+    def get(self) -> PricingSnapshot:
+        """
+        Return the current snapshot
+
+        Only the very first call builds synchronously; a stale snapshot is
+        still served while its replacement is built in the background.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            return self.refresh()
+        if self._is_stale(snapshot):
+            self._schedule_rebuild()
+        return snapshot
+
+    async def get_async(self, db: AsyncSession) -> PricingSnapshot:
+        """
+        Return the current snapshot from an async request handler
+
+        Same as get(), but a cold build runs through the async session so
+        it never blocks the event loop.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            return await self.refresh_async(db)
+        if self._is_stale(snapshot):
+            self._schedule_rebuild()
+        return snapshot
+
+    def refresh(self) -> PricingSnapshot:
+        """Build a snapshot for the current version and swap it in"""
+        version = self._version
+        db = self.session_factory()
+        try:
+            snapshot = build_pricing_snapshot(db, version)
+        finally:
+            db.close()
+        return self._swap(snapshot)
+
+    async def refresh_async(self, db: AsyncSession) -> PricingSnapshot:
+        """Build a snapshot through an async session and swap it in"""
+        snapshot = await db.run_sync(build_pricing_snapshot, self._version)
+        return self._swap(snapshot)
+
+    def _swap(self, snapshot: PricingSnapshot) -> PricingSnapshot:
+        with self._lock:
+            if self._snapshot is None or snapshot.version >= self._snapshot.version:
+                self._snapshot = snapshot
+            return self._snapshot
+
+    def clear(self):
+        """Drop the current snapshot (next read rebuilds it)"""
+        with self._lock:
+            self._snapshot = None
+
+    def _is_stale(self, snapshot: PricingSnapshot) -> bool:
+        if snapshot.version != self._version:
+            return True
+        return time.monotonic() - snapshot.built_at > self.max_age_seconds
+
+    def _schedule_rebuild(self):
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        if loop is not None:
+            loop.run_in_executor(None, self._rebuild)
+        else:
+            threading.Thread(target=self._rebuild, daemon=True).start()
+
+    def _rebuild(self):
+        try:
+            # Keep going until the snapshot catches up with bumps made mid-build
+            while True:
+                snapshot = self.refresh()
+                if snapshot.version == self._version:
+                    break
+        except Exception:
+            logger.exception("Pricing snapshot rebuild failed")
+        finally:
+            with self._lock:
+                self._rebuilding = False
+
+
+# Singleton instance
+pricing_snapshot_store = PricingSnapshotStore()
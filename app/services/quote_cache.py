@@ -0,0 +1,107 @@
+"""
+Quote result cache
+
+Repeated quotes for the same itinerary are served from an LRU+TTL cache
+instead of being recomputed. Keys are built from the normalized place
+names, a distance bucket, the passenger bucket (which vehicles can carry
+the group), the trip flags and the pricing snapshot the quote came from.
+"""
+import os
+from bisect import bisect_left
+from typing import Hashable, List, Optional, Tuple
+from app.models.pricing import (
+    PricingRequest, PricingResponse, VehiclePricing, normalize_location_name
+)
+from app.services.pricing_snapshot import PricingSnapshot
+from app.utils.cache import TTLCache
+
+QUOTE_CACHE_MAX_ENTRIES = int(os.getenv("QUOTE_CACHE_MAX_ENTRIES", "10000"))
+QUOTE_CACHE_TTL_SECONDS = float(os.getenv("QUOTE_CACHE_TTL_SECONDS", "300"))
+# Distances within one bucket share a cached quote (Distance Matrix results are 0.1 km precise)
+QUOTE_CACHE_DISTANCE_BUCKET_KM = float(os.getenv("QUOTE_CACHE_DISTANCE_BUCKET_KM", "0.1"))
+
+
+class QuoteCache:
+    """Caches the priced vehicle list for an itinerary"""
+
+    def __init__(
+        self,
+        maxsize: int = QUOTE_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = QUOTE_CACHE_TTL_SECONDS,
+        distance_bucket_km: float = QUOTE_CACHE_DISTANCE_BUCKET_KM
+    ):
+        self.distance_bucket_km = distance_bucket_km
+        self._cache = TTLCache(maxsize=maxsize, ttl_seconds=ttl_seconds)
+
+    def make_key(self, snapshot: PricingSnapshot, request: PricingRequest) -> Hashable:
+        """Cache key for a request priced against a snapshot"""
+        # Number of vehicles too small for the group - identical for every
+        # passenger count between two capacity boundaries
+        capacities = sorted(v.capacity for v in snapshot.vehicles.values())
+        passenger_bucket = bisect_left(capacities, request.passenger_count)
+
+        if self.distance_bucket_km > 0:
+            distance_bucket = round(request.distance_km / self.distance_bucket_km)
+        else:
+            distance_bucket = request.distance_km
+
+        return (
+            normalize_location_name(request.origin_name),
+            normalize_location_name(request.destination_name),
+            distance_bucket,
+            passenger_bucket,
+            request.is_round_trip,
+            request.is_airport_transfer,
+            snapshot.stamp
+        )
+
+    def get(
+        self,
+        key: Hashable,
+        request: PricingRequest,
+        distance_estimated: bool = False
+    ) -> Optional[PricingResponse]:
+        """Cached response for the key, with route info taken from this request"""
+        entry: Optional[Tuple[List[VehiclePricing], bool]] = self._cache.get(key)
+        if entry is None:
+            return None
+        vehicles, is_fixed_route = entry
+        return build_pricing_response(request, vehicles, is_fixed_route, distance_estimated)
+
+    def set(self, key: Hashable, response: PricingResponse):
+        """Store the priced vehicles of a response"""
+        self._cache.set(key, (response.vehicles, response.route_info["is_fixed_route"]))
+
+    def clear(self):
+        """Drop every cached quote"""
+        self._cache.clear()
+
+    def stats(self):
+        """Hit/miss/eviction counters"""
+        return {**self._cache.stats(), "distance_bucket_km": self.distance_bucket_km}
+
+
+def build_pricing_response(
+    request: PricingRequest,
+    vehicles: List[VehiclePricing],
+    is_fixed_route: bool,
+    distance_estimated: bool = False
+) -> PricingResponse:
+    """PricingResponse for a request and its priced vehicles"""
+    return PricingResponse(
+        route_info={
+            "origin": request.origin_name,
+            "destination": request.destination_name,
+            "distance_km": request.distance_km,
+            "duration_minutes": request.duration_minutes,
+            "is_round_trip": request.is_round_trip,
+            "is_airport_transfer": request.is_airport_transfer,
+            "is_fixed_route": is_fixed_route,
+            "distance_estimated": distance_estimated
+        },
+        vehicles=vehicles
+    )
+
+
+# Singleton instance
+quote_cache = QuoteCache()
@@ -0,0 +1,265 @@
+"""
+Route catalog export (xlsx / CSV)
+
+FixedRoute rows are read with one joined, ordered query in yield_per chunks
+and pivoted on the fly into sheet rows (one per origin/destination, vehicle
+prices in Price_* columns), so memory stays flat regardless of catalog size.
+Rows keep their sheet order (route precedence), with routes created outside
+the sheet at the end.
+xlsx is written with openpyxl write-only mode; CSV is produced as a byte
+generator. Finished artifacts are cached per data key: this worker's pricing
+data version plus a fingerprint of the tables (row count, max id, latest
+updated_at), so changes made by other workers or directly in the database
+also produce a new file.
+"""
+import csv
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Optional
+from openpyxl import Workbook
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models.db_models import FixedRoute, Vehicle
+from app.services import data_manager
+from app.services.route_sync import PRICE_KEY_VEHICLE_TYPES
+
+# Rows fetched per round trip while streaming the catalog
+ROUTE_EXPORT_YIELD_PER = int(os.getenv("ROUTE_EXPORT_YIELD_PER", "1000"))
+# CSV bytes per streamed chunk
+ROUTE_EXPORT_CHUNK_BYTES = 64 * 1024
+# Artifacts per format kept after a rebuild, and how long any built or served
+# artifact is left alone (a download of it may still be starting)
+ROUTE_EXPORT_KEEP = 2
+ROUTE_EXPORT_GRACE_SECONDS = float(os.getenv("ROUTE_EXPORT_GRACE_SECONDS", "300"))
+
+SHEET_COLUMNS = ["ID", "Origin", "Destination", "Price_Sedan", "Price_Vito", "Price_VitoVIP",
+                 "Price_Sprinter", "Active", "Discount", "Comp_Price", "Notes"]
+
+# vehicle_type -> sheet price column (inverse of the import mapping)
+VEHICLE_TYPE_COLUMNS = {
+    PRICE_KEY_VEHICLE_TYPES[key]: column for column, key in data_manager.PRICE_COLUMNS.items()
+}
+
+MEDIA_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def data_fingerprint(db: Session) -> tuple:
+    """Cheap aggregate that changes with any insert, delete or update of the exported tables"""
+    routes = db.execute(
+        select(func.count(FixedRoute.id), func.max(FixedRoute.id), func.max(FixedRoute.updated_at))
+    ).one()
+    vehicles = db.execute(select(func.count(Vehicle.id), func.max(Vehicle.updated_at))).one()
+    return (*routes, *vehicles)
+
+
+def iter_sheet_rows(db: Session, yield_per: int = ROUTE_EXPORT_YIELD_PER) -> Iterator[Dict[str, Any]]:
+    """Sheet rows in sheet order, built while the query streams"""
+    # Earliest sheet position of the pair keeps its vehicle rows together
+    pair_order = func.min(FixedRoute.sheet_order).over(
+        partition_by=(FixedRoute.origin, FixedRoute.destination)
+    )
+    statement = (
+        select(
+            FixedRoute.origin, FixedRoute.destination, FixedRoute.price,
+            FixedRoute.active, FixedRoute.discount_percent, FixedRoute.competitor_price,
+            FixedRoute.notes, Vehicle.vehicle_type
+        )
+        .join(Vehicle, FixedRoute.vehicle_id == Vehicle.id)
+        .order_by(pair_order.nulls_last(), FixedRoute.origin, FixedRoute.destination, FixedRoute.id)
+        .execution_options(yield_per=yield_per)
+    )
+
+    entry: Optional[Dict[str, Any]] = None
+    count = 0
+    for row in db.execute(statement):
+        if entry is None or (entry["Origin"], entry["Destination"]) != (row.origin, row.destination):
+            if entry is not None:
+                yield entry
+            count += 1
+            entry = {
+                "ID": count,
+                "Origin": row.origin,
+                "Destination": row.destination,
+                "Price_Sedan": 0, "Price_Vito": 0, "Price_VitoVIP": 0, "Price_Sprinter": 0,
+            }
+        column = VEHICLE_TYPE_COLUMNS.get(row.vehicle_type)
+        if column and row.price and row.price > 0:
+            entry[column] = int(row.price)
+
+        # Other fields from the last route of the pair
+        entry["Active"] = row.active
+        entry["Discount"] = float(row.discount_percent) if row.discount_percent else 0
+        entry["Comp_Price"] = float(row.competitor_price) if row.competitor_price else None
+        entry["Notes"] = row.notes or ""
+    if entry is not None:
+        yield entry
+
+
+def write_xlsx(path: str, rows: Iterator[Dict[str, Any]]) -> int:
+    """Write sheet rows with openpyxl write-only mode; returns the row count"""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Sheet1")
+    sheet.append(SHEET_COLUMNS)
+    count = 0
+    for row in rows:
+        sheet.append([row[column] for column in SHEET_COLUMNS])
+        count += 1
+    workbook.save(path)
+    return count
+
+
+def iter_csv(rows: Iterator[Dict[str, Any]], chunk_bytes: int = ROUTE_EXPORT_CHUNK_BYTES) -> Iterator[bytes]:
+    """UTF-8 CSV (with BOM, so Excel shows Turkish characters) in ~chunk_bytes pieces"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow(SHEET_COLUMNS)
+    for row in rows:
+        writer.writerow(["" if row[column] is None else row[column] for column in SHEET_COLUMNS])
+        if buffer.tell() >= chunk_bytes:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class RouteExportCache:
+    """Export artifacts per (format, data key), rebuilt when the data key changes"""
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal, directory: Optional[str] = None):
+        self.session_factory = session_factory
+        self._directory = directory
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.builds = 0
+
+    @property
+    def directory(self) -> str:
+        # Per-process directory: versions restart at 0 on every start
+        if self._directory is None:
+            self._directory = tempfile.mkdtemp(prefix="shuttleport-route-export-")
+        return self._directory
+
+    def data_key(self, version: int) -> str:
+        """Key of the current catalog: local data version + database fingerprint"""
+        db = self.session_factory()
+        try:
+            fingerprint = data_fingerprint(db)
+        finally:
+            db.close()
+        digest = hashlib.sha1(repr(fingerprint).encode()).hexdigest()[:12]
+        return f"{version}-{digest}"
+
+    def path_for(self, fmt: str, key: str) -> str:
+        return os.path.join(self.directory, f"routes-{key}.{fmt}")
+
+    def cached(self, fmt: str, key: str) -> Optional[str]:
+        """Finished artifact for the key, if any"""
+        path = self.path_for(fmt, key)
+        try:
+            # Served artifacts stay out of pruning for the grace period
+            os.utime(path)
+        except OSError:
+            return None
+        self.hits += 1
+        return path
+
+    def _publish(self, tmp_path: str, fmt: str, key: str) -> str:
+        path = self.path_for(fmt, key)
+        os.replace(tmp_path, path)
+        self.builds += 1
+        self._prune(fmt)
+        return path
+
+    def _prune(self, fmt: str):
+        """
+        Drop superseded artifacts
+
+        The newest ROUTE_EXPORT_KEEP (by build/serve time) are kept, and so is
+        anything touched within the grace period, so a response that is about
+        to stream a file never loses it, and a late build for an old key
+        cannot remove the newer artifact.
+        """
+        artifacts = []
+        for name in os.listdir(self.directory):
+            if name.startswith("routes-") and name.endswith(f".{fmt}"):
+                path = os.path.join(self.directory, name)
+                try:
+                    artifacts.append((os.path.getmtime(path), path))
+                except OSError:
+                    continue
+        artifacts.sort(reverse=True)
+        cutoff = time.time() - ROUTE_EXPORT_GRACE_SECONDS
+        for mtime, path in artifacts[ROUTE_EXPORT_KEEP:]:
+            if mtime < cutoff:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _tmp_path(self, fmt: str) -> str:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".building-", suffix=f".{fmt}")
+        os.close(fd)
+        return tmp_path
+
+    def build_xlsx(self, key: str) -> str:
+        """xlsx artifact for the key (built once; concurrent callers wait)"""
+        with self._lock:
+            path = self.cached("xlsx", key)
+            if path is not None:
+                return path
+            tmp_path = self._tmp_path("xlsx")
+            db = self.session_factory()
+            try:
+                write_xlsx(tmp_path, iter_sheet_rows(db))
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+            finally:
+                db.close()
+            return self._publish(tmp_path, "xlsx", key)
+
+    def stream_csv(self, key: str) -> Iterator[bytes]:
+        """
+        CSV straight from the database, copied into the cache as it streams
+
+        The copy is only published when the whole body was produced.
+        """
+        tmp_path = self._tmp_path("csv")
+        db = self.session_factory()
+        completed = False
+        try:
+            with open(tmp_path, "wb") as artifact:
+                for chunk in iter_csv(iter_sheet_rows(db)):
+                    artifact.write(chunk)
+                    yield chunk
+            completed = True
+        finally:
+            db.close()
+            if completed:
+                self._publish(tmp_path, "csv", key)
+            elif os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def clear(self):
+        """Drop every artifact"""
+        if self._directory is not None:
+            shutil.rmtree(self._directory, ignore_errors=True)
+            self._directory = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "builds": self.builds}
+
+
+# Singleton instance
+route_export_cache = RouteExportCache()
@@ -0,0 +1,242 @@
+"""
+Fixed route matching index
+
+Built once per pricing snapshot. Location names are normalized up front and
+indexed so that a lookup only touches the names that can actually match,
+instead of scanning every FixedRoute row on each quote.
+
+Matching semantics are the same as the original linear scan: a route
+matches when each normalized name is a substring of the other (in either
+direction), forward or reverse, and the first matching route in sheet
+order wins (routes added outside the sheet come last, by id).
+"""
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy.orm import Session
+from app.models.db_models import FixedRoute, Vehicle
+from app.models.pricing import VehicleType, normalize_location_name
+
+
+def discounted_price(price, discount_percent) -> float:
+    """Apply a route's discount_percent to its price"""
+    final_price = float(price)
+    if discount_percent and discount_percent > 0:
+        final_price = final_price * (1 - float(discount_percent) / 100)
+    return final_price
+
+
+class _SubstringAutomaton:
+    """Aho-Corasick automaton: finds every indexed name contained in a query"""
+
+    def __init__(self, names: List[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]
+
+        outputs: List[List[int]] = [[]]
+        for name_id, name in enumerate(names):
+            state = 0
+            for char in name:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    outputs.append([])
+                state = next_state
+            outputs[state].append(name_id)
+
+        # Breadth-first pass to resolve failure links and merge outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                outputs[next_state].extend(outputs[self._fail[next_state]])
+
+        self._output = [tuple(ids) for ids in outputs]
+
+    def find(self, text: str, found: Set[int]):
+        """Add the id of every name occurring in text to found"""
+        goto, fail, output = self._goto, self._fail, self._output
+        found.update(output[0])
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+
+
+class _ContainingIndex:
+    """n-gram index: finds every indexed name that contains a query"""
+
+    GRAM = 3
+
+    def __init__(self, names: List[str]):
+        self._names = names
+        self._grams: Dict[str, Tuple[int, ...]] = {}
+
+        postings: Dict[str, Set[int]] = {}
+        for name_id, name in enumerate(names):
+            # Every substring shorter than a gram, plus every full gram
+            for size in range(1, self.GRAM + 1):
+                for start in range(len(name) - size + 1):
+                    postings.setdefault(name[start:start + size], set()).add(name_id)
+        self._grams = {gram: tuple(ids) for gram, ids in postings.items()}
+
+    def find(self, text: str, found: Set[int]):
+        """Add the id of every name containing text to found"""
+        if not text:
+            found.update(range(len(self._names)))
+            return
+        if len(text) <= self.GRAM:
+            found.update(self._grams.get(text, ()))
+            return
+
+        # Verify candidates from the rarest gram of the query
+        rarest = None
+        for start in range(len(text) - self.GRAM + 1):
+            ids = self._grams.get(text[start:start + self.GRAM])
+            if ids is None:
+                return
+            if rarest is None or len(ids) < len(rarest):
+                rarest = ids
+        names = self._names
+        found.update(name_id for name_id in rarest if text in names[name_id])
+
+
+class FixedRouteMatcher:
+    """Precompiled fixed route lookup"""
+
+    def __init__(self, routes: Iterable[Tuple[str, str, str, float]]):
+        """
+        Args:
+            routes: Active (origin, destination, vehicle_type, final_price)
+                rows in table order; final_price already discounted
+        """
+        # (origin, destination) -> {vehicle_type string: price}; last row per type wins
+        raw_prices: Dict[Tuple[str, str], Dict[str, float]] = {}
+        for origin, destination, vehicle_type, final_price in routes:
+            raw_prices.setdefault((origin, destination), {})[vehicle_type] = final_price
+
+        pair_order: List[Tuple[str, str]] = list(raw_prices)
+        pair_prices: Dict[Tuple[str, str], Dict[VehicleType, float]] = {}
+        for key, prices in raw_prices.items():
+            typed = pair_prices[key] = {}
+            for vehicle_type, final_price in prices.items():
+                try:
+                    typed[VehicleType(vehicle_type)] = final_price
+                except ValueError:
+                    continue  # Unknown vehicle types are never quoted
+
+        names: List[str] = []
+        name_ids: Dict[str, int] = {}
+
+        def name_id(name: str) -> int:
+            normalized = normalize_location_name(name)
+            if normalized not in name_ids:
+                name_ids[normalized] = len(names)
+                names.append(normalized)
+            return name_ids[normalized]
+
+        # origin id -> destination id -> (table order, prices); first pair wins
+        self._routes: Dict[int, Dict[int, Tuple[int, Optional[Dict[VehicleType, float]]]]] = {}
+        for order, (origin, destination) in enumerate(pair_order):
+            destinations = self._routes.setdefault(name_id(origin), {})
+            dest_id = name_id(destination)
+            if dest_id not in destinations:
+                destinations[dest_id] = (order, pair_prices[(origin, destination)] or None)
+
+        self._contained = _SubstringAutomaton(names)
+        self._containing = _ContainingIndex(names)
+        self.route_count = len(pair_order)
+        # Pair rows in table order (row = order used by match_row)
+        self.pairs = pair_order
+        self.pair_prices = [raw_prices[key] for key in pair_order]
+
+    @classmethod
+    def from_db(cls, db: Session) -> "FixedRouteMatcher":
+        """Build the matcher from active FixedRoute rows with a single query"""
+        rows = db.query(
+            FixedRoute.origin,
+            FixedRoute.destination,
+            Vehicle.vehicle_type,
+            FixedRoute.price,
+            FixedRoute.discount_percent
+        ).join(
+            Vehicle, Vehicle.id == FixedRoute.vehicle_id
+        ).filter(
+            FixedRoute.active == True
+        ).order_by(FixedRoute.sheet_order.nulls_last(), FixedRoute.id).all()
+
+        return cls(
+            (origin, destination, vehicle_type, discounted_price(price, discount))
+            for origin, destination, vehicle_type, price, discount in rows
+        )
+
+    def _candidates(self, normalized: str) -> Set[int]:
+        found: Set[int] = set()
+        self._contained.find(normalized, found)
+        self._containing.find(normalized, found)
+        return found
+
+    def match(self, origin: str, destination: str) -> Optional[Dict[VehicleType, float]]:
+        """
+        Find fixed prices for an itinerary
+
+        Returns:
+            Discounted price per vehicle type (shared, treat as read-only),
+            or None when no route matches
+        """
+        best = self._find(origin, destination)
+        return best[1] if best else None
+
+    def match_row(self, origin: str, destination: str) -> Optional[int]:
+        """
+        Same as match(), but return the matched pair's row in self.pairs
+
+        Returns:
+            Row index, or None when no route with quotable prices matches
+        """
+        best = self._find(origin, destination)
+        return best[0] if best and best[1] else None
+
+    def _find(self, origin: str, destination: str):
+        origin_ids = self._candidates(normalize_location_name(origin))
+        if not origin_ids:
+            return None
+        destination_ids = self._candidates(normalize_location_name(destination))
+        if not destination_ids:
+            return None
+
+        best = None
+        # Forward: route origin ~ origin, route destination ~ destination
+        best = self._best_route(origin_ids, destination_ids, best)
+        # Reverse: route destination ~ origin, route origin ~ destination
+        best = self._best_route(destination_ids, origin_ids, best)
+        return best
+
+    def _best_route(self, origin_ids: Set[int], destination_ids: Set[int], best):
+        routes = self._routes
+        for origin_id in origin_ids:
+            destinations = routes.get(origin_id)
+            if not destinations:
+                continue
+            if len(destinations) <= len(destination_ids):
+                for dest_id, entry in destinations.items():
+                    if dest_id in destination_ids and (best is None or entry[0] < best[0]):
+                        best = entry
+            else:
+                for dest_id in destination_ids:
+                    entry = destinations.get(dest_id)
+                    if entry is not None and (best is None or entry[0] < best[0]):
+                        best = entry
+        return best
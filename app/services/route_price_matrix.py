@@ -0,0 +1,127 @@
+"""
+Fixed route price matrix
+
+Materialized once per pricing snapshot: the final price of every
+(route pair, vehicle type, round-trip, airport) combination, computed with
+the same arithmetic as calculate_vehicle_price() for a fixed price. A
+fixed-route quote is then a single array lookup.
+
+Direction is not a separate axis: the matcher resolves reverse itineraries
+to the same pair row, and fixed prices do not depend on direction.
+"""
+from typing import Dict, List, Optional
+import numpy as np
+from app.models.pricing import VehicleInfo, VehiclePricing, PricingRules
+from app.services.route_matcher import FixedRouteMatcher
+
+
+class FixedRoutePriceMatrix:
+    """Precomputed fixed-route prices, indexed [pair, vehicle, round_trip, airport]"""
+
+    def __init__(self, matcher: FixedRouteMatcher, rules: PricingRules):
+        self.matcher = matcher
+        self.round_trip_discount_percent = rules.round_trip_discount
+
+        # Columns: every vehicle type string seen on a route, in first-seen order
+        self.vehicle_types: List[str] = []
+        self._columns: Dict[str, int] = {}
+        for prices in matcher.pair_prices:
+            for vehicle_type in prices:
+                if vehicle_type not in self._columns:
+                    self._columns[vehicle_type] = len(self.vehicle_types)
+                    self.vehicle_types.append(vehicle_type)
+
+        # Discounted route price per (pair, vehicle); NaN where the pair has none
+        self.prices = np.full((len(matcher.pairs), len(self.vehicle_types)), np.nan)
+        for row, prices in enumerate(matcher.pair_prices):
+            for vehicle_type, price in prices.items():
+                self.prices[row, self._columns[vehicle_type]] = price
+
+        # 0 means "no fixed price" in calculate_vehicle_price
+        self.is_fixed = ~np.isnan(self.prices) & (self.prices != 0)
+
+        # Sabit fiyatta taban ücret ve havalimanı ücreti yok: subtotal = fiyat
+        subtotal = np.where(self.is_fixed, self.prices, np.nan)
+        discount_rate = self.round_trip_discount_percent / 100
+        # [pair, vehicle, round_trip]
+        self.discounts = np.stack([np.zeros_like(subtotal), subtotal * discount_rate], axis=-1)
+        # Python round() like calculate_vehicle_price (np.round differs on ties)
+        final = np.vectorize(lambda x: round(float(x), 2), otypes=[np.float64])(subtotal[..., None] - self.discounts)
+        # Airport flag does not change a fixed price (fee is included)
+        self.final_prices = np.repeat(final[..., None], 2, axis=-1)
+
+        self._subtotals = subtotal.tolist()
+        self._discounts = self.discounts.tolist()
+        self._catalog = self._build_catalog()
+
+    def column(self, vehicle_type: str) -> Optional[int]:
+        """Matrix column of a vehicle type"""
+        return self._columns.get(vehicle_type)
+
+    def match_row(self, origin: str, destination: str) -> Optional[int]:
+        """Pair row for an itinerary (either direction), or None"""
+        return self.matcher.match_row(origin, destination)
+
+    def final_price(self, row: int, vehicle_type: str, is_round_trip: bool, is_airport_transfer: bool) -> Optional[float]:
+        """Final fixed price, or None when this vehicle is priced by distance"""
+        col = self._columns.get(vehicle_type)
+        if col is None or not self.is_fixed[row, col]:
+            return None
+        return float(self.final_prices[row, col, int(is_round_trip), int(is_airport_transfer)])
+
+    def vehicle_pricing(self, row: int, vehicle: VehicleInfo, is_round_trip: bool) -> Optional[VehiclePricing]:
+        """
+        Fixed-price quote for one vehicle, as calculate_vehicle_price() would return it
+
+        Returns:
+            VehiclePricing, or None when this vehicle has no fixed price on the pair
+        """
+        col = self._columns.get(vehicle.type.value)
+        if col is None or not self.is_fixed[row, col]:
+            return None
+
+        subtotal = self._subtotals[row][col]
+        discount = self._discounts[row][col][1] if is_round_trip else 0.0
+        final = float(self.final_prices[row, col, int(is_round_trip), 0])
+        return VehiclePricing.model_construct(
+            vehicle_type=vehicle.type,
+            vehicle_name=vehicle.name,
+            vehicle_name_tr=vehicle.name_tr,
+            capacity=vehicle.capacity,
+            base_price=0.0,
+            distance_price=subtotal,
+            airport_fee=0.0,
+            subtotal=subtotal,
+            round_trip_discount=discount,
+            final_price=final,
+            image_url=vehicle.image_url,
+            images=vehicle.images,
+            price_breakdown={
+                "base_fare": 0,
+                "distance_charge": subtotal,
+                "airport_fee": 0,
+                "subtotal": subtotal,
+                "discount": discount,
+                "minimum_applied": 0,
+                "final": final
+            }
+        )
+
+    def catalog(self) -> List[dict]:
+        """Route list for /api/pricing/fixed-routes (shared, treat as read-only)"""
+        return self._catalog
+
+    def _build_catalog(self) -> List[dict]:
+        prices = self.prices.tolist()
+        catalog = []
+        for row, (origin, destination) in enumerate(self.matcher.pairs):
+            catalog.append({
+                "origin": origin.title(),
+                "destination": destination.title(),
+                "prices": {
+                    vehicle_type: prices[row][col]
+                    for vehicle_type, col in self._columns.items()
+                    if not np.isnan(prices[row][col])
+                }
+            })
+        return catalog
@@ -0,0 +1,309 @@
+"""
+Incremental FixedRoute sync
+
+The route sheet is diffed against the fixed_routes table on
+(origin, destination, vehicle_id). Only changed rows are written: new keys
+are bulk inserted, changed prices/flags are bulk updated by primary key and
+keys that left the sheet are bulk deleted - all in one transaction, so quotes
+never see a half-synced or empty table and unchanged rows keep their IDs.
+Each row also stores its sheet position (sheet_order), so route precedence
+follows the sheet rather than the order rows were inserted in.
+
+reload_fixed_routes() is the full-reload variant (delete all + bulk load).
+Inserts go through bulk_insert_routes(): PostgreSQL COPY FROM STDIN when the
+driver supports it, Core insert() executemany in batches otherwise.
+"""
+import csv
+import io
+import os
+import time
+from dataclasses import dataclass, field, asdict
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+from app.models.db_models import FixedRoute
+from app.services.data_manager import RouteTable
+
+# Route sheet price column -> vehicle_type
+PRICE_KEY_VEHICLE_TYPES = {
+    "price_vito": "vito",
+    "price_sedan": "luxury_sedan",  # Fixed: matches DB vehicle_type
+    "price_sprinter": "sprinter",
+    "price_vitovip": "vito_vip"
+}
+
+# Compared and written on every synced row
+SYNCED_COLUMNS = ("price", "discount_percent", "competitor_price", "notes", "active", "sheet_order")
+
+# IN (...) list size for deletes (SQLite bound parameter limit)
+DELETE_CHUNK_SIZE = 500
+
+# Rows per executemany call / per COPY stream (see scripts/bench_route_import.py)
+ROUTE_INSERT_BATCH_SIZE = int(os.getenv("ROUTE_INSERT_BATCH_SIZE", "1000"))
+ROUTE_COPY_BATCH_SIZE = int(os.getenv("ROUTE_COPY_BATCH_SIZE", "50000"))
+ROUTE_IMPORT_USE_COPY = os.getenv("ROUTE_IMPORT_USE_COPY", "true").lower() == "true"
+
+# Columns written by the bulk loaders (created_at/updated_at use server defaults)
+INSERT_COLUMNS = ("origin", "destination", "vehicle_id") + SYNCED_COLUMNS
+
+RouteKey = Tuple[str, str, int]
+
+
+@dataclass
+class RouteSyncResult:
+    """Row counts and phase timings of one sync"""
+    sheet_rows: int = 0
+    inserted: int = 0
+    updated: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+    # copy | executemany (how inserts were written)
+    insert_method: Optional[str] = None
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.inserted or self.updated or self.deleted)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "changed": self.changed}
+
+
+def _money(value) -> Optional[Decimal]:
+    """Numeric(…, 2) value as stored (None stays None)"""
+    if value is None:
+        return None
+    return Decimal(str(round(float(value), 2)))
+
+
+def _normalize(values: Dict[str, Any]) -> Tuple:
+    return (
+        _money(values["price"]),
+        _money(values["discount_percent"] or 0),
+        _money(values["competitor_price"]),
+        values["notes"] or "",
+        bool(values["active"]) if values["active"] is not None else True,
+        values["sheet_order"]
+    )
+
+
+def desired_routes(tables: Iterable[RouteTable], vehicle_ids: Dict[str, int]) -> Tuple[Dict[RouteKey, Dict[str, Any]], int]:
+    """
+    Rows the table should contain, keyed like the unique constraint
+
+    Only prices above 1.0 become routes; a repeated key in the sheet keeps its
+    last row. sheet_order is the row's 0-based position across all batches.
+    """
+    routes: Dict[RouteKey, Dict[str, Any]] = {}
+    sheet_rows = 0
+    for table in tables:
+        offset = sheet_rows
+        sheet_rows += len(table)
+        comp_price = [None if np.isnan(v) else v for v in table.comp_price.tolist()]
+        active = table.active.tolist()
+        discount = table.discount.tolist()
+
+        for price_key, vehicle_type in PRICE_KEY_VEHICLE_TYPES.items():
+            vehicle_id = vehicle_ids.get(vehicle_type)
+            if vehicle_id is None:
+                continue
+
+            # NaN compares False
+            prices = table.prices[price_key]
+            valid = np.flatnonzero(prices > 1.0).tolist()
+            prices = prices.tolist()
+            for i in valid:
+                routes[(table.origin[i], table.destination[i], vehicle_id)] = {
+                    "price": prices[i],
+                    "discount_percent": discount[i],
+                    "competitor_price": comp_price[i],
+                    "notes": table.notes[i],
+                    "active": active[i],
+                    "sheet_order": offset + i
+                }
+    return routes, sheet_rows
+
+
+def supports_copy(db: Session) -> bool:
+    """PostgreSQL through a driver with COPY FROM STDIN (psycopg2)"""
+    bind = db.get_bind()
+    return bind.dialect.name == "postgresql" and bind.dialect.driver == "psycopg2"
+
+
+def _copy_rows(db: Session, rows: List[Dict[str, Any]]):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([
+            "t" if value is True else "f" if value is False else ("" if value is None else value)
+            for value in (row[column] for column in INSERT_COLUMNS)
+        ])
+    buffer.seek(0)
+
+    # Same DBAPI connection as the session, so COPY joins its transaction.
+    # Unquoted empty fields are NULL; notes are never NULL.
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {FixedRoute.__tablename__} ({', '.join(INSERT_COLUMNS)}) "
+            f"FROM STDIN WITH (FORMAT csv, FORCE_NOT_NULL (notes))",
+            buffer
+        )
+    finally:
+        cursor.close()
+
+
+def bulk_insert_routes(
+    db: Session,
+    rows: List[Dict[str, Any]],
+    batch_size: Optional[int] = None,
+    use_copy: Optional[bool] = None
+) -> str:
+    """
+    Insert FixedRoute rows without the ORM unit of work (caller commits)
+
+    Args:
+        rows: Dicts with INSERT_COLUMNS keys
+        batch_size: Rows per statement/stream (defaults per method)
+        use_copy: Force COPY on/off (default: ROUTE_IMPORT_USE_COPY and driver support)
+
+    Returns:
+        "copy" or "executemany"
+    """
+    if use_copy is None:
+        use_copy = ROUTE_IMPORT_USE_COPY
+    if use_copy and supports_copy(db):
+        batch_size = batch_size or ROUTE_COPY_BATCH_SIZE
+        for offset in range(0, len(rows), batch_size):
+            _copy_rows(db, rows[offset:offset + batch_size])
+        return "copy"
+
+    batch_size = batch_size or ROUTE_INSERT_BATCH_SIZE
+    table = FixedRoute.__table__
+    for offset in range(0, len(rows), batch_size):
+        db.execute(insert(table), [
+            {column: row[column] for column in INSERT_COLUMNS}
+            for row in rows[offset:offset + batch_size]
+        ])
+    return "executemany"
+
+
+def reload_fixed_routes(
+    db: Session,
+    tables: Iterable[RouteTable],
+    vehicle_ids: Dict[str, int],
+    batch_size: Optional[int] = None
+) -> RouteSyncResult:
+    """
+    Full reload: delete every FixedRoute and bulk load the sheet, in one transaction
+
+    For imports that should replace the table (IDs are not kept).
+    """
+    result = RouteSyncResult()
+    timings = result.timings_ms
+
+    def timed(phase: str, started: float):
+        timings[phase] = round((time.perf_counter() - started) * 1000, 2)
+
+    try:
+        started = time.perf_counter()
+        desired, result.sheet_rows = desired_routes(tables, vehicle_ids)
+        rows = [
+            {"origin": origin, "destination": destination, "vehicle_id": vehicle_id, **values}
+            for (origin, destination, vehicle_id), values in desired.items()
+        ]
+        timed("read_sheet", started)
+
+        started = time.perf_counter()
+        result.deleted = db.execute(delete(FixedRoute).execution_options(synchronize_session=False)).rowcount
+        timed("delete", started)
+
+        started = time.perf_counter()
+        if rows:
+            result.insert_method = bulk_insert_routes(db, rows, batch_size)
+        result.inserted = len(rows)
+        timed("insert", started)
+
+        started = time.perf_counter()
+        db.commit()
+        timed("commit", started)
+    except Exception:
+        db.rollback()
+        raise
+
+    return result
+
+
+def sync_fixed_routes(db: Session, tables: Iterable[RouteTable], vehicle_ids: Dict[str, int]) -> RouteSyncResult:
+    """
+    Bring fixed_routes in line with the sheet using inserts/updates/deletes only
+
+    Args:
+        db: Session; committed on success, rolled back on error
+        tables: Route sheet batches (DataManager.iter_route_batches())
+        vehicle_ids: vehicle_type -> Vehicle.id
+
+    Returns:
+        RouteSyncResult with counts and per-phase timings (ms)
+    """
+    result = RouteSyncResult()
+    timings = result.timings_ms
+
+    def timed(phase: str, started: float):
+        timings[phase] = round((time.perf_counter() - started) * 1000, 2)
+
+    try:
+        started = time.perf_counter()
+        desired, result.sheet_rows = desired_routes(tables, vehicle_ids)
+        timed("read_sheet", started)
+
+        started = time.perf_counter()
+        existing = {
+            (row.origin, row.destination, row.vehicle_id): row
+            for row in db.execute(select(
+                FixedRoute.id, FixedRoute.origin, FixedRoute.destination, FixedRoute.vehicle_id,
+                *(getattr(FixedRoute, column) for column in SYNCED_COLUMNS)
+            ))
+        }
+
+        inserts: List[Dict[str, Any]] = []
+        updates: List[Dict[str, Any]] = []
+        for key, values in desired.items():
+            row = existing.pop(key, None)
+            if row is None:
+                origin, destination, vehicle_id = key
+                inserts.append({"origin": origin, "destination": destination, "vehicle_id": vehicle_id, **values})
+            elif _normalize(row._mapping) != _normalize(values):
+                updates.append({"id": row.id, **values})
+            else:
+                result.unchanged += 1
+        deletes = [row.id for row in existing.values()]
+        timed("diff", started)
+
+        started = time.perf_counter()
+        if inserts:
+            result.insert_method = bulk_insert_routes(db, inserts)
+        timed("insert", started)
+
+        started = time.perf_counter()
+        if updates:
+            db.execute(update(FixedRoute), updates)
+        timed("update", started)
+
+        started = time.perf_counter()
+        for offset in range(0, len(deletes), DELETE_CHUNK_SIZE):
+            chunk = deletes[offset:offset + DELETE_CHUNK_SIZE]
+            db.execute(delete(FixedRoute).where(FixedRoute.id.in_(chunk)).execution_options(synchronize_session=False))
+        timed("delete", started)
+
+        started = time.perf_counter()
+        db.commit()
+        timed("commit", started)
+    except Exception:
+        db.rollback()
+        raise
+
+    result.inserted, result.updated, result.deleted = len(inserts), len(updates), len(deletes)
+    return result
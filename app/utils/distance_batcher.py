@@ -0,0 +1,176 @@
+"""
+Micro-batching for Distance Matrix calls
+
+Concurrent single-pair requests arriving within a short window are merged
+into one multi-origin / multi-destination call (max 25 x 25 locations,
+100 elements), and each caller gets its own element back.
+
+The API bills per element, so requests are only merged while the call's
+element count stays within DISTANCE_BATCH_MAX_WASTE x the distinct pairs
+it serves; shared endpoints (many pickups to the same airport) batch
+freely, unrelated pairs only a few at a time.
+"""
+import asyncio
+import os
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+DISTANCE_BATCH_ENABLED = os.getenv("DISTANCE_BATCH_ENABLED", "true").lower() == "true"
+DISTANCE_BATCH_WINDOW_MS = float(os.getenv("DISTANCE_BATCH_WINDOW_MS", "5"))
+DISTANCE_BATCH_MAX_WASTE = float(os.getenv("DISTANCE_BATCH_MAX_WASTE", "2.0"))
+
+# Google Distance Matrix limits per request
+MAX_ORIGINS = 25
+MAX_DESTINATIONS = 25
+MAX_ELEMENTS = 100
+
+# (element, origin address, destination address)
+ElementResult = Tuple[Dict[str, Any], str, str]
+
+
+@dataclass
+class _Pending:
+    origin: str
+    destination: str
+    future: asyncio.Future
+
+
+class DistanceMatrixBatcher:
+    """Collects distance requests and fans out one matrix call per batch"""
+
+    def __init__(
+        self,
+        fetch: Callable[[List[str], List[str]], Awaitable[Dict[str, Any]]],
+        window_seconds: float = DISTANCE_BATCH_WINDOW_MS / 1000,
+        max_waste: float = DISTANCE_BATCH_MAX_WASTE,
+        max_origins: int = MAX_ORIGINS,
+        max_destinations: int = MAX_DESTINATIONS,
+        max_elements: int = MAX_ELEMENTS
+    ):
+        """
+        Args:
+            fetch: Performs one Distance Matrix call for (origins, destinations)
+                and returns the decoded response (raising on a failed call)
+            window_seconds: How long the first request waits for company
+            max_waste: Max elements per distinct requested pair in one call
+        """
+        self._fetch = fetch
+        self.window_seconds = window_seconds
+        self.max_waste = max_waste
+        self.max_origins = max_origins
+        self.max_destinations = max_destinations
+        self.max_elements = max_elements
+        self._pending: List[_Pending] = []
+        self._flush_handle = None
+        self._loop = None
+        self._tasks = set()
+        self.requests = 0
+        self.calls = 0
+        self.elements = 0
+
+    async def submit(self, origin: str, destination: str) -> ElementResult:
+        """
+        Queue one pair and wait for its element
+
+        Raises:
+            Whatever fetch raised for the call this pair was sent in
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Anything queued on another (finished) event loop can never complete
+            self._pending, self._flush_handle, self._loop = [], None, loop
+
+        future = loop.create_future()
+        self._pending.append(_Pending(origin, destination, future))
+        self.requests += 1
+
+        if len(self._pending) >= self.max_elements:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window_seconds, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending = self._pending, []
+        for batch in self.partition(pending):
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def partition(self, items: List[_Pending]) -> List[List[_Pending]]:
+        """Split requests into calls within the API limits and the waste bound"""
+        # Shared endpoints next to each other
+        items = sorted(items, key=lambda item: (item.destination, item.origin))
+
+        batches: List[List[_Pending]] = []
+        current: List[_Pending] = []
+        origins, destinations, pairs = set(), set(), set()
+        for item in items:
+            new_origins = origins | {item.origin}
+            new_destinations = destinations | {item.destination}
+            new_pairs = pairs | {(item.origin, item.destination)}
+            elements = len(new_origins) * len(new_destinations)
+
+            fits = (
+                len(new_origins) <= self.max_origins
+                and len(new_destinations) <= self.max_destinations
+                and elements <= self.max_elements
+                and elements <= self.max_waste * len(new_pairs)
+            )
+            if current and not fits:
+                batches.append(current)
+                current = []
+                new_origins, new_destinations = {item.origin}, {item.destination}
+                new_pairs = {(item.origin, item.destination)}
+
+            current.append(item)
+            origins, destinations, pairs = new_origins, new_destinations, new_pairs
+
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _run(self, batch: List[_Pending]):
+        origins = list(dict.fromkeys(item.origin for item in batch))
+        destinations = list(dict.fromkeys(item.destination for item in batch))
+        self.calls += 1
+        self.elements += len(origins) * len(destinations)
+
+        try:
+            data = await self._fetch(origins, destinations)
+            origin_index = {origin: i for i, origin in enumerate(origins)}
+            destination_index = {destination: i for i, destination in enumerate(destinations)}
+            results = []
+            for item in batch:
+                oi, di = origin_index[item.origin], destination_index[item.destination]
+                results.append((
+                    data["rows"][oi]["elements"][di],
+                    data["origin_addresses"][oi],
+                    data["destination_addresses"][di]
+                ))
+        except asyncio.CancelledError:
+            for item in batch:
+                item.future.cancel()
+            raise
+        except Exception as e:
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+
+        for item, result in zip(batch, results):
+            if not item.future.done():
+                item.future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Outbound call counters"""
+        return {
+            "requests": self.requests,
+            "calls": self.calls,
+            "elements": self.elements,
+            "requests_per_call": round(self.requests / self.calls, 2) if self.calls else 0.0
+        }
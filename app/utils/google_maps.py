@@ -1,10 +1,69 @@
 """
 Google Maps API client and utilities
+
+Every call goes through a per-endpoint circuit breaker, bounded retries with
+jittered backoff (drawn from a shared retry budget), an optional hedged
+second request after the endpoint's p95 latency, and an overall deadline.
 """
+import asyncio
+import os
+import random
+import time
 import httpx
-from typing import Dict, Any, List, Tuple
-from app.core.config import settings
+from typing import Dict, Any, List, Optional, Tuple
 from app.core.exceptions import GoogleMapsAPIError
+from app.services.distance_cache import distance_cache
+from app.services.distance_estimator import distance_estimator
+from app.utils.distance_batcher import DistanceMatrixBatcher, DISTANCE_BATCH_ENABLED
+from app.utils.http_client import (
+    get_http_client, operation_timeout,
+    DISTANCE_MATRIX_TIMEOUT, PLACES_SEARCH_TIMEOUT
+)
+from app.utils.resilience import CircuitBreaker, LatencyTracker, RetryBudget
+from app.utils.single_flight import SingleFlight
+
+# Retries after a transient failure (network error, HTTP 429/5xx)
+MAPS_RETRY_MAX = int(os.getenv("MAPS_RETRY_MAX", "2"))
+MAPS_RETRY_BASE_DELAY = float(os.getenv("MAPS_RETRY_BASE_DELAY", "0.1"))
+# Hedging: second request when the first is slower than the endpoint's percentile latency
+MAPS_HEDGE_ENABLED = os.getenv("MAPS_HEDGE_ENABLED", "false").lower() == "true"
+MAPS_HEDGE_PERCENTILE = float(os.getenv("MAPS_HEDGE_PERCENTILE", "95"))
+MAPS_HEDGE_MIN_DELAY = float(os.getenv("MAPS_HEDGE_MIN_DELAY", "0.05"))
+MAPS_HEDGE_MIN_SAMPLES = int(os.getenv("MAPS_HEDGE_MIN_SAMPLES", "20"))
+# Upper bound for one call including retries and hedges
+MAPS_REQUEST_DEADLINE = float(os.getenv("MAPS_REQUEST_DEADLINE", "8"))
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class _Retryable(Exception):
+    """Transient failure of one attempt"""
+
+
+class _Endpoint:
+    """Breaker, latency samples and counters of one Maps endpoint"""
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.breaker = CircuitBreaker(name)
+        self.latency = LatencyTracker()
+        self.counters = dict.fromkeys((
+            "requests", "attempts", "failures", "retries", "hedges", "hedge_wins",
+            "short_circuited", "deadline_exceeded"
+        ), 0)
+    
+    def hedge_delay(self) -> Optional[float]:
+        """Delay before a hedged request, None when hedging is off or latency unknown"""
+        if not MAPS_HEDGE_ENABLED or len(self.latency) < MAPS_HEDGE_MIN_SAMPLES:
+            return None
+        return max(MAPS_HEDGE_MIN_DELAY, self.latency.percentile(MAPS_HEDGE_PERCENTILE))
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "p95_ms": round(self.latency.percentile(95) * 1000, 1),
+            "breaker": self.breaker.stats()
+        }
 
 
 class GoogleMapsClient:
@@ -13,9 +72,19 @@ class GoogleMapsClient:
     BASE_URL = "https://maps.googleapis.com/maps/api"
     
     def __init__(self, api_key: str = None):
-        self.api_key = api_key or settings.GOOGLE_MAPS_API_KEY
+        if api_key is None:
+            # Imported here: Settings() requires the full v1 configuration
+            from app.core.config import settings
+            api_key = settings.GOOGLE_MAPS_API_KEY
+        self.api_key = api_key
         if not self.api_key:
             raise ValueError("Google Maps API key is required")
+        self._batcher = DistanceMatrixBatcher(self._fetch_distance_matrix) if DISTANCE_BATCH_ENABLED else None
+        self._endpoints = {name: _Endpoint(name) for name in ("distance_matrix", "search_places")}
+        self._retry_budget = RetryBudget()
+        # Identical concurrent lookups share one upstream call
+        self._distance_flight = SingleFlight("distance_matrix")
+        self._places_flight = SingleFlight("search_places")
     
     async def calculate_distance_matrix(
         self,
@@ -35,54 +104,90 @@ class GoogleMapsClient:
             
         Returns:
             Dictionary with distance and duration information
+            (served from the distance cache for nearby coordinates)
             
         Raises:
             GoogleMapsAPIError: If API request fails
         """
+        cache_key = distance_cache.make_key(origin_lat, origin_lng, destination_lat, destination_lng)
+        result = await self._distance_flight.do(
+            cache_key,
+            lambda: self._distance_lookup(cache_key, origin_lat, origin_lng, destination_lat, destination_lng)
+        )
+        return dict(result)
+    
+    async def _distance_lookup(
+        self,
+        cache_key: str,
+        origin_lat: float,
+        origin_lng: float,
+        destination_lat: float,
+        destination_lng: float
+    ) -> Dict[str, Any]:
+        """Cache, then the (batched) Distance Matrix call"""
+        cached = await distance_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         origin = f"{origin_lat},{origin_lng}"
         destination = f"{destination_lat},{destination_lng}"
         
+        # Concurrent requests share one multi-element call
+        if self._batcher is not None:
+            element, origin_address, destination_address = await self._batcher.submit(origin, destination)
+        else:
+            data = await self._fetch_distance_matrix([origin], [destination])
+            element = data["rows"][0]["elements"][0]
+            origin_address = data["origin_addresses"][0]
+            destination_address = data["destination_addresses"][0]
+        
+        if element.get("status") != "OK":
+            raise GoogleMapsAPIError(
+                f"Route not found: {element.get('status')}",
+                details={"status": element.get("status"), "element": element}
+            )
+        
+        result = {
+            "distance_meters": element["distance"]["value"],
+            "distance_text": element["distance"]["text"],
+            "duration_seconds": element["duration"]["value"],
+            "duration_text": element["duration"]["text"],
+            "origin_address": origin_address,
+            "destination_address": destination_address
+        }
+        await distance_cache.set(cache_key, dict(result))
+        # Every real answer refines the offline estimates
+        distance_estimator.observe(
+            origin_lat, origin_lng, destination_lat, destination_lng,
+            result["distance_meters"], result["duration_seconds"]
+        )
+        return result
+    
+    async def _fetch_distance_matrix(self, origins: List[str], destinations: List[str]) -> Dict[str, Any]:
+        """
+        One Distance Matrix call (up to 25 origins x 25 destinations)
+        
+        Raises:
+            GoogleMapsAPIError: If the request or the whole call fails
+        """
         url = f"{self.BASE_URL}/distancematrix/json"
         params = {
-            "origins": origin,
-            "destinations": destination,
+            "origins": "|".join(origins),
+            "destinations": "|".join(destinations),
             "mode": "driving",
             "language": "tr",
             "key": self.api_key
         }
         
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, params=params, timeout=10.0)
-                response.raise_for_status()
-                data = response.json()
-        except httpx.HTTPError as e:
-            raise GoogleMapsAPIError(
-                f"Failed to connect to Google Maps API: {str(e)}"
-            )
+        data = await self._get_json("distance_matrix", url, params, DISTANCE_MATRIX_TIMEOUT)
         
         if data.get("status") != "OK":
             raise GoogleMapsAPIError(
                 f"Google Maps API error: {data.get('status')}",
-                details={"response": data}
-            )
-        
-        element = data["rows"][0]["elements"][0]
-        
-        if element.get("status") != "OK":
-            raise GoogleMapsAPIError(
-                f"Route not found: {element.get('status')}",
-                details={"element": element}
+                details={"status": data.get("status"), "response": data}
             )
         
-        return {
-            "distance_meters": element["distance"]["value"],
-            "distance_text": element["distance"]["text"],
-            "duration_seconds": element["duration"]["value"],
-            "duration_text": element["duration"]["text"],
-            "origin_address": data["origin_addresses"][0],
-            "destination_address": data["destination_addresses"][0]
-        }
+        return data
     
     async def search_places(
         self,
@@ -104,6 +209,16 @@ class GoogleMapsClient:
         Raises:
             GoogleMapsAPIError: If API request fails
         """
+        key = (" ".join(query.split()).casefold(), location, radius)
+        places = await self._places_flight.do(key, lambda: self._search_places(query, location, radius))
+        return [dict(place) for place in places]
+    
+    async def _search_places(
+        self,
+        query: str,
+        location: Tuple[float, float],
+        radius: int
+    ) -> List[Dict[str, Any]]:
         url = f"{self.BASE_URL}/place/textsearch/json"
         params = {
             "query": query,
@@ -115,20 +230,12 @@ class GoogleMapsClient:
             params["location"] = f"{location[0]},{location[1]}"
             params["radius"] = str(radius)
         
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, params=params, timeout=10.0)
-                response.raise_for_status()
-                data = response.json()
-        except httpx.HTTPError as e:
-            raise GoogleMapsAPIError(
-                f"Failed to connect to Google Maps API: {str(e)}"
-            )
+        data = await self._get_json("search_places", url, params, PLACES_SEARCH_TIMEOUT)
         
         if data.get("status") not in ["OK", "ZERO_RESULTS"]:
             raise GoogleMapsAPIError(
                 f"Google Maps API error: {data.get('status')}",
-                details={"response": data}
+                details={"status": data.get("status"), "response": data}
             )
         
         places = []
@@ -142,7 +249,151 @@ class GoogleMapsClient:
             })
         
         return places
+    
+    def stats(self) -> Dict[str, Any]:
+        """Outbound call coalescing and resilience counters"""
+        return {
+            "single_flight": [self._distance_flight.stats(), self._places_flight.stats()],
+            "batching": self._batcher.stats() if self._batcher is not None else None,
+            "endpoints": {name: endpoint.stats() for name, endpoint in self._endpoints.items()},
+            "retry_budget": self._retry_budget.stats()
+        }
+    
+    async def _get_json(self, endpoint_name: str, url: str, params: Dict[str, str], timeout: float) -> Dict[str, Any]:
+        """
+        GET through the shared pooled client, with retries/hedging under a deadline
+        
+        Raises:
+            GoogleMapsAPIError: Circuit open, non-retryable HTTP error, retries
+                exhausted or deadline exceeded
+        """
+        endpoint = self._endpoints[endpoint_name]
+        endpoint.counters["requests"] += 1
+        self._retry_budget.deposit()
+        # Set before wait_for arms its timer, so a deadline cancel always sees it passed
+        deadline = time.monotonic() + MAPS_REQUEST_DEADLINE
+        try:
+            return await asyncio.wait_for(
+                self._call_with_retries(endpoint, url, params, timeout, deadline), MAPS_REQUEST_DEADLINE
+            )
+        except asyncio.TimeoutError:
+            endpoint.counters["deadline_exceeded"] += 1
+            raise GoogleMapsAPIError(
+                f"Failed to connect to Google Maps API: no answer within {MAPS_REQUEST_DEADLINE}s"
+            )
+    
+    async def _call_with_retries(
+        self, endpoint: _Endpoint, url: str, params: Dict[str, str], timeout: float, deadline: float
+    ):
+        for attempt in range(MAPS_RETRY_MAX + 1):
+            try:
+                return await self._hedged_attempt(endpoint, url, params, timeout, deadline)
+            except _Retryable as e:
+                error = e
+            if attempt == MAPS_RETRY_MAX or not self._retry_budget.try_spend():
+                break
+            endpoint.counters["retries"] += 1
+            # Exponential backoff with full jitter
+            await asyncio.sleep(random.uniform(0, MAPS_RETRY_BASE_DELAY * 2 ** attempt))
+        
+        raise GoogleMapsAPIError(f"Failed to connect to Google Maps API: {error}")
+    
+    async def _hedged_attempt(
+        self, endpoint: _Endpoint, url: str, params: Dict[str, str], timeout: float, deadline: float
+    ):
+        delay = endpoint.hedge_delay()
+        if delay is None:
+            return await self._attempt(endpoint, url, params, timeout, deadline)
+        
+        primary = asyncio.ensure_future(self._attempt(endpoint, url, params, timeout, deadline))
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done or not self._retry_budget.try_spend():
+                return await primary
+            
+            endpoint.counters["hedges"] += 1
+            tasks.append(asyncio.ensure_future(self._attempt(endpoint, url, params, timeout, deadline)))
+            pending, error = set(tasks), None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            endpoint.counters["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def _attempt(
+        self, endpoint: _Endpoint, url: str, params: Dict[str, str], timeout: float, deadline: float
+    ):
+        """
+        One HTTP request, recorded in the endpoint's breaker
+        
+        An attempt cut off by the call deadline counts as a failed (hung)
+        call, so an upstream that stops answering still opens the circuit.
+        """
+        token = endpoint.breaker.allow()
+        if token is None:
+            endpoint.counters["short_circuited"] += 1
+            raise GoogleMapsAPIError(
+                f"Google Maps API temporarily unavailable ({endpoint.name} circuit open)",
+                details={"circuit": endpoint.breaker.state}
+            )
+        
+        endpoint.counters["attempts"] += 1
+        start = time.perf_counter()
+        try:
+            response = await get_http_client().get(url, params=params, timeout=operation_timeout(timeout))
+        except asyncio.CancelledError:
+            if time.monotonic() >= deadline:
+                self._record(endpoint, token, start, failed=True)
+            else:
+                # Lost hedge or caller went away: no verdict on the upstream
+                endpoint.breaker.release(token)
+            raise
+        except httpx.HTTPError as e:
+            self._record(endpoint, token, start, failed=True)
+            raise _Retryable(str(e)) from e
+        
+        if response.status_code in RETRYABLE_STATUS_CODES:
+            self._record(endpoint, token, start, failed=True)
+            raise _Retryable(f"HTTP {response.status_code}")
+        self._record(endpoint, token, start, failed=False)
+        
+        try:
+            response.raise_for_status()
+            return response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            raise GoogleMapsAPIError(
+                f"Failed to connect to Google Maps API: {str(e)}"
+            )
+    
+    @staticmethod
+    def _record(endpoint: _Endpoint, token: int, start: float, failed: bool):
+        elapsed = time.perf_counter() - start
+        endpoint.breaker.record(token, failed, elapsed)
+        if failed:
+            endpoint.counters["failures"] += 1
+        else:
+            endpoint.latency.add(elapsed)
 
 
-# Singleton instance
-google_maps_client = GoogleMapsClient()
+_clients: Dict[str, GoogleMapsClient] = {}
+
+
+def get_maps_client(api_key: str = None) -> GoogleMapsClient:
+    """
+    Shared GoogleMapsClient per API key
+    
+    Args:
+        api_key: API key; defaults to settings.GOOGLE_MAPS_API_KEY
+    """
+    client = _clients.get(api_key)
+    if client is None:
+        client = _clients[api_key] = GoogleMapsClient(api_key)
+    return client
@@ -0,0 +1,129 @@
+"""
+Conditional GET helpers for rarely changing JSON endpoints
+
+Bodies are serialized and compressed once per pricing snapshot; a request
+either gets a 304 (matching If-None-Match) or the precompressed bytes.
+"""
+import gzip
+import hashlib
+import json
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Tuple
+from fastapi import Request, Response
+
+try:
+    import brotli  # Optional: br bodies are only offered when installed
+except ImportError:
+    brotli = None
+
+CACHE_CONTROL = "public, no-cache"
+
+
+@dataclass(frozen=True)
+class CachedBody:
+    """A pre-serialized JSON body and its compressed variants"""
+    etag: str
+    identity: bytes
+    encoded: Dict[str, bytes]
+
+
+def build_cached_body(content: Any) -> CachedBody:
+    """
+    Serialize content like JSONResponse and precompress it
+
+    The ETag is a hash of the body, so every worker serving the same
+    pricing data returns the same ETag.
+    """
+    body = json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+    etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+    encoded = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encoded["br"] = brotli.compress(body)
+    return CachedBody(etag=etag, identity=body, encoded=encoded)
+
+
+def _accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    encodings = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        if not token:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        encodings[token.strip().lower()] = quality
+    return encodings
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # Weak comparison (RFC 7232 section 3.2)
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def cached_response(request: Request, cached: CachedBody) -> Response:
+    """304 when the client's copy is current, otherwise the best precompressed body"""
+    headers = {
+        "ETag": cached.etag,
+        "Cache-Control": CACHE_CONTROL,
+        "Vary": "Accept-Encoding"
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, cached.etag):
+        return Response(status_code=304, headers=headers)
+
+    accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+    for encoding in ("br", "gzip"):
+        body = cached.encoded.get(encoding)
+        if body is not None and accepted.get(encoding, accepted.get("*", 0)) > 0:
+            headers["Content-Encoding"] = encoding
+            return Response(content=body, media_type="application/json", headers=headers)
+
+    return Response(content=cached.identity, media_type="application/json", headers=headers)
+
+
+class VersionedBodyCache:
+    """Keeps one CachedBody per name, rebuilt when the data version changes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bodies: Dict[str, Tuple[Hashable, CachedBody]] = {}
+
+    def get(self, name: str, version: Hashable, build: Callable[[], Any]) -> CachedBody:
+        """
+        Return the cached body for name at version
+
+        Args:
+            name: Endpoint name
+            version: Data version the body must reflect
+            build: Returns the JSON-compatible content (called on a miss)
+        """
+        entry = self._bodies.get(name)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+
+        cached = build_cached_body(build())
+        with self._lock:
+            self._bodies[name] = (version, cached)
+        return cached
+
+    def clear(self):
+        """Drop every cached body"""
+        with self._lock:
+            self._bodies.clear()
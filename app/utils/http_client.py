@@ -0,0 +1,93 @@
+"""
+Shared outbound HTTP client
+
+One long-lived httpx.AsyncClient per worker, so Google Maps calls reuse
+pooled keep-alive connections instead of paying TCP+TLS setup per request.
+Started and closed in the application lifespan; created lazily otherwise.
+
+Set MAPS_HTTP_STUB=true to route every call to the local stub transport
+(app/utils/maps_stub.py) for offline tests and benchmarks.
+"""
+import os
+from typing import Optional
+import httpx
+
+# Connection pool
+HTTP_MAX_CONNECTIONS = int(os.getenv("MAPS_HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("MAPS_HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("MAPS_HTTP_KEEPALIVE_EXPIRY", "30"))
+# HTTP/2 needs the optional h2 package (pip install httpx[http2])
+HTTP2_ENABLED = os.getenv("MAPS_HTTP2", "false").lower() == "true"
+HTTP_STUB_ENABLED = os.getenv("MAPS_HTTP_STUB", "false").lower() == "true"
+
+# Timeouts (seconds)
+HTTP_CONNECT_TIMEOUT = float(os.getenv("MAPS_HTTP_CONNECT_TIMEOUT", "3"))
+HTTP_POOL_TIMEOUT = float(os.getenv("MAPS_HTTP_POOL_TIMEOUT", "5"))
+DISTANCE_MATRIX_TIMEOUT = float(os.getenv("MAPS_DISTANCE_MATRIX_TIMEOUT", "10"))
+PLACES_SEARCH_TIMEOUT = float(os.getenv("MAPS_PLACES_SEARCH_TIMEOUT", "10"))
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def operation_timeout(read_timeout: float) -> httpx.Timeout:
+    """Timeout for one kind of call: shared connect/pool limits, own read/write limit"""
+    return httpx.Timeout(
+        read_timeout,
+        connect=HTTP_CONNECT_TIMEOUT,
+        pool=HTTP_POOL_TIMEOUT
+    )
+
+
+def create_http_client(transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient:
+    """
+    Build a pooled AsyncClient from the environment configuration
+
+    Args:
+        transport: Custom transport (e.g. the offline stub); default is the network
+    """
+    if transport is None and HTTP_STUB_ENABLED:
+        from app.utils.maps_stub import stub_maps_transport
+        transport = stub_maps_transport()
+
+    return httpx.AsyncClient(
+        transport=transport,
+        http2=HTTP2_ENABLED and transport is None and _http2_available(),
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+        ),
+        timeout=operation_timeout(DISTANCE_MATRIX_TIMEOUT)
+    )
+
+
+async def start_http_client(transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient:
+    """Create the shared client (application startup); replaces an existing one"""
+    global _client
+    await close_http_client()
+    _client = create_http_client(transport)
+    return _client
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it on first use"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_http_client()
+    return _client
+
+
+async def close_http_client():
+    """Close the shared client (application shutdown)"""
+    global _client
+    client, _client = _client, None
+    if client is not None and not client.is_closed:
+        await client.aclose()
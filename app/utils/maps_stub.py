@@ -0,0 +1,114 @@
+"""
+Offline stand-in for the Google Maps web services
+
+An httpx transport that answers Distance Matrix and Places Text Search
+requests with deterministic fake data (straight-line distance times a road
+factor), so tests and benchmarks never reach maps.googleapis.com.
+"""
+import asyncio
+import hashlib
+import math
+from typing import List, Tuple
+import httpx
+
+# Istanbul city centre; unparseable locations are placed around it
+_CENTER = (41.0082, 28.9784)
+
+
+def _haversine_km(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    lat1, lng1, lat2, lng2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(h))
+
+
+def _coordinates(location: str) -> Tuple[float, float]:
+    """'lat,lng' as given, anything else hashed to a stable point near the centre"""
+    try:
+        lat, lng = (float(part) for part in location.split(","))
+        return lat, lng
+    except ValueError:
+        digest = hashlib.sha256(location.encode("utf-8")).digest()
+        return (
+            _CENTER[0] + (digest[0] / 255 - 0.5) * 0.4,
+            _CENTER[1] + (digest[1] / 255 - 0.5) * 0.6
+        )
+
+
+class StubMapsHandler:
+    """Request handler for httpx.MockTransport; records every request"""
+
+    def __init__(self, road_factor: float = 1.3, speed_kmh: float = 40.0, latency_seconds: float = 0.0):
+        self.road_factor = road_factor
+        self.speed_kmh = speed_kmh
+        self.latency_seconds = latency_seconds
+        self.requests: List[httpx.Request] = []
+        # Fault injection: answer the next N requests with this status code
+        self.fail_next = 0
+        self.fail_status = 503
+        # Extra delay for the next N requests (e.g. one slow straggler)
+        self.slow_next = 0
+        self.slow_seconds = 0.0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        delay = self.latency_seconds
+        if self.slow_next > 0:
+            self.slow_next -= 1
+            delay += self.slow_seconds
+        if delay:
+            await asyncio.sleep(delay)
+        if self.fail_next > 0:
+            self.fail_next -= 1
+            return httpx.Response(self.fail_status, json={"status": "UNKNOWN_ERROR"})
+
+        if request.url.path.endswith("/distancematrix/json"):
+            return httpx.Response(200, json=self.distance_matrix(request))
+        if request.url.path.endswith("/place/textsearch/json"):
+            return httpx.Response(200, json=self.text_search(request))
+        return httpx.Response(404, json={"status": "NOT_FOUND"})
+
+    def distance_matrix(self, request: httpx.Request) -> dict:
+        origins = request.url.params.get("origins", "").split("|")
+        destinations = request.url.params.get("destinations", "").split("|")
+
+        rows = []
+        for origin in origins:
+            elements = []
+            for destination in destinations:
+                km = _haversine_km(_coordinates(origin), _coordinates(destination)) * self.road_factor
+                seconds = round(km / self.speed_kmh * 3600)
+                elements.append({
+                    "status": "OK",
+                    "distance": {"value": round(km * 1000), "text": f"{km:.1f} km"},
+                    "duration": {"value": seconds, "text": f"{max(1, round(seconds / 60))} dk"}
+                })
+            rows.append({"elements": elements})
+
+        return {
+            "status": "OK",
+            "origin_addresses": [f"Stub: {origin}" for origin in origins],
+            "destination_addresses": [f"Stub: {destination}" for destination in destinations],
+            "rows": rows
+        }
+
+    def text_search(self, request: httpx.Request) -> dict:
+        query = request.url.params.get("query", "")
+        if not query.strip():
+            return {"status": "ZERO_RESULTS", "results": []}
+
+        results = []
+        for i in range(3):
+            name = query.strip().title() if i == 0 else f"{query.strip().title()} {i + 1}"
+            lat, lng = _coordinates(name)
+            results.append({
+                "place_id": "stub-" + hashlib.sha1(name.encode("utf-8")).hexdigest()[:16],
+                "name": name,
+                "formatted_address": f"{name}, İstanbul, Türkiye",
+                "geometry": {"location": {"lat": round(lat, 6), "lng": round(lng, 6)}}
+            })
+        return {"status": "OK", "results": results}
+
+
+def stub_maps_transport(handler: StubMapsHandler = None) -> httpx.MockTransport:
+    """Transport that serves Maps requests from a StubMapsHandler"""
+    return httpx.MockTransport(handler or StubMapsHandler())
@@ -0,0 +1,211 @@
+"""
+Resilience primitives for outbound calls
+
+- CircuitBreaker: fails fast once the recent error or slow-call rate of an
+  endpoint crosses a threshold, then lets a trial call through after a pause.
+- RetryBudget: retries (and hedges) may only add a fraction of the normal
+  traffic, so a struggling upstream is not hit by a retry storm.
+- LatencyTracker: recent successful latencies, used for the hedging delay.
+"""
+import math
+import os
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+BREAKER_FAILURE_RATE = float(os.getenv("MAPS_BREAKER_FAILURE_RATE", "0.5"))
+BREAKER_SLOW_CALL_SECONDS = float(os.getenv("MAPS_BREAKER_SLOW_CALL_SECONDS", "3"))
+BREAKER_SLOW_CALL_RATE = float(os.getenv("MAPS_BREAKER_SLOW_CALL_RATE", "0.8"))
+BREAKER_WINDOW = int(os.getenv("MAPS_BREAKER_WINDOW", "20"))
+BREAKER_MIN_CALLS = int(os.getenv("MAPS_BREAKER_MIN_CALLS", "10"))
+BREAKER_OPEN_SECONDS = float(os.getenv("MAPS_BREAKER_OPEN_SECONDS", "30"))
+
+RETRY_BUDGET_RATIO = float(os.getenv("MAPS_RETRY_BUDGET_RATIO", "0.1"))
+RETRY_BUDGET_MIN_PER_SECOND = float(os.getenv("MAPS_RETRY_BUDGET_MIN_PER_SECOND", "1"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Count-based sliding window breaker (closed -> open -> half-open -> closed)
+
+    allow() hands out the current generation as a token; every opening starts
+    a new generation, so calls admitted before it (e.g. a slow call from the
+    closed state finishing during half-open) cannot close the circuit or free
+    the trial slot.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = BREAKER_FAILURE_RATE,
+        slow_call_seconds: float = BREAKER_SLOW_CALL_SECONDS,
+        slow_call_rate: float = BREAKER_SLOW_CALL_RATE,
+        window: int = BREAKER_WINDOW,
+        min_calls: int = BREAKER_MIN_CALLS,
+        open_seconds: float = BREAKER_OPEN_SECONDS,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self._clock = clock
+        # (failed, slow) per recent call
+        self._outcomes: Deque[Tuple[bool, bool]] = deque(maxlen=window)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._generation = 1
+        self._trial_in_flight = False
+        self.rejected = 0
+        self.opened = 0
+        self.stale_outcomes = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def allow(self) -> Optional[int]:
+        """
+        Token for a call that may go out now, None when it must fail fast
+
+        Half-open lets one trial call through.
+        """
+        state = self.state
+        if state == CLOSED:
+            return self._generation
+        if state == HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return self._generation
+        self.rejected += 1
+        return None
+
+    def record(self, token: int, failed: bool, elapsed: float):
+        """Outcome of a call that allow() let through (stale tokens are ignored)"""
+        if token != self._generation:
+            self.stale_outcomes += 1
+            return
+        slow = elapsed >= self.slow_call_seconds
+        if self._state == HALF_OPEN:
+            if failed or slow:
+                self._open()
+            else:
+                self._state = CLOSED
+                self._outcomes.clear()
+            self._trial_in_flight = False
+            return
+
+        self._outcomes.append((failed, slow))
+        if self._state == CLOSED and len(self._outcomes) >= self.min_calls:
+            calls = len(self._outcomes)
+            failures = sum(1 for f, _ in self._outcomes if f)
+            slow_calls = sum(1 for _, s in self._outcomes if s)
+            if failures / calls >= self.failure_rate or slow_calls / calls >= self.slow_call_rate:
+                self._open()
+
+    def release(self, token: int):
+        """A let-through call ended without an outcome (cancelled)"""
+        if token == self._generation and self._state == HALF_OPEN:
+            self._trial_in_flight = False
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = self._clock()
+        self._generation += 1
+        self._outcomes.clear()
+        self.opened += 1
+
+    def stats(self) -> Dict[str, Any]:
+        calls = len(self._outcomes)
+        return {
+            "state": self.state,
+            "window_calls": calls,
+            "window_failures": sum(1 for f, _ in self._outcomes if f),
+            "window_slow_calls": sum(1 for _, s in self._outcomes if s),
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "stale_outcomes": self.stale_outcomes
+        }
+
+
+class RetryBudget:
+    """
+    Token bucket for extra attempts
+
+    Every first attempt deposits `ratio` tokens and every retry/hedge spends
+    one, so extra load stays below ratio x normal load; min_per_second keeps
+    a few retries available when traffic is light.
+    """
+
+    def __init__(
+        self,
+        ratio: float = RETRY_BUDGET_RATIO,
+        min_per_second: float = RETRY_BUDGET_MIN_PER_SECOND,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.capacity = max(1.0, min_per_second * 10)
+        self._clock = clock
+        self._balance = self.capacity
+        self._updated = clock()
+        self.spent = 0
+        self.denied = 0
+
+    def _refill(self):
+        now = self._clock()
+        self._balance = min(self.capacity, self._balance + (now - self._updated) * self.min_per_second)
+        self._updated = now
+
+    def deposit(self):
+        """Called once per request (not per attempt)"""
+        self._refill()
+        self._balance = min(self.capacity, self._balance + self.ratio)
+
+    def try_spend(self) -> bool:
+        """Take one token for a retry/hedge; False when the budget is exhausted"""
+        self._refill()
+        if self._balance >= 1:
+            self._balance -= 1
+            self.spent += 1
+            return True
+        self.denied += 1
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        self._refill()
+        return {
+            "balance": round(self._balance, 2),
+            "capacity": self.capacity,
+            "spent": self.spent,
+            "denied": self.denied
+        }
+
+
+class LatencyTracker:
+    """Recent successful call latencies"""
+
+    def __init__(self, size: int = 200):
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def percentile(self, p: float) -> float:
+        """Nearest-rank percentile (0 when there are no samples)"""
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        rank = max(1, math.ceil(p / 100 * len(ordered)))
+        return ordered[rank - 1]
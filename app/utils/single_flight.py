@@ -0,0 +1,64 @@
+"""
+Single-flight coalescing for outbound calls
+
+Concurrent callers asking for the same key share one in-flight upstream
+call: the first caller starts it, everyone arriving before it finishes
+awaits the same result (or exception). Nothing is kept once the call is
+done; caching stays the job of the layers around it.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Deduplicates identical in-flight coroutine calls by key"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.executions = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fn() unless a call for key is already in flight, then await it
+
+        The shared result object is returned to every caller as is;
+        callers that mutate it should copy it first.
+        """
+        loop = asyncio.get_running_loop()
+        self.calls += 1
+
+        task = self._inflight.get(key)
+        if task is None or task.get_loop() is not loop:
+            # A task left over from another (finished) event loop cannot be awaited here
+            task = loop.create_task(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+            self.executions += 1
+
+        # One caller giving up must not cancel the call for the others
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception retrieved when every caller was cancelled
+            task.exception()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+    def stats(self) -> Dict[str, Any]:
+        """How many calls were collapsed into a shared upstream call"""
+        collapsed = self.calls - self.executions
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "executions": self.executions,
+            "collapsed": collapsed,
+            "in_flight": self.in_flight,
+            "collapse_rate": round(collapsed / self.calls, 4) if self.calls else 0.0
+        }
@@ -1,19 +1,30 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, UploadFile, File, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse
+from fastapi.responses import FileResponse, RedirectResponse, StreamingResponse
 from pydantic import BaseModel
+from typing import Literal
 from dotenv import load_dotenv
-import httpx
+import asyncio
 import os
 import shutil
 from contextlib import asynccontextmanager
 import time
 from sqlalchemy.exc import OperationalError
-from app.database import engine, Base, SessionLocal
+from app.database import engine, async_engine, Base, SessionLocal
 from app.models import db_models # Ensure models are loaded
-from app.api import pricing, exchange_rates
+from app.api import pricing, exchange_rates, quote
 from app.admin.admin_panel import setup_admin
 from app.services.init_db import init_db_data, init_routes_data
+from app.services.pricing_snapshot import pricing_snapshot_store
+from app.middleware.query_stats import QueryStatsMiddleware, install_query_stats, query_stats_registry
+from app.core.exceptions import GoogleMapsAPIError
+from app.utils.google_maps import get_maps_client
+from app.utils.http_client import start_http_client, close_http_client
+from app.services.distance_cache import distance_cache
+from app.services.place_index import place_index
+from app.services.excel_writeback import excel_writeback
+from app.services.route_export import MEDIA_TYPES, route_export_cache
+from app.services.distance_estimator import distance_estimator, calculate_distance as resolve_distance
 
 # Load environment variables
 load_dotenv()
@@ -56,6 +67,12 @@ async def lifespan(app: FastAPI):
                 init_db_data()
             except Exception as e:
                 print(f"⚠️ Data seeding warning: {e}")
+            
+            # Warm the pricing snapshot so the first quote doesn't pay for it
+            try:
+                pricing_snapshot_store.refresh()
+            except Exception as e:
+                print(f"⚠️ Pricing snapshot warning: {e}")
                 
             break
         except OperationalError as e:
@@ -67,10 +84,28 @@ async def lifespan(app: FastAPI):
     if retries == 0:
         print("❌ CRITICAL: Could not connect to database after retries.")
     
+    # Shared pooled HTTP client for Google Maps calls
+    await start_http_client()
+    
+    # Offline distance estimates learn from the cached Google results
+    try:
+        print(f"📐 Distance estimator trained on {await distance_estimator.train()} cached routes")
+    except Exception as e:
+        print(f"⚠️ Distance estimator warning: {e}")
+    
+    # Döviz kurları arka planda, süresi dolmadan yenilenir (son kurlar diskten)
+    exchange_rates.exchange_rate_store.start()
+    
     yield
     
     # Shutdown logic
     print("👋 Shutting down...")
+    await exchange_rates.exchange_rate_store.stop()
+    # Bekleyen admin rota değişikliklerini Excel'e yaz
+    await excel_writeback.flush()
+    await close_http_client()
+    for endpoint, totals in query_stats_registry.summary().items():
+        print(f"📊 {endpoint}: {totals}")
 
 
 def create_application() -> FastAPI:
@@ -95,12 +130,17 @@ def create_application() -> FastAPI:
         allow_headers=["*"],
     )
     
+    # Per-request SQL query counting / N+1 detection
+    install_query_stats(engine, async_engine)
+    app.add_middleware(QueryStatsMiddleware)
+    
     # Static Files
     app.mount("/static", CacheStaticFiles(directory="static"), name="static")
 
     # Include routers
     app.include_router(pricing.router)
     app.include_router(exchange_rates.router)
+    app.include_router(quote.router)
     
     # Setup Admin
     setup_admin(app)
@@ -120,6 +160,9 @@ class DistanceRequest(BaseModel):
     origin_lng: float
     destination_lat: float
     destination_lng: float
+    # google: Distance Matrix, estimate: anında yerel tahmin,
+    # auto: Google yavaşsa / erişilemezse tahmin
+    mode: Literal["google", "estimate", "auto"] = "google"
 
 
 class DistanceResponse(BaseModel):
@@ -129,6 +172,7 @@ class DistanceResponse(BaseModel):
     duration_text: str
     origin_address: str
     destination_address: str
+    is_estimate: bool = False
 
 
 class PlaceSearchRequest(BaseModel):
@@ -155,54 +199,52 @@ async def get_maps_key():
     return {"api_key": GOOGLE_MAPS_API_KEY}
 
 
+def maps_http_error(error: GoogleMapsAPIError) -> HTTPException:
+    """Google Maps hatasını HTTP yanıtına çevir"""
+    status = error.details.get("status")
+    if status is None:
+        # Bağlantı / HTTP hatası
+        return HTTPException(status_code=error.status_code, detail=error.message)
+    if "element" in error.details:
+        return HTTPException(status_code=400, detail=f"Rota bulunamadı: {status}")
+    return HTTPException(status_code=400, detail=f"Google API hatası: {status}")
+
+
 @app.post("/api/calculate-distance", response_model=DistanceResponse)
 async def calculate_distance(request: DistanceRequest):
     """
     İki konum arasındaki mesafeyi ve süreyi hesaplar
-    Google Distance Matrix API kullanır
+    Google Distance Matrix API kullanır (mode=estimate/auto ile yerel tahmin)
     """
-    if not GOOGLE_MAPS_API_KEY:
+    if not GOOGLE_MAPS_API_KEY and request.mode == "google":
         raise HTTPException(status_code=500, detail="Google Maps API key yapılandırılmamış")
     
-    origin = f"{request.origin_lat},{request.origin_lng}"
-    destination = f"{request.destination_lat},{request.destination_lng}"
-    
-    url = "https://maps.googleapis.com/maps/api/distancematrix/json"
-    params = {
-        "origins": origin,
-        "destinations": destination,
-        "mode": "driving",
-        "language": "tr",
-        "key": GOOGLE_MAPS_API_KEY
-    }
-    
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, params=params)
-        data = response.json()
-    
-    if data.get("status") != "OK":
-        raise HTTPException(status_code=400, detail=f"Google API hatası: {data.get('status')}")
-    
-    element = data["rows"][0]["elements"][0]
-    
-    if element.get("status") != "OK":
-        raise HTTPException(status_code=400, detail=f"Rota bulunamadı: {element.get('status')}")
+    try:
+        result = await resolve_distance(
+            get_maps_client(GOOGLE_MAPS_API_KEY) if GOOGLE_MAPS_API_KEY else None,
+            origin_lat=request.origin_lat,
+            origin_lng=request.origin_lng,
+            destination_lat=request.destination_lat,
+            destination_lng=request.destination_lng,
+            mode=request.mode
+        )
+    except GoogleMapsAPIError as e:
+        raise maps_http_error(e)
     
     # Mesafeyi km'ye çevir (metre olarak gelir)
-    distance_meters = element["distance"]["value"]
-    distance_km = round(distance_meters / 1000, 1)
+    distance_km = round(result["distance_meters"] / 1000, 1)
     
     # Süreyi dakikaya çevir (saniye olarak gelir)
-    duration_seconds = element["duration"]["value"]
-    duration_minutes = round(duration_seconds / 60)
+    duration_minutes = round(result["duration_seconds"] / 60)
     
     return DistanceResponse(
         distance_km=distance_km,
-        distance_text=element["distance"]["text"],
+        distance_text=result["distance_text"],
         duration_minutes=duration_minutes,
-        duration_text=element["duration"]["text"],
-        origin_address=data["origin_addresses"][0],
-        destination_address=data["destination_addresses"][0]
+        duration_text=result["duration_text"],
+        origin_address=result["origin_address"],
+        destination_address=result["destination_address"],
+        is_estimate=result.get("estimated", False)
     )
 
 
@@ -210,46 +252,103 @@ async def calculate_distance(request: DistanceRequest):
 async def search_places(request: PlaceSearchRequest):
     """
     Google Places API ile konum arama
+    - Havalimanları, ilçeler ve daha önce bulunan yerler yerel indeksten
+      (API key gerekmez)
     """
-    if not GOOGLE_MAPS_API_KEY:
-        raise HTTPException(status_code=500, detail="Google Maps API key yapılandırılmamış")
-    
-    url = "https://maps.googleapis.com/maps/api/place/textsearch/json"
-    params = {
-        "query": request.query,
-        "language": "tr",
-        "key": GOOGLE_MAPS_API_KEY
-    }
-    
-    # Eğer konum verilmişse, yakın sonuçları tercih et
+    # Eğer konum verilmişse, yakın sonuçları tercih et (50km yarıçap)
+    location = None
     if request.location_lat and request.location_lng:
-        params["location"] = f"{request.location_lat},{request.location_lng}"
-        params["radius"] = "50000"  # 50km yarıçap
+        location = (request.location_lat, request.location_lng)
     
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, params=params)
-        data = response.json()
+    # Yerel indekste eşit eşleşmeler konuma yakınlığa göre sıralanır
+    places = place_index.search(request.query, location)
+    if places is not None:
+        return {"places": places}
     
-    if data.get("status") not in ["OK", "ZERO_RESULTS"]:
-        raise HTTPException(status_code=400, detail=f"Google API hatası: {data.get('status')}")
+    if not GOOGLE_MAPS_API_KEY:
+        raise HTTPException(status_code=500, detail="Google Maps API key yapılandırılmamış")
     
-    places = []
-    for place in data.get("results", [])[:10]:  # En fazla 10 sonuç
-        places.append({
-            "place_id": place.get("place_id"),
-            "name": place.get("name"),
-            "address": place.get("formatted_address"),
-            "lat": place["geometry"]["location"]["lat"],
-            "lng": place["geometry"]["location"]["lng"]
-        })
+    try:
+        places = await get_maps_client(GOOGLE_MAPS_API_KEY).search_places(
+            query=request.query,
+            location=location
+        )
+    except GoogleMapsAPIError as e:
+        raise maps_http_error(e)
     
+    place_index.learn(places)
     return {"places": places}
 
 
+@app.get("/api/admin/distance-cache")
+async def get_distance_cache_stats():
+    """Mesafe önbelleği istatistikleri (bellek + veritabanı)"""
+    stats = distance_cache.stats()
+    try:
+        stats["rows"] = await distance_cache.row_count()
+    except Exception as e:
+        stats["rows"] = None
+        stats["error"] = str(e)
+    return stats
+
+
+@app.post("/api/admin/distance-cache/purge")
+async def purge_distance_cache():
+    """Mesafe önbelleğini tamamen temizle"""
+    try:
+        removed = await distance_cache.purge()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"purged_rows": removed}
+
+
+@app.get("/api/admin/outbound-calls")
+async def get_outbound_call_stats():
+    """Dış servis çağrılarında birleştirilen (single-flight / batch) istek sayıları"""
+    stats = {
+        "exchange_rates": {
+            **exchange_rates.exchange_rate_flight.stats(),
+            "store": exchange_rates.exchange_rate_store.stats()
+        },
+        "place_index": place_index.stats(),
+        "distance_estimator": distance_estimator.stats()
+    }
+    if GOOGLE_MAPS_API_KEY:
+        stats["google_maps"] = get_maps_client(GOOGLE_MAPS_API_KEY).stats()
+    return stats
+
+
+@app.get("/api/admin/export-routes")
+async def export_routes(fmt: Literal["xlsx", "csv"] = Query("xlsx", alias="format")):
+    """
+    Güncel FixedRoute kataloğunu indir (import-excel ile aynı sütunlar)
+    - Veritabanından akış halinde okunur; satır sayısından bağımsız sabit bellek
+    - Oluşan dosya veri anahtarı değişene kadar yeniden kullanılır (bu worker'ın
+      fiyat verisi versiyonu + veritabanı parmak izi; başka worker'ların
+      değişiklikleri de yeni dosya üretir)
+    """
+    key = await asyncio.to_thread(route_export_cache.data_key, pricing_snapshot_store.version)
+    headers = {
+        "Content-Disposition": f'attachment; filename="istanbul_transfer.{fmt}"',
+        "X-Route-Data-Version": key
+    }
+    media_type = MEDIA_TYPES[fmt]
+
+    path = route_export_cache.cached(fmt, key)
+    if path is None and fmt == "xlsx":
+        # xlsx (zip) ancak tamamlanınca okunabilir; write-only modda diske yazılır
+        path = await asyncio.to_thread(route_export_cache.build_xlsx, key)
+    if path is not None:
+        return FileResponse(path, media_type=media_type, headers=headers)
+    return StreamingResponse(route_export_cache.stream_csv(key), media_type=media_type, headers=headers)
+
+
 @app.post("/api/admin/import-excel")
-async def import_excel(file: UploadFile = File(...)):
+async def import_excel(file: UploadFile = File(...), full_reload: bool = False):
     """
     Import Excel file and update database
+    - Varsayılan: sadece değişen rotalar yazılır
+    - full_reload=true: tablo silinip toplu yüklenir (PostgreSQL'de COPY)
     """
     if not file.filename.endswith(".xlsx"):
         raise HTTPException(status_code=400, detail="Only .xlsx files are allowed")
@@ -263,10 +362,14 @@ async def import_excel(file: UploadFile = File(...)):
         # Sync database
         db = SessionLocal()
         try:
-            init_routes_data(db)
+            result = init_routes_data(db, full_reload=full_reload)
         finally:
             db.close()
         
+        # Routes changed - rebuild the pricing snapshot
+        if result is None or result.changed:
+            pricing_snapshot_store.bump_version()
+        
         return RedirectResponse(url="/admin/fixed-route/list", status_code=303)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
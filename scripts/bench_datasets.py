@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Synthetic pricing datasets for the benchmark suite
+
+Builds a SQLite database with a vehicle fleet, PricingConfig rows and any
+number of FixedRoute rows between realistic Istanbul location names.
+"""
+import os
+import random
+import sys
+from typing import List, Tuple
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models.db_models import FixedRoute, PricingConfig, Vehicle, VehicleImage
+from app.services.init_db import init_pricing_data, init_vehicle_data
+
+AIRPORTS = [
+    "İstanbul Havalimanı (IST)",
+    "Sabiha Gökçen Havalimanı (SAW)",
+]
+
+DISTRICTS = [
+    "Adalar", "Arnavutköy", "Ataşehir", "Avcılar", "Bağcılar", "Bahçelievler",
+    "Bakırköy", "Başakşehir", "Bayrampaşa", "Beşiktaş", "Beykoz", "Beylikdüzü",
+    "Beyoğlu", "Büyükçekmece", "Çatalca", "Çekmeköy", "Esenler", "Esenyurt",
+    "Eyüpsultan", "Fatih", "Gaziosmanpaşa", "Güngören", "Kadıköy", "Kağıthane",
+    "Kartal", "Küçükçekmece", "Maltepe", "Pendik", "Sancaktepe", "Sarıyer",
+    "Silivri", "Sultanbeyli", "Sultangazi", "Şile", "Şişli", "Tuzla",
+    "Ümraniye", "Üsküdar", "Zeytinburnu",
+]
+
+NEIGHBOURHOODS = [
+    "Cumhuriyet", "Fatih", "Yenimahalle", "Merkez", "Atatürk", "Bahçelievler",
+    "Çamlıca", "Esentepe", "Fenerbahçe", "Göztepe", "Hürriyet", "İnönü",
+    "Kocatepe", "Levent", "Mecidiyeköy", "Moda", "Nişantaşı", "Ortaköy",
+    "Acıbadem", "Bebek", "Çengelköy", "Erenköy", "Suadiye", "Yeşilköy",
+    "Florya", "Etiler", "Kuruçeşme", "Tarabya", "Zekeriyaköy", "Göktürk",
+]
+
+PLACE_KINDS = ["Mahallesi", "Meydanı", "Sahili", "Çarşısı", "Otel", "Rezidans", "AVM", "Marina"]
+
+FIXED_ROUTE_SIZES = [10, 1_000, 10_000, 100_000]
+
+
+def location_names(count: int, rnd: random.Random) -> List[str]:
+    """Distinct Turkish location names, e.g. 'Moda Sahili (Kadıköy)'"""
+    names = set()
+    while len(names) < count:
+        district = rnd.choice(DISTRICTS)
+        place = f"{rnd.choice(NEIGHBOURHOODS)} {rnd.choice(PLACE_KINDS)}"
+        if len(names) > len(DISTRICTS) * len(NEIGHBOURHOODS):
+            place = f"{place} {rnd.randint(1, 99)}"
+        names.add(f"{place} ({district})")
+    return sorted(names)
+
+
+def route_pairs(count: int, rnd: random.Random) -> List[Tuple[str, str]]:
+    """Distinct (origin, destination) pairs; most routes start at an airport"""
+    names = location_names(max(50, int(count ** 0.75)), rnd)
+    pairs = set()
+    while len(pairs) < count:
+        origin = rnd.choice(AIRPORTS) if rnd.random() < 0.6 else rnd.choice(names)
+        destination = rnd.choice(names)
+        if origin != destination:
+            pairs.add((origin, destination))
+    return sorted(pairs)
+
+
+def add_fleet(db, extra_vehicles: int = 0, images_per_vehicle: int = 3):
+    """Standard vehicles, optional synthetic extras, images and vehicle pricing rows"""
+    init_pricing_data(db)
+    init_vehicle_data(db)
+
+    for i in range(extra_vehicles):
+        db.add(Vehicle(
+            vehicle_type=f"synthetic_{i}", name_en=f"Synthetic {i}", name_tr=f"Sentetik {i}",
+            capacity_min=1, capacity_max=4 + i % 12, baggage_capacity=4, features=[]
+        ))
+    db.flush()
+
+    for vehicle in db.query(Vehicle).all():
+        for j in range(images_per_vehicle):
+            db.add(VehicleImage(
+                vehicle_id=vehicle.id, image_path=f"images/{vehicle.vehicle_type}_{j}.jpg",
+                is_primary=j == 0, display_order=j
+            ))
+        db.add(PricingConfig(
+            config_key=f"minimum_fare_{vehicle.vehicle_type}",
+            config_value=1500 + vehicle.capacity_max * 50,
+            vehicle_type=vehicle.vehicle_type
+        ))
+        if vehicle.vehicle_type.startswith("synthetic_"):
+            db.add(PricingConfig(
+                config_key=f"per_km_rate_{vehicle.vehicle_type}",
+                config_value=round(10 + vehicle.capacity_max * 0.8, 2),
+                vehicle_type=vehicle.vehicle_type
+            ))
+    db.commit()
+
+
+def add_fixed_routes(db, count: int, seed: int = 42):
+    """Bulk insert `count` FixedRoute rows spread over the standard vehicles"""
+    if count <= 0:
+        return
+    rnd = random.Random(seed)
+    vehicle_ids = [
+        vehicle_id for (vehicle_id,) in
+        db.query(Vehicle.id).filter(~Vehicle.vehicle_type.like("synthetic_%")).order_by(Vehicle.id)
+    ]
+    pair_count = -(-count // len(vehicle_ids))
+
+    rows = []
+    for origin, destination in route_pairs(pair_count, rnd):
+        base = rnd.uniform(900, 6000)
+        for vehicle_id in vehicle_ids:
+            if len(rows) == count:
+                break
+            rows.append({
+                "origin": origin,
+                "destination": destination,
+                "vehicle_id": vehicle_id,
+                "price": round(base * rnd.uniform(1.0, 2.2), 2),
+                "discount_percent": rnd.choice([0, 0, 0, 5, 10]),
+                "active": True
+            })
+
+    for start in range(0, len(rows), 10_000):
+        db.execute(insert(FixedRoute), rows[start:start + 10_000])
+    db.commit()
+
+
+def create_dataset(path: str, fixed_routes: int, extra_vehicles: int = 0, seed: int = 42) -> Engine:
+    """
+    Create a fresh SQLite database file with a synthetic dataset
+
+    Returns:
+        Engine bound to the new database
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+
+    db = sessionmaker(bind=engine)()
+    try:
+        add_fleet(db, extra_vehicles=extra_vehicles)
+        add_fixed_routes(db, fixed_routes, seed=seed)
+    finally:
+        db.close()
+    return engine
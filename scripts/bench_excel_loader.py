@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Excel route loader benchmark
+
+Writes synthetic route sheets and compares, per sheet size:
+- legacy: pd.read_excel + df.iterrows() with per-cell checks (the loader
+  before RouteTable)
+- columnar: DataManager.load_route_table() (bulk parse)
+- streaming: DataManager.iter_route_batches() (read-only openpyxl batches)
+
+Reports wall time and peak traced memory per load.
+
+Usage:
+    python scripts/bench_excel_loader.py
+    python scripts/bench_excel_loader.py --rows 1000,20000 --repeat 3 --json results.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from openpyxl import Workbook
+from app.services import data_manager
+from app.services.data_manager import DataManager
+
+ROW_SIZES = (50, 5000, 20000)
+COLUMNS = ["ID", "Origin", "Destination", "Price_Sedan", "Price_Vito", "Price_VitoVIP",
+           "Price_Sprinter", "Active", "Discount", "Comp_Price", "Notes"]
+CITIES = ["İstanbul", "Antalya", "İzmir", "Muğla", "Nevşehir"]
+
+
+@dataclass
+class BenchResult:
+    """One benchmark row"""
+    loader: str
+    rows: int
+    routes: int
+    best_ms: float
+    mean_ms: float
+    peak_mib: float
+
+
+def legacy_load_routes() -> List[Dict]:
+    """Row-by-row loader kept as the baseline"""
+    df = pd.read_excel(data_manager.FILE_PATH)
+    routes = []
+    if "Price_Vito" in df.columns:
+        for _, row in df.iterrows():
+            if pd.notna(row["Origin"]) and pd.notna(row["Destination"]):
+                route_id = int(row["ID"]) if "ID" in df.columns and pd.notna(row["ID"]) else None
+                routes.append({
+                    "id": route_id,
+                    "origin": str(row["Origin"]).strip(),
+                    "destination": str(row["Destination"]).strip(),
+                    "price_vito": float(row["Price_Vito"]),
+                    "price_sedan": float(row["Price_Sedan"]) if "Price_Sedan" in df.columns and pd.notna(row["Price_Sedan"]) else None,
+                    "price_sprinter": float(row["Price_Sprinter"]) if "Price_Sprinter" in df.columns and pd.notna(row["Price_Sprinter"]) else None,
+                    "price_vitovip": float(row["Price_VitoVIP"]) if "Price_VitoVIP" in df.columns and pd.notna(row["Price_VitoVIP"]) else None,
+                    "active": bool(row["Active"]) if "Active" in df.columns and pd.notna(row["Active"]) else True,
+                    "discount": float(row["Discount"]) if "Discount" in df.columns and pd.notna(row["Discount"]) else 0,
+                    "comp_price": float(row["Comp_Price"]) if "Comp_Price" in df.columns and pd.notna(row["Comp_Price"]) else None,
+                    "notes": str(row["Notes"]) if "Notes" in df.columns and pd.notna(row["Notes"]) else ""
+                })
+    return routes
+
+
+def write_sheet(path: str, rows: int, seed: int = 7):
+    """Synthetic multi-city sheet with some empty cells"""
+    rng = random.Random(seed)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(COLUMNS)
+    for i in range(rows):
+        city = rng.choice(CITIES)
+        price = rng.randint(600, 4000)
+        sheet.append([
+            i + 1,
+            f"{city} Havalimanı",
+            f"{city} Bölge {i}",
+            price + 300 if i % 3 else None,
+            price,
+            price + 500 if i % 4 == 0 else None,
+            price + 900 if i % 2 else None,
+            i % 10 != 0,
+            rng.choice([0, 5, 10]),
+            price - 50 if i % 5 == 0 else None,
+            "Rakip fiyatı" if i % 7 == 0 else None,
+        ])
+    workbook.save(path)
+
+
+def measure(loader: str, rows: int, operation: Callable[[], int], repeat: int) -> BenchResult:
+    """Time the load, then trace its peak memory once"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        routes = operation()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    try:
+        operation()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return BenchResult(
+        loader=loader,
+        rows=rows,
+        routes=routes,
+        best_ms=round(min(timings), 1),
+        mean_ms=round(sum(timings) / len(timings), 1),
+        peak_mib=round(peak / 2 ** 20, 2)
+    )
+
+
+def run_size(rows: int, work_dir: str, args) -> List[BenchResult]:
+    """All loaders against one sheet size"""
+    path = os.path.join(work_dir, f"routes_{rows}.xlsx")
+    write_sheet(path, rows)
+    data_manager.FILE_PATH = path
+
+    def streaming():
+        # Batches are consumed and dropped, as init_routes_data does
+        return sum(len(batch) for batch in DataManager.iter_route_batches(args.batch_size))
+
+    results = [
+        measure("columnar", rows, lambda: len(DataManager.load_route_table()), args.repeat),
+        measure(f"streaming x{args.batch_size}", rows, streaming, args.repeat),
+    ]
+    if not args.skip_legacy:
+        results.insert(0, measure("legacy iterrows", rows, lambda: len(legacy_load_routes()), args.repeat))
+    return results
+
+
+def print_table(results: List[BenchResult]):
+    """Human readable report"""
+    header = f"{'loader':<20} {'rows':>7} {'routes':>7} {'best ms':>9} {'mean ms':>9} {'peak MiB':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r.loader:<20} {r.rows:>7} {r.routes:>7} {r.best_ms:>9.1f} {r.mean_ms:>9.1f} {r.peak_mib:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Excel route loader benchmark")
+    parser.add_argument("--rows", default=",".join(str(s) for s in ROW_SIZES),
+                        help="Comma separated sheet sizes")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per loader")
+    parser.add_argument("--batch-size", type=int, default=data_manager.ROUTE_BATCH_SIZE,
+                        help="Rows per batch in streaming mode")
+    parser.add_argument("--skip-legacy", action="store_true", help="Skip the row-by-row baseline")
+    parser.add_argument("--json", dest="json_path", help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="shuttleport-excel-bench-")
+    results = []
+    for size in (int(s) for s in args.rows.split(",") if s.strip()):
+        print(f"\n⏱  {size} rows...", file=sys.stderr)
+        results.extend(run_size(size, work_dir, args))
+
+    print()
+    print_table(results)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump([asdict(r) for r in results], f, indent=2)
+        print(f"\n✓ Results written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
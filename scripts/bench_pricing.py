@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Pricing hot-path benchmarks
+
+Runs offline against synthetic SQLite datasets (see bench_datasets.py) and
+reports latency percentiles, SQL queries and allocations per operation for:
+snapshot builds, get_vehicle_configs, fixed route matching (hit / miss),
+single quotes (cached / uncached, hit / miss) and batch quotes.
+
+Usage:
+    python scripts/bench_pricing.py
+    python scripts/bench_pricing.py --sizes 10,1000 --iterations 500 --json results.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Callable, List
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Never touch the configured database: the app modules bind their default
+# engine at import time, so point it at a scratch SQLite file first.
+_WORK_DIR = tempfile.mkdtemp(prefix="shuttleport-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_WORK_DIR, 'default.db')}"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from main import app
+from app.api.pricing import catalog_bodies
+from app.database import get_async_db
+from app.models.db_models import FixedRoute
+from app.models.pricing import check_fixed_route, get_vehicle_configs
+from app.services.pricing_snapshot import build_pricing_snapshot, pricing_snapshot_store
+from app.services.quote_cache import quote_cache
+from bench_datasets import FIXED_ROUTE_SIZES, create_dataset
+
+MISS_ORIGIN = "Bilinmeyen Köy Yolu"
+MISS_DESTINATION = "Hayali Sahil Caddesi"
+
+
+@dataclass
+class BenchResult:
+    """One benchmark row"""
+    scenario: str
+    fixed_routes: int
+    iterations: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    mean_ms: float
+    queries_per_op: float
+    alloc_kib_per_op: float
+
+
+@contextmanager
+def count_queries(*engines):
+    """Collect every SQL statement executed on the engines"""
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", listener)
+    try:
+        yield statements
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", listener)
+
+
+def percentile(sorted_values: List[float], percent: float) -> float:
+    """Nearest-rank percentile"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(percent / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+def measure(
+    scenario: str,
+    fixed_routes: int,
+    operation: Callable[[], object],
+    iterations: int,
+    engines,
+    setup: Callable[[], object] = None,
+    warmup: int = 3
+) -> BenchResult:
+    """Time an operation, then count its queries and allocations"""
+    for _ in range(warmup):
+        if setup:
+            setup()
+        operation()
+
+    latencies = []
+    with count_queries(*engines) as statements:
+        for _ in range(iterations):
+            if setup:
+                setup()
+            started = time.perf_counter()
+            operation()
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    # Allocation pass runs separately: tracing slows everything down
+    alloc_runs = min(iterations, 20)
+    allocated = 0
+    tracemalloc.start()
+    try:
+        for _ in range(alloc_runs):
+            if setup:
+                setup()
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            operation()
+            _, peak = tracemalloc.get_traced_memory()
+            allocated += peak - before
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+    return BenchResult(
+        scenario=scenario,
+        fixed_routes=fixed_routes,
+        iterations=iterations,
+        p50_ms=round(percentile(latencies, 50), 3),
+        p95_ms=round(percentile(latencies, 95), 3),
+        p99_ms=round(percentile(latencies, 99), 3),
+        mean_ms=round(sum(latencies) / len(latencies), 3),
+        queries_per_op=round(len(statements) / iterations, 2),
+        alloc_kib_per_op=round(allocated / alloc_runs / 1024, 1)
+    )
+
+
+def itinerary(origin: str, destination: str, **overrides) -> dict:
+    """Quote request payload"""
+    payload = {
+        "origin_lat": 41.2753,
+        "origin_lng": 28.7519,
+        "origin_name": origin,
+        "destination_lat": 41.0054,
+        "destination_lng": 28.9768,
+        "destination_name": destination,
+        "distance_km": 42.7,
+        "duration_minutes": 48,
+        "passenger_count": 3,
+        "is_round_trip": False,
+        "is_airport_transfer": True,
+    }
+    payload.update(overrides)
+    return payload
+
+
+def reset_caches():
+    """Forget the snapshot and every derived cache"""
+    pricing_snapshot_store.clear()
+    quote_cache.clear()
+    catalog_bodies.clear()
+
+
+def run_size(fixed_routes: int, args) -> List[BenchResult]:
+    """All scenarios against one dataset size"""
+    path = os.path.join(_WORK_DIR, f"bench_{fixed_routes}.db")
+    engine = create_dataset(path, fixed_routes, extra_vehicles=args.extra_vehicles)
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+    async_session_factory = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with async_session_factory() as db:
+            yield db
+
+    pricing_snapshot_store.session_factory = session_factory
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    reset_caches()
+
+    engines = (engine, async_engine.sync_engine)
+    client = TestClient(app)
+    iterations = args.iterations
+    build_iterations = max(3, min(iterations, args.build_iterations))
+
+    db = session_factory()
+    try:
+        hit_route = db.query(FixedRoute.origin, FixedRoute.destination).order_by(FixedRoute.id.desc()).first()
+    finally:
+        db.close()
+    hit_origin, hit_destination = hit_route if hit_route else (MISS_ORIGIN, MISS_DESTINATION)
+
+    def with_session(operation):
+        def run():
+            session = session_factory()
+            try:
+                return operation(session)
+            finally:
+                session.close()
+        return run
+
+    results = [
+        measure("snapshot build", fixed_routes,
+                with_session(lambda session: build_pricing_snapshot(session, 0)),
+                build_iterations, engines),
+        measure("get_vehicle_configs", fixed_routes,
+                with_session(get_vehicle_configs), iterations, engines),
+    ]
+
+    pricing_snapshot_store.refresh()
+    results += [
+        measure("check_fixed_route hit", fixed_routes,
+                lambda: check_fixed_route(hit_destination, hit_origin), iterations, engines),
+        measure("check_fixed_route miss", fixed_routes,
+                lambda: check_fixed_route(MISS_ORIGIN, MISS_DESTINATION), iterations, engines),
+    ]
+
+    hit_payload = itinerary(hit_origin, hit_destination)
+    miss_payload = itinerary(MISS_ORIGIN, MISS_DESTINATION)
+    post = lambda payload: lambda: client.post("/api/pricing/calculate", json=payload)
+    results += [
+        measure("calculate hit (uncached)", fixed_routes, post(hit_payload), iterations, engines,
+                setup=quote_cache.clear),
+        measure("calculate miss (uncached)", fixed_routes, post(miss_payload), iterations, engines,
+                setup=quote_cache.clear),
+        measure("calculate hit (cached)", fixed_routes, post(hit_payload), iterations, engines),
+        measure("calculate cold snapshot", fixed_routes, post(hit_payload), build_iterations, engines,
+                setup=reset_caches),
+    ]
+
+    batch = [
+        itinerary(hit_origin, hit_destination, distance_km=10 + i % 90, passenger_count=1 + i % 12)
+        if i % 2 else
+        itinerary(MISS_ORIGIN, MISS_DESTINATION, distance_km=10 + i % 90, is_round_trip=True)
+        for i in range(args.batch_size)
+    ]
+    results.append(measure(
+        f"calculate-batch x{args.batch_size}", fixed_routes,
+        lambda: client.post("/api/pricing/calculate-batch", json=batch),
+        max(3, iterations // 10), engines
+    ))
+
+    app.dependency_overrides.pop(get_async_db, None)
+    reset_caches()
+    engine.dispose()
+    return results
+
+
+def print_table(results: List[BenchResult]):
+    """Human readable report"""
+    header = f"{'scenario':<28} {'routes':>7} {'iter':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'mean ms':>9} {'q/op':>6} {'KiB/op':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r.scenario:<28} {r.fixed_routes:>7} {r.iterations:>5} {r.p50_ms:>9.3f} {r.p95_ms:>9.3f} "
+              f"{r.p99_ms:>9.3f} {r.mean_ms:>9.3f} {r.queries_per_op:>6.2f} {r.alloc_kib_per_op:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pricing hot-path benchmarks (offline, SQLite)")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in FIXED_ROUTE_SIZES),
+                        help="Comma separated FixedRoute row counts")
+    parser.add_argument("--iterations", type=int, default=200, help="Timed runs per scenario")
+    parser.add_argument("--build-iterations", type=int, default=10,
+                        help="Timed runs for scenarios that rebuild the snapshot")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Itineraries per batch request")
+    parser.add_argument("--extra-vehicles", type=int, default=0, help="Synthetic vehicles added to the fleet")
+    parser.add_argument("--json", dest="json_path", help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    results = []
+    for size in (int(s) for s in args.sizes.split(",") if s.strip()):
+        print(f"\n⏱  {size} fixed routes...", file=sys.stderr)
+        results.extend(run_size(size, args))
+
+    print()
+    print_table(results)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump([asdict(r) for r in results], f, indent=2)
+        print(f"\n✓ Results written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,20 @@
 
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from app.main import app
+from app.database import Base, get_async_db
+from app.models import db_models  # Ensure models are registered on Base
+from app.services.init_db import init_pricing_data, init_vehicle_data
+from app.services.pricing_snapshot import pricing_snapshot_store
+from app.services.quote_cache import quote_cache
+from app.services.distance_cache import distance_cache
+from app.services.place_index import place_index
+from app.utils import http_client
+from app.utils.maps_stub import StubMapsHandler, stub_maps_transport
 
 
 @pytest.fixture
@@ -20,3 +33,111 @@ def sample_coordinates():
         "destination_lat": 40.9829,
         "destination_lng": 29.0208
     }
+
+
+@pytest.fixture
+def sqlite_path(tmp_path):
+    """SQLite database file shared by the sync and async test engines"""
+    return tmp_path / "shuttleport_test.db"
+
+
+@pytest.fixture
+def sqlite_engine(sqlite_path):
+    """SQLite engine with all tables created"""
+    engine = create_engine(
+        f"sqlite:///{sqlite_path}",
+        connect_args={"check_same_thread": False},
+        poolclass=NullPool
+    )
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def async_sqlite_engine(sqlite_engine, sqlite_path):
+    """aiosqlite engine on the same database file"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{sqlite_path}", poolclass=NullPool)
+    yield engine
+    engine.sync_engine.dispose()
+
+
+@pytest.fixture
+def distance_cache_db(async_sqlite_engine, monkeypatch):
+    """Empty distance cache backed by the test database"""
+    monkeypatch.setattr(distance_cache, "session_factory",
+                        async_sessionmaker(async_sqlite_engine, expire_on_commit=False))
+    distance_cache.memory.clear()
+    yield distance_cache
+    distance_cache.memory.clear()
+
+
+@pytest.fixture
+def maps_stub(distance_cache_db, monkeypatch):
+    """Route the shared HTTP client to the offline Google Maps stub"""
+    handler = StubMapsHandler()
+    monkeypatch.setattr(http_client, "_client", http_client.create_http_client(stub_maps_transport(handler)))
+    place_index.clear_learned()
+    yield handler
+    place_index.clear_learned()
+
+
+@pytest.fixture
+def session_factory(sqlite_engine):
+    """Session factory for the test database, seeded with default pricing data"""
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=sqlite_engine)
+    db = factory()
+    try:
+        init_pricing_data(db)
+        init_vehicle_data(db)
+    finally:
+        db.close()
+    return factory
+
+
+@pytest.fixture
+def add_fixed_route(session_factory):
+    """
+    Insert fixed route prices and drop the pricing snapshot
+
+    Usage: add_fixed_route(origin, destination, {"vito": 2000}, discounts={"vito": 5})
+    """
+    def add(origin, destination, prices, discounts=None):
+        db = session_factory()
+        try:
+            vehicle_ids = {v.vehicle_type: v.id for v in db.query(db_models.Vehicle).all()}
+            for vehicle_type, price in prices.items():
+                db.add(db_models.FixedRoute(
+                    origin=origin, destination=destination, vehicle_id=vehicle_ids[vehicle_type],
+                    price=price, discount_percent=(discounts or {}).get(vehicle_type, 0)
+                ))
+            db.commit()
+        finally:
+            db.close()
+        pricing_snapshot_store.clear()
+
+    return add
+
+
+@pytest.fixture
+def snapshot_db(session_factory, async_sqlite_engine, monkeypatch):
+    """Point the pricing snapshot and the async session dependency at the test database"""
+    from main import app as main_app
+    from app.api.pricing import catalog_bodies
+
+    async_session_factory = async_sessionmaker(async_sqlite_engine, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with async_session_factory() as db:
+            yield db
+
+    monkeypatch.setattr(pricing_snapshot_store, "session_factory", session_factory)
+    main_app.dependency_overrides[get_async_db] = override_get_async_db
+    pricing_snapshot_store.clear()
+    quote_cache.clear()
+    catalog_bodies.clear()
+    yield session_factory
+    pricing_snapshot_store.clear()
+    quote_cache.clear()
+    catalog_bodies.clear()
+    main_app.dependency_overrides.pop(get_async_db, None)
@@ -0,0 +1,55 @@
+"""
+Tests for the async data-access path
+"""
+import asyncio
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from main import app
+from app.database import to_async_database_url
+from app.models.db_models import FixedRoute, Vehicle
+
+client = TestClient(app)
+
+
+def test_to_async_database_url():
+    """Sync driver URLs map to their asyncio drivers"""
+    assert to_async_database_url("postgresql://u:p@db:5432/x") == "postgresql+asyncpg://u:p@db:5432/x"
+    assert to_async_database_url("postgresql+psycopg2://u:p@db/x") == "postgresql+asyncpg://u:p@db/x"
+    assert to_async_database_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+    assert to_async_database_url("mysql+aiomysql://u@db/x") == "mysql+aiomysql://u@db/x"
+
+
+def test_async_session_reads_seeded_data(session_factory, async_sqlite_engine):
+    """AsyncSession on aiosqlite sees the data written through the sync session"""
+    async_session_factory = async_sessionmaker(async_sqlite_engine)
+
+    async def load_vehicle_types():
+        async with async_session_factory() as db:
+            result = await db.execute(select(Vehicle.vehicle_type).order_by(Vehicle.id))
+            return result.scalars().all()
+
+    assert asyncio.run(load_vehicle_types()) == ["vito", "vito_vip", "sprinter", "luxury_sedan"]
+
+
+def test_fixed_routes_endpoint_uses_async_session(snapshot_db):
+    """Fixed routes are listed with discounts applied"""
+    db = snapshot_db()
+    try:
+        vehicles = {v.vehicle_type: v for v in db.query(Vehicle).all()}
+        db.add(FixedRoute(origin="taksim", destination="kadıköy", vehicle_id=vehicles["vito"].id,
+                          price=2000, discount_percent=10))
+        db.add(FixedRoute(origin="taksim", destination="kadıköy", vehicle_id=vehicles["vito_vip"].id,
+                          price=2500))
+        db.add(FixedRoute(origin="taksim", destination="şişli", vehicle_id=vehicles["vito"].id,
+                          price=900, active=False))
+        db.commit()
+    finally:
+        db.close()
+
+    response = client.get("/api/pricing/fixed-routes")
+
+    assert response.status_code == 200
+    assert response.json() == {"routes": [
+        {"origin": "Taksim", "destination": "Kadıköy", "prices": {"vito": 1800.0, "vito_vip": 2500.0}}
+    ]}
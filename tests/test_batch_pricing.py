@@ -0,0 +1,67 @@
+"""
+Tests for the batch pricing endpoint
+"""
+import random
+from fastapi.testclient import TestClient
+from main import app
+
+client = TestClient(app)
+
+
+def make_itinerary(rnd, **overrides):
+    """Random itinerary payload"""
+    payload = {
+        "origin_lat": 41.2753,
+        "origin_lng": 28.7519,
+        "origin_name": rnd.choice(["İstanbul Havalimanı (IST)", "Istanbul Airport", "Kadıköy", "Şişli"]),
+        "destination_lat": 41.0054,
+        "destination_lng": 28.9768,
+        "destination_name": rnd.choice(["Sultanahmet", "Taksim", "Beşiktaş", "Kadikoy"]),
+        "distance_km": round(rnd.uniform(1, 120), 1),
+        "duration_minutes": rnd.randint(5, 150),
+        "passenger_count": rnd.randint(1, 18),
+        "is_round_trip": rnd.random() < 0.5,
+        "is_airport_transfer": rnd.random() < 0.5,
+    }
+    payload.update(overrides)
+    return payload
+
+
+def test_batch_matches_single_quotes(snapshot_db, add_fixed_route):
+    """Every batch result equals the single-quote endpoint's response"""
+    # IST -> Sultanahmet fixed prices with a discount on Vito
+    add_fixed_route("İstanbul Havalimanı (IST)", "Sultanahmet (Fatih)",
+                    {"vito": 2100, "sprinter": 3100}, discounts={"vito": 5})
+    rnd = random.Random(7)
+    itineraries = [make_itinerary(rnd) for _ in range(60)]
+
+    response = client.post("/api/pricing/calculate-batch", json=itineraries)
+    assert response.status_code == 200
+    results = response.json()["results"]
+
+    assert [item["index"] for item in results] == list(range(len(itineraries)))
+    for itinerary, item in zip(itineraries, results):
+        single = client.post("/api/pricing/calculate", json=itinerary)
+        if single.status_code == 200:
+            assert item["error"] is None
+            assert item["result"] == single.json()
+        else:
+            assert item["result"] is None
+            assert item["error"] == single.json()["detail"]
+
+
+def test_batch_reports_per_item_errors(snapshot_db):
+    """An itinerary without a suitable vehicle doesn't fail the others"""
+    rnd = random.Random(1)
+    itineraries = [make_itinerary(rnd, passenger_count=2), make_itinerary(rnd, passenger_count=50)]
+
+    results = client.post("/api/pricing/calculate-batch", json=itineraries).json()["results"]
+
+    assert results[0]["result"] is not None
+    assert results[1]["result"] is None
+    assert "50" in results[1]["error"]
+
+
+def test_batch_rejects_empty_list(snapshot_db):
+    """An empty batch is a client error"""
+    assert client.post("/api/pricing/calculate-batch", json=[]).status_code == 400
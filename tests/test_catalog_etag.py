@@ -0,0 +1,76 @@
+"""
+Tests for ETag / conditional GET on the catalog endpoints
+"""
+import gzip
+import json
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from app.models.db_models import Vehicle
+from app.services.pricing_snapshot import pricing_snapshot_store
+from app.utils.http_cache import build_cached_body, _accepted_encodings
+
+client = TestClient(app)
+
+CATALOG_PATHS = ["/api/pricing/vehicles", "/api/pricing/fixed-routes"]
+
+
+@pytest.mark.parametrize("path", CATALOG_PATHS)
+def test_matching_etag_returns_304(snapshot_db, path):
+    first = client.get(path)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    second = client.get(path, headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["etag"] == etag
+
+    weak = client.get(path, headers={"If-None-Match": f'"other", W/{etag}'})
+    assert weak.status_code == 304
+
+
+@pytest.mark.parametrize("path", CATALOG_PATHS)
+def test_gzip_body_matches_identity(snapshot_db, path):
+    identity = client.get(path, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+
+    # Decode by hand to check the raw precompressed bytes
+    with client.stream("GET", path, headers={"Accept-Encoding": "gzip"}) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        raw = b"".join(response.iter_raw())
+    assert json.loads(gzip.decompress(raw)) == identity.json()
+
+
+def test_vehicles_body_unchanged(snapshot_db):
+    vehicles = client.get("/api/pricing/vehicles").json()
+    snapshot = pricing_snapshot_store.get()
+    assert vehicles == [v.model_dump(mode="json") for v in snapshot.vehicles.values()]
+
+
+def test_etag_changes_with_pricing_data(snapshot_db):
+    etag = client.get("/api/pricing/vehicles").headers["etag"]
+
+    db = snapshot_db()
+    try:
+        db.query(Vehicle).filter(Vehicle.vehicle_type == "vito").update({"name_en": "Mercedes Vito Tourer"})
+        db.commit()
+    finally:
+        db.close()
+    pricing_snapshot_store.bump_version()
+    pricing_snapshot_store.refresh()
+
+    response = client.get("/api/pricing/vehicles", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert "Mercedes Vito Tourer" in {v["name"] for v in response.json()}
+
+
+def test_etag_is_content_hash():
+    assert build_cached_body({"a": 1}).etag == build_cached_body({"a": 1}).etag
+    assert build_cached_body({"a": 1}).etag != build_cached_body({"a": 2}).etag
+
+
+def test_accept_encoding_quality_values():
+    assert _accepted_encodings("gzip;q=0, br") == {"gzip": 0.0, "br": 1.0}
+    assert _accepted_encodings("") == {}
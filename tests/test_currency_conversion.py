@@ -0,0 +1,136 @@
+"""
+Tests for server-side currency conversion of quotes
+"""
+import time
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from app.api import exchange_rates
+from app.api.exchange_rates import ExchangeRateStore
+from app.models.db_models import PricingConfig
+from app.models.pricing import PricingRequest, PricingRules, VehiclePricing, VehicleType
+from app.services.currency_conversion import UnsupportedCurrencyError, convert_responses
+from app.services.pricing_snapshot import pricing_snapshot_store
+from app.services.quote_cache import build_pricing_response
+
+client = TestClient(app)
+
+RATES = {"TRY": 1.0, "EUR": 0.0287, "USD": 0.0311, "GBP": 0.0246}
+
+ITINERARY = {
+    "origin_lat": 41.2753,
+    "origin_lng": 28.7519,
+    "origin_name": "İstanbul Havalimanı (IST)",
+    "destination_lat": 41.0054,
+    "destination_lng": 28.9768,
+    "destination_name": "Sultanahmet (Fatih)",
+    "distance_km": 45.2,
+    "duration_minutes": 50,
+    "passenger_count": 2,
+    "is_airport_transfer": True,
+}
+
+
+@pytest.fixture
+def rate_store(monkeypatch, tmp_path):
+    store = ExchangeRateStore(cache_file=str(tmp_path / "rates.json"))
+    store.rates, store.fetched_at, store.source = dict(RATES), time.time(), "live"
+    monkeypatch.setattr(exchange_rates, "exchange_rate_store", store)
+    return store
+
+
+def priced_response(final_price):
+    vehicle = VehiclePricing(
+        vehicle_type=VehicleType.VITO, vehicle_name="Vito", vehicle_name_tr="Vito", capacity=6,
+        base_price=50, distance_price=final_price - 150, airport_fee=100, subtotal=final_price,
+        round_trip_discount=0, final_price=final_price,
+        price_breakdown={
+            "base_fare": 50, "distance_charge": final_price - 150, "airport_fee": 100,
+            "subtotal": final_price, "discount": 0, "minimum_applied": 0, "final": final_price
+        }
+    )
+    request = PricingRequest(**ITINERARY)
+    return build_pricing_response(request, [vehicle], False)
+
+
+def test_converts_every_field_with_rounding_steps():
+    rules = PricingRules(currency_rounding={"USD": 1.0, "EUR": 0.5})
+    original = priced_response(1732.0)
+    converted = convert_responses([original], [["eur", "USD", "GBP"]], RATES, rules)[0]
+
+    prices = converted.vehicles[0].converted_prices
+    assert list(prices) == ["EUR", "USD", "GBP"]
+    assert prices["EUR"].final_price == 49.5      # 49.71 -> 0.5 adım
+    assert prices["USD"].final_price == 54.0      # 53.87 -> tam sayı
+    assert prices["GBP"].final_price == 42.61     # varsayılan 0.01
+    assert prices["GBP"].price_breakdown["airport_fee"] == 2.46
+    assert prices["EUR"].rate == RATES["EUR"]
+    # Önbellekteki nesne değişmez
+    assert original.vehicles[0].converted_prices == {}
+
+
+def test_only_requested_currencies_per_response():
+    responses = [priced_response(1000.0), priced_response(2000.0), priced_response(3000.0)]
+    converted = convert_responses(responses, [["EUR"], [], ["USD", "EUR"]], RATES, PricingRules())
+
+    assert list(converted[0].vehicles[0].converted_prices) == ["EUR"]
+    assert converted[1] is responses[1]
+    assert converted[2].vehicles[0].converted_prices["EUR"].final_price == 86.1
+
+
+def test_unknown_currency_is_rejected():
+    with pytest.raises(UnsupportedCurrencyError):
+        convert_responses([priced_response(1000.0)], [["JPY"]], RATES, PricingRules())
+
+
+def test_calculate_endpoint_returns_converted_prices(snapshot_db, rate_store):
+    db = snapshot_db()
+    try:
+        db.add(PricingConfig(config_key="currency_rounding_eur", config_value=1, description="EUR tam sayı"))
+        db.commit()
+    finally:
+        db.close()
+    pricing_snapshot_store.clear()
+
+    plain = client.post("/api/pricing/calculate", json=ITINERARY).json()
+    data = client.post("/api/pricing/calculate", json={**ITINERARY, "currencies": ["EUR", "USD"]}).json()
+
+    assert data["route_info"]["exchange_rates_updated"] is not None
+    for vehicle, base in zip(data["vehicles"], plain["vehicles"]):
+        assert vehicle["final_price"] == base["final_price"]
+        assert base["converted_prices"] == {}
+        assert vehicle["converted_prices"]["EUR"]["final_price"] == round(base["final_price"] * RATES["EUR"], 0)
+        assert vehicle["converted_prices"]["USD"]["final_price"] == pytest.approx(base["final_price"] * RATES["USD"], abs=0.01)
+
+
+def test_unknown_currency_returns_400(snapshot_db, rate_store):
+    response = client.post("/api/pricing/calculate", json={**ITINERARY, "currencies": ["XYZ"]})
+    assert response.status_code == 400
+    assert "XYZ" in response.json()["detail"]
+
+
+def test_batch_converts_in_one_pass(snapshot_db, rate_store):
+    response = client.post("/api/pricing/calculate-batch", json=[
+        {**ITINERARY, "currencies": ["EUR"]},
+        ITINERARY,
+        {**ITINERARY, "passenger_count": 99, "currencies": ["EUR"]},
+    ])
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert all("EUR" in v["converted_prices"] for v in results[0]["result"]["vehicles"])
+    assert all(v["converted_prices"] == {} for v in results[1]["result"]["vehicles"])
+    assert results[2]["error"] is not None
+
+
+def test_batch_unknown_currency_fails_only_its_item(snapshot_db, rate_store):
+    response = client.post("/api/pricing/calculate-batch", json=[
+        {**ITINERARY, "currencies": ["EUR"]},
+        {**ITINERARY, "currencies": ["usd", "XYZ"]},
+        ITINERARY,
+    ])
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert all("EUR" in v["converted_prices"] for v in results[0]["result"]["vehicles"])
+    assert results[1]["result"] is None
+    assert "XYZ" in results[1]["error"] and "USD" not in results[1]["error"]
+    assert results[2]["error"] is None and results[2]["result"] is not None
@@ -4,7 +4,7 @@ Tests for DataManager Excel operations
 import pytest
 import os
 import pandas as pd
-from app.services.data_manager import DataManager
+from app.services.data_manager import DataManager, RouteTable
 
 
 def test_ensure_file_exists(tmp_path):
@@ -68,3 +68,100 @@ def test_route_data_structure():
         # Metadata fields
         assert isinstance(route.get("active", True), bool)
         assert isinstance(route.get("discount", 0), (int, float))
+
+
+def write_sheet(path, rows):
+    columns = ["ID", "Origin", "Destination", "Price_Sedan", "Price_Vito", "Price_VitoVIP",
+               "Price_Sprinter", "Active", "Discount", "Comp_Price", "Notes"]
+    pd.DataFrame(rows, columns=columns).to_excel(path, index=False)
+
+
+SHEET_ROWS = [
+    [1, " Istanbul Airport ", "Taksim", 1500, 1200, None, 2000, True, 5, 1300, "Not"],
+    [2, "Taksim", None, 1500, 1200, None, None, True, 0, None, None],
+    [None, "Kadıköy", "Sabiha Gökçen", None, 900, 1100, None, False, None, None, None],
+    [4, "Beşiktaş", "Sultanahmet", "n/a", 700, None, None, None, 10, None, 42],
+]
+
+
+def legacy_rows(path):
+    """load_routes() as it was before the columnar loader (row by row)"""
+    df = pd.read_excel(path)
+    routes = []
+    for _, row in df.iterrows():
+        if pd.notna(row["Origin"]) and pd.notna(row["Destination"]):
+            optional = lambda col: float(pd.to_numeric(row[col], errors="coerce")) if pd.notna(pd.to_numeric(row[col], errors="coerce")) else None
+            routes.append({
+                "id": int(row["ID"]) if pd.notna(row["ID"]) else None,
+                "origin": str(row["Origin"]).strip(),
+                "destination": str(row["Destination"]).strip(),
+                "price_vito": float(row["Price_Vito"]),
+                "price_sedan": optional("Price_Sedan"),
+                "price_sprinter": optional("Price_Sprinter"),
+                "price_vitovip": optional("Price_VitoVIP"),
+                "active": bool(row["Active"]) if pd.notna(row["Active"]) else True,
+                "discount": float(row["Discount"]) if pd.notna(row["Discount"]) else 0,
+                "comp_price": float(row["Comp_Price"]) if pd.notna(row["Comp_Price"]) else None,
+                "notes": str(row["Notes"]) if pd.notna(row["Notes"]) else ""
+            })
+    return routes
+
+
+def test_columnar_loader_matches_row_by_row(tmp_path, monkeypatch):
+    path = tmp_path / "routes.xlsx"
+    write_sheet(path, SHEET_ROWS)
+    monkeypatch.setattr('app.services.data_manager.FILE_PATH', str(path))
+
+    routes = DataManager.load_routes()
+    assert routes == legacy_rows(path)
+    assert [r["origin"] for r in routes] == ["Istanbul Airport", "Kadıköy", "Beşiktaş"]
+    # Sayı olmayan fiyat hücresi boş sayılır
+    assert routes[2]["price_sedan"] is None
+
+
+def test_streaming_batches_match_bulk_load(tmp_path, monkeypatch):
+    path = tmp_path / "routes.xlsx"
+    write_sheet(path, SHEET_ROWS * 5)
+    monkeypatch.setattr('app.services.data_manager.FILE_PATH', str(path))
+
+    batches = list(DataManager.iter_route_batches(batch_size=4))
+    assert len(batches) == 5
+    assert all(len(batch) == 3 for batch in batches)
+    streamed = RouteTable.concat(batches)
+    assert streamed.rows() == DataManager.load_route_table().rows()
+
+
+def test_sheet_without_vito_column_is_ignored(tmp_path, monkeypatch):
+    path = tmp_path / "routes.xlsx"
+    pd.DataFrame({"Origin": ["A"], "Destination": ["B"]}).to_excel(path, index=False)
+    monkeypatch.setattr('app.services.data_manager.FILE_PATH', str(path))
+
+    assert DataManager.load_routes() == []
+    assert list(DataManager.iter_route_batches()) == []
+
+
+def test_init_routes_data_reads_batches(tmp_path, monkeypatch, session_factory):
+    from app.models.db_models import FixedRoute
+    from app.services.init_db import init_routes_data
+
+    path = tmp_path / "routes.xlsx"
+    write_sheet(path, SHEET_ROWS)
+    monkeypatch.setattr('app.services.data_manager.FILE_PATH', str(path))
+    monkeypatch.setattr('app.services.data_manager.ROUTE_BATCH_SIZE', 2)
+
+    db = session_factory()
+    try:
+        init_routes_data(db)
+        routes = db.query(FixedRoute).order_by(FixedRoute.id).all()
+        pairs = {(r.origin, r.destination, r.vehicle.vehicle_type, r.price) for r in routes}
+    finally:
+        db.close()
+
+    assert pairs == {
+        ("Istanbul Airport", "Taksim", "luxury_sedan", 1500),
+        ("Istanbul Airport", "Taksim", "vito", 1200),
+        ("Istanbul Airport", "Taksim", "sprinter", 2000),
+        ("Kadıköy", "Sabiha Gökçen", "vito", 900),
+        ("Kadıköy", "Sabiha Gökçen", "vito_vip", 1100),
+        ("Beşiktaş", "Sultanahmet", "vito", 700),
+    }
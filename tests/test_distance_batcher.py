@@ -0,0 +1,116 @@
+"""
+Tests for Distance Matrix micro-batching
+"""
+import asyncio
+import httpx
+from app.core.exceptions import GoogleMapsAPIError
+from app.utils import http_client
+from app.utils.distance_batcher import DistanceMatrixBatcher, _Pending
+from app.utils.google_maps import GoogleMapsClient
+
+AIRPORT = (41.2753, 28.7519)
+
+
+def batched_client():
+    maps = GoogleMapsClient(api_key="test")
+    # Wide enough for every caller to finish its (SQLite) cache lookup first
+    maps._batcher.window_seconds = 0.2
+    return maps
+
+
+def hotels(count):
+    return [(41.0 + i * 0.01, 28.9 + i * 0.005) for i in range(count)]
+
+
+def test_concurrent_requests_share_one_call(maps_stub):
+    maps = batched_client()
+
+    async def run():
+        return await asyncio.gather(*(
+            maps.calculate_distance_matrix(lat, lng, *AIRPORT) for lat, lng in hotels(20)
+        ))
+
+    results = asyncio.run(run())
+    assert len(maps_stub.requests) == 1
+    assert maps_stub.requests[0].url.params["origins"].count("|") == 19
+    assert maps._batcher.stats()["elements"] == 20
+
+    # Same numbers as one call per pair
+    unbatched = GoogleMapsClient(api_key="test")
+    unbatched._batcher = None
+    for (lat, lng), result in zip(hotels(20), results):
+        maps_stub.requests.clear()
+        distance = asyncio.run(unbatched._fetch_distance_matrix([f"{lat},{lng}"], [f"{AIRPORT[0]},{AIRPORT[1]}"]))
+        assert distance["rows"][0]["elements"][0]["distance"]["value"] == result["distance_meters"]
+
+
+def test_api_limits_are_respected(maps_stub):
+    maps = batched_client()
+
+    async def run():
+        await asyncio.gather(*(maps.calculate_distance_matrix(lat, lng, *AIRPORT) for lat, lng in hotels(30)))
+
+    asyncio.run(run())
+    origin_counts = sorted(r.url.params["origins"].count("|") + 1 for r in maps_stub.requests)
+    assert origin_counts == [5, 25]
+
+
+def test_unrelated_pairs_bound_element_waste():
+    batcher = DistanceMatrixBatcher(fetch=None, max_waste=2.0)
+    items = [_Pending(f"o{i}", f"d{i}", None) for i in range(8)]
+    for batch in batcher.partition(items):
+        origins = {item.origin for item in batch}
+        destinations = {item.destination for item in batch}
+        assert len(origins) * len(destinations) <= 2 * len(batch)
+
+
+def test_element_status_is_per_caller(distance_cache_db, monkeypatch):
+    def handler(request):
+        origins = request.url.params["origins"].split("|")
+        return httpx.Response(200, json={
+            "status": "OK",
+            "origin_addresses": origins,
+            "destination_addresses": ["airport"],
+            "rows": [
+                {"elements": [{"status": "ZERO_RESULTS"}]} if origin.startswith("0.0") else
+                {"elements": [{"status": "OK", "distance": {"value": 1000, "text": "1 km"},
+                               "duration": {"value": 60, "text": "1 dk"}}]}
+                for origin in origins
+            ]
+        })
+
+    monkeypatch.setattr(http_client, "_client", http_client.create_http_client(httpx.MockTransport(handler)))
+    maps = batched_client()
+
+    async def run():
+        return await asyncio.gather(
+            maps.calculate_distance_matrix(0.0, 0.0, *AIRPORT),
+            maps.calculate_distance_matrix(41.0, 29.0, *AIRPORT),
+            return_exceptions=True
+        )
+
+    failed, ok = asyncio.run(run())
+    assert isinstance(failed, GoogleMapsAPIError)
+    assert failed.details["status"] == "ZERO_RESULTS"
+    assert ok["distance_meters"] == 1000
+
+
+def test_call_failure_reaches_every_caller(distance_cache_db, monkeypatch):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json={"status": "OVER_QUERY_LIMIT"})
+
+    monkeypatch.setattr(http_client, "_client", http_client.create_http_client(httpx.MockTransport(handler)))
+    maps = batched_client()
+
+    async def run():
+        return await asyncio.gather(
+            *(maps.calculate_distance_matrix(lat, lng, *AIRPORT) for lat, lng in hotels(3)),
+            return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(isinstance(r, GoogleMapsAPIError) and r.details["status"] == "OVER_QUERY_LIMIT" for r in results)
@@ -0,0 +1,82 @@
+"""
+Tests for the two-tier Distance Matrix cache
+"""
+import asyncio
+from fastapi.testclient import TestClient
+from main import app
+
+client = TestClient(app)
+
+HOTEL_TO_AIRPORT = {
+    "origin_lat": 41.036912,
+    "origin_lng": 28.985127,
+    "destination_lat": 41.275312,
+    "destination_lng": 28.751904
+}
+
+
+def test_nearby_coordinates_share_one_api_call(maps_stub, distance_cache_db):
+    first = client.post("/api/calculate-distance", json=HOTEL_TO_AIRPORT)
+    # Same hotel entrance, a few metres away
+    nearby = client.post("/api/calculate-distance",
+                         json={**HOTEL_TO_AIRPORT, "origin_lat": 41.037088, "origin_lng": 28.984911})
+
+    assert first.status_code == nearby.status_code == 200
+    assert nearby.json() == first.json()
+    assert len(maps_stub.requests) == 1
+    assert distance_cache_db.stats()["memory"]["hits"] == 1
+
+
+def test_results_survive_restart(maps_stub, distance_cache_db):
+    first = client.post("/api/calculate-distance", json=HOTEL_TO_AIRPORT).json()
+
+    # New worker: empty memory tier, same table
+    distance_cache_db.memory.clear()
+    second = client.post("/api/calculate-distance", json=HOTEL_TO_AIRPORT).json()
+
+    assert second == first
+    assert len(maps_stub.requests) == 1
+    assert distance_cache_db.db_hits == 1
+
+
+def test_expired_rows_are_ignored(maps_stub, distance_cache_db, monkeypatch):
+    monkeypatch.setattr(distance_cache_db, "ttl_seconds", -1)
+    client.post("/api/calculate-distance", json=HOTEL_TO_AIRPORT)
+    distance_cache_db.memory.clear()
+    client.post("/api/calculate-distance", json=HOTEL_TO_AIRPORT)
+    assert len(maps_stub.requests) == 2
+
+
+def test_prune_enforces_size_bound(distance_cache_db, monkeypatch):
+    monkeypatch.setattr(distance_cache_db, "max_rows", 2)
+    result = {
+        "distance_meters": 1000, "distance_text": "1 km", "duration_seconds": 60,
+        "duration_text": "1 dk", "origin_address": "a", "destination_address": "b"
+    }
+
+    async def run():
+        for i in range(5):
+            await distance_cache_db.set(distance_cache_db.make_key(41 + i, 29, 41, 29), result)
+        removed = await distance_cache_db.prune()
+        return removed, await distance_cache_db.row_count()
+
+    assert asyncio.run(run()) == (3, 2)
+
+
+def test_admin_purge(maps_stub, distance_cache_db):
+    client.post("/api/calculate-distance", json=HOTEL_TO_AIRPORT)
+    stats = client.get("/api/admin/distance-cache").json()
+    assert stats["rows"] == 1
+    assert stats["writes"] >= 1
+
+    response = client.post("/api/admin/distance-cache/purge")
+    assert response.json() == {"purged_rows": 1}
+    assert client.get("/api/admin/distance-cache").json()["rows"] == 0
+
+    client.post("/api/calculate-distance", json=HOTEL_TO_AIRPORT)
+    assert len(maps_stub.requests) == 2
+
+
+def test_key_includes_precision(distance_cache_db):
+    key = distance_cache_db.make_key(41.0369, 28.9851, 41.2753, 28.7519)
+    assert key == "3:41.037,28.985|41.275,28.752"
@@ -0,0 +1,133 @@
+"""
+Tests for the offline road-distance estimator
+"""
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from app.core.exceptions import GoogleMapsAPIError
+from app.services import distance_estimator as estimator_module
+from app.services.distance_estimator import DistanceEstimator, calculate_distance, haversine_km
+from app.utils.google_maps import GoogleMapsClient
+
+client = TestClient(app)
+
+AIRPORT = (41.2753, 28.7519)
+SULTANAHMET = (41.0054, 28.9768)
+KADIKOY = (40.9909, 29.0303)
+
+ITINERARY = {
+    "origin_lat": AIRPORT[0],
+    "origin_lng": AIRPORT[1],
+    "origin_name": "İstanbul Havalimanı (IST)",
+    "destination_lat": SULTANAHMET[0],
+    "destination_lng": SULTANAHMET[1],
+    "destination_name": "Sultanahmet (Fatih)",
+    "passenger_count": 2,
+    "is_airport_transfer": True,
+}
+
+
+@pytest.fixture
+def estimator(monkeypatch):
+    fresh = DistanceEstimator()
+    monkeypatch.setattr(estimator_module, "distance_estimator", fresh)
+    return fresh
+
+
+def test_untrained_estimate_uses_default_factor():
+    estimator = DistanceEstimator(default_factor=1.4, default_speed_kmh=40)
+    result = estimator.estimate(*AIRPORT, *SULTANAHMET)
+    straight = haversine_km(*AIRPORT, *SULTANAHMET)
+    assert result["distance_meters"] == round(straight * 1.4 * 1000)
+    assert result["estimated"] is True
+    assert result["samples"] == 0
+    assert result["duration_text"].endswith("dk")
+
+
+def test_learns_detour_per_zone_pair():
+    estimator = DistanceEstimator(prior_weight=1)
+    straight = haversine_km(*SULTANAHMET, *KADIKOY)
+    # Crossing the Bosphorus: twice the straight line
+    for _ in range(20):
+        estimator.observe(*SULTANAHMET, *KADIKOY, straight * 2000, 1200)
+
+    # Airport motorway: almost straight
+    straight = haversine_km(*AIRPORT, 41.10, 28.60)
+    for _ in range(20):
+        estimator.observe(*AIRPORT, 41.10, 28.60, straight * 1200, 1200)
+
+    crossing = estimator.estimate(*KADIKOY, *SULTANAHMET)
+    assert crossing["samples"] == 20
+    assert crossing["detour_factor"] == pytest.approx(2.0, abs=0.05)
+    assert estimator.estimate(41.10, 28.60, *AIRPORT)["detour_factor"] == pytest.approx(1.2, abs=0.05)
+
+
+def test_discards_noise():
+    estimator = DistanceEstimator()
+    assert not estimator.observe(41.0, 29.0, 41.0001, 29.0001, 5000, 300)
+    assert not estimator.observe(*AIRPORT, *SULTANAHMET, 1000, 600)
+    assert estimator.stats()["samples"] == 0
+
+
+def test_trains_from_distance_cache(maps_stub, distance_cache_db):
+    estimator = DistanceEstimator(prior_weight=1)
+    maps = GoogleMapsClient(api_key="test")
+    asyncio.run(maps.calculate_distance_matrix(*AIRPORT, *SULTANAHMET))
+
+    used = asyncio.run(estimator.train(distance_cache_db.session_factory))
+    assert used == 1
+    # The stub answers straight line x 1.3
+    assert estimator.estimate(*AIRPORT, *SULTANAHMET)["detour_factor"] == pytest.approx(1.3, abs=0.03)
+
+
+def test_auto_mode_falls_back_when_google_is_slow(monkeypatch, maps_stub, estimator):
+    maps_stub.latency_seconds = 0.5
+    maps = GoogleMapsClient(api_key="test")
+    result = asyncio.run(calculate_distance(maps, *AIRPORT, *SULTANAHMET, mode="auto", timeout=0.05))
+    assert result["estimated"] is True
+
+
+def test_auto_mode_keeps_route_errors():
+    class NoRoute:
+        async def calculate_distance_matrix(self, *args):
+            raise GoogleMapsAPIError("Route not found", details={"status": "ZERO_RESULTS", "element": {}})
+
+    class Down:
+        async def calculate_distance_matrix(self, *args):
+            raise GoogleMapsAPIError("Failed to connect")
+
+    with pytest.raises(GoogleMapsAPIError):
+        asyncio.run(calculate_distance(NoRoute(), *AIRPORT, *SULTANAHMET, mode="auto"))
+    assert asyncio.run(calculate_distance(Down(), *AIRPORT, *SULTANAHMET, mode="auto"))["estimated"]
+
+
+def test_distance_endpoint_estimate_mode(maps_stub):
+    response = client.post("/api/calculate-distance", json={
+        "origin_lat": AIRPORT[0], "origin_lng": AIRPORT[1],
+        "destination_lat": SULTANAHMET[0], "destination_lng": SULTANAHMET[1],
+        "mode": "estimate"
+    })
+    assert response.status_code == 200
+    assert response.json()["is_estimate"] is True
+    assert maps_stub.requests == []
+
+
+def test_provisional_quote_without_distance(snapshot_db, estimator):
+    provisional = client.post("/api/pricing/calculate", json=ITINERARY)
+    assert provisional.status_code == 200
+    route_info = provisional.json()["route_info"]
+    assert route_info["distance_estimated"] is True
+    expected = estimator.estimate(*AIRPORT, *SULTANAHMET)
+    assert route_info["distance_km"] == round(expected["distance_meters"] / 1000, 1)
+
+    final = client.post("/api/pricing/calculate", json={**ITINERARY, "distance_km": 40.0, "duration_minutes": 45})
+    assert final.json()["route_info"]["distance_estimated"] is False
+
+
+def test_batch_fills_missing_distances(snapshot_db, estimator):
+    response = client.post("/api/pricing/calculate-batch", json=[
+        ITINERARY, {**ITINERARY, "distance_km": 40.0, "duration_minutes": 45}
+    ])
+    results = response.json()["results"]
+    assert [r["result"]["route_info"]["distance_estimated"] for r in results] == [True, False]
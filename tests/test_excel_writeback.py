@@ -0,0 +1,136 @@
+"""
+Tests for the debounced Excel write-back of admin route edits
+"""
+import asyncio
+import os
+import threading
+import pandas as pd
+import pytest
+from app.models.db_models import FixedRoute, Vehicle
+from app.services.data_manager import RouteTable
+from app.services.excel_writeback import ExcelWriteBack, export_routes
+from app.services.route_sync import sync_fixed_routes
+
+
+def counting_export():
+    calls = []
+
+    def export():
+        calls.append(threading.current_thread() is threading.main_thread())
+        return 0
+
+    return export, calls
+
+
+def test_burst_of_changes_is_written_once():
+    export, calls = counting_export()
+    writer = ExcelWriteBack(export=export, quiet_seconds=0.05, max_delay_seconds=5)
+
+    async def run():
+        for _ in range(30):
+            writer.schedule()
+            await asyncio.sleep(0.001)
+        assert calls == []  # hiçbir istek yazımı beklemez
+        await asyncio.sleep(0.2)
+
+    asyncio.run(run())
+    assert len(calls) == 1
+    # Export runs off the event loop thread
+    assert calls == [False]
+    assert writer.stats()["changes"] == 30 and writer.stats()["writes"] == 1
+    assert writer.stats()["pending"] is False
+
+
+def test_max_delay_bounds_continuous_edits():
+    export, calls = counting_export()
+    writer = ExcelWriteBack(export=export, quiet_seconds=0.05, max_delay_seconds=0.1)
+
+    async def run():
+        # Sessiz dönem hiç gelmiyor; en geç max_delay sonra yazılır
+        for _ in range(25):
+            writer.schedule()
+            await asyncio.sleep(0.01)
+        await writer.flush()
+
+    asyncio.run(run())
+    assert 2 <= len(calls) <= 4
+
+
+def test_flush_writes_pending_changes_immediately():
+    export, calls = counting_export()
+    writer = ExcelWriteBack(export=export, quiet_seconds=60, max_delay_seconds=600)
+
+    async def run():
+        writer.schedule()
+        await asyncio.wait_for(writer.flush(), timeout=1)
+
+    asyncio.run(run())
+    assert len(calls) == 1
+
+
+def test_failed_export_is_reported():
+    def export():
+        raise OSError("disk full")
+
+    writer = ExcelWriteBack(export=export, quiet_seconds=0, max_delay_seconds=0)
+
+    async def run():
+        writer.schedule()
+        await writer.flush()
+
+    asyncio.run(run())
+    assert writer.stats()["failures"] == 1
+    assert writer.stats()["last_error"] == "disk full"
+
+
+def test_export_round_trips_through_import(tmp_path, session_factory):
+    db = session_factory()
+    try:
+        vehicle_ids = {v.vehicle_type: v.id for v in db.query(Vehicle).all()}
+        rows = [
+            [1, "Istanbul Airport", "Taksim", 1500, 1200, 1800, 2000, True, 5, 1300, "Not"],
+            [2, "Sabiha Gökçen", "Kadıköy", None, 900, None, None, False, 0, None, None],
+        ]
+        columns = ["ID", "Origin", "Destination", "Price_Sedan", "Price_Vito", "Price_VitoVIP",
+                   "Price_Sprinter", "Active", "Discount", "Comp_Price", "Notes"]
+        sync_fixed_routes(db, [RouteTable.from_frame(pd.DataFrame(rows, columns=columns))], vehicle_ids)
+    finally:
+        db.close()
+
+    sheet_dir = tmp_path / "static"
+    path = str(sheet_dir / "routes.xlsx")
+    assert export_routes(path, session_factory=session_factory) == 2
+    # Geçici dosya kalmaz
+    assert os.listdir(sheet_dir) == ["routes.xlsx"]
+
+    sheet = pd.read_excel(path)
+    assert sheet["Origin"].tolist() == ["Istanbul Airport", "Sabiha Gökçen"]
+    assert sheet.loc[0, ["Price_Sedan", "Price_Vito", "Price_VitoVIP", "Price_Sprinter"]].tolist() == [1500, 1200, 1800, 2000]
+
+    # Re-importing the exported sheet changes nothing
+    db = session_factory()
+    try:
+        exported = RouteTable.from_frame(sheet)
+        result = sync_fixed_routes(db, [exported], vehicle_ids)
+        assert not result.changed
+        assert db.query(FixedRoute).count() == 5
+    finally:
+        db.close()
+
+
+def test_export_leaves_old_sheet_on_failure(tmp_path, session_factory, monkeypatch):
+    sheet_dir = tmp_path / "static"
+    sheet_dir.mkdir()
+    path = sheet_dir / "routes.xlsx"
+    path.write_bytes(b"old sheet")
+
+    def broken_write(path, rows):
+        with open(path, "wb") as f:
+            f.write(b"partial")
+        raise RuntimeError("write failed")
+
+    monkeypatch.setattr("app.services.excel_writeback.write_xlsx", broken_write)
+    with pytest.raises(RuntimeError):
+        export_routes(str(path), session_factory=session_factory)
+    assert path.read_bytes() == b"old sheet"
+    assert os.listdir(sheet_dir) == ["routes.xlsx"]
@@ -0,0 +1,123 @@
+"""
+Tests for the background exchange-rate refresher (stale-while-revalidate)
+"""
+import asyncio
+import json
+import time
+from fastapi.testclient import TestClient
+from main import app
+from app.api import exchange_rates
+from app.api.exchange_rates import ExchangeRateStore, FALLBACK_RATES
+
+LIVE_RATES = {"TRY": 1.0, "EUR": 0.027, "USD": 0.029, "GBP": 0.023}
+
+
+def fake_fetch(monkeypatch, rates=LIVE_RATES, fail=False, delay=0.0):
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        if fail:
+            raise ValueError("API returned unsuccessful result")
+        return dict(rates)
+
+    monkeypatch.setattr(exchange_rates, "_fetch_exchange_rates", fetch)
+    return calls
+
+
+def test_first_request_serves_fallback_without_waiting(monkeypatch, tmp_path):
+    calls = fake_fetch(monkeypatch, delay=0.05)
+    store = ExchangeRateStore(cache_file=str(tmp_path / "rates.json"))
+
+    async def run():
+        first = store.current()
+        await store._refresh_task
+        return first, store.current()
+
+    first, second = asyncio.run(run())
+    assert first["rates"] == FALLBACK_RATES
+    assert first["source"] == "fallback" and first["stale"] is True
+    assert second["rates"] == LIVE_RATES
+    assert second["source"] == "live" and second["stale"] is False
+    assert len(calls) == 1
+
+
+def test_stale_rates_are_served_while_refreshing(monkeypatch, tmp_path):
+    calls = fake_fetch(monkeypatch, rates={**LIVE_RATES, "EUR": 0.03}, delay=0.05)
+    store = ExchangeRateStore(cache_file=str(tmp_path / "rates.json"), ttl_seconds=60)
+    store.rates, store.fetched_at, store.source = dict(LIVE_RATES), time.time() - 120, "live"
+
+    async def run():
+        served = [store.current() for _ in range(3)]
+        await store._refresh_task
+        return served
+
+    served = asyncio.run(run())
+    assert all(body["rates"] == LIVE_RATES and body["stale"] for body in served)
+    assert len(calls) == 1
+    assert store.rates["EUR"] == 0.03
+
+
+def test_failed_refresh_keeps_last_known_good(monkeypatch, tmp_path):
+    fake_fetch(monkeypatch, fail=True)
+    store = ExchangeRateStore(cache_file=str(tmp_path / "rates.json"))
+    store.rates, store.fetched_at, store.source = dict(LIVE_RATES), time.time() - 7200, "live"
+
+    assert asyncio.run(store.refresh()) is False
+    assert store.rates == LIVE_RATES
+    assert store.stats()["failures"] == 1
+    assert "unsuccessful" in store.stats()["last_error"]
+
+
+def test_rates_survive_restart_via_disk(monkeypatch, tmp_path):
+    cache_file = str(tmp_path / "rates.json")
+    fake_fetch(monkeypatch)
+    assert asyncio.run(ExchangeRateStore(cache_file=cache_file).refresh()) is True
+    with open(cache_file, encoding="utf-8") as f:
+        assert json.load(f)["rates"] == LIVE_RATES
+
+    calls = fake_fetch(monkeypatch, fail=True)
+    restarted = ExchangeRateStore(cache_file=cache_file)
+
+    async def run():
+        return restarted.current()
+
+    body = asyncio.run(run())
+    assert body["rates"] == LIVE_RATES
+    assert body["source"] == "disk" and body["stale"] is False
+    assert calls == []
+
+
+def test_background_loop_refreshes_ahead_of_expiry(monkeypatch, tmp_path):
+    calls = fake_fetch(monkeypatch)
+    store = ExchangeRateStore(
+        cache_file=str(tmp_path / "rates.json"),
+        ttl_seconds=0.2,
+        refresh_ahead_seconds=0.15,
+        retry_seconds=0.01
+    )
+
+    async def run():
+        store.start()
+        await asyncio.sleep(0.2)
+        running = store.stats()["background_refresher"]
+        await store.stop()
+        return running
+
+    assert asyncio.run(run()) is True
+    # İlk yükleme + süre dolmadan en az bir yenileme
+    assert len(calls) >= 2
+    assert store.stats()["background_refresher"] is False
+
+
+def test_exchange_rates_endpoint_reads_store(monkeypatch, tmp_path):
+    store = ExchangeRateStore(cache_file=str(tmp_path / "rates.json"))
+    store.rates, store.fetched_at, store.source = dict(LIVE_RATES), time.time(), "live"
+    monkeypatch.setattr(exchange_rates, "exchange_rate_store", store)
+
+    response = TestClient(app).get("/api/exchange-rates")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["rates"] == LIVE_RATES
+    assert body["cached"] is True and body["stale"] is False
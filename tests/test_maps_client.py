@@ -0,0 +1,88 @@
+"""
+Tests for the shared Google Maps HTTP client
+"""
+import asyncio
+import httpx
+from fastapi.testclient import TestClient
+from main import app
+from app.utils import http_client
+from app.utils.google_maps import GoogleMapsClient
+
+client = TestClient(app)
+
+DISTANCE_PAYLOAD = {
+    "origin_lat": 41.2753,
+    "origin_lng": 28.7519,
+    "destination_lat": 41.0054,
+    "destination_lng": 28.9768
+}
+
+
+def test_calculate_distance_uses_shared_client(maps_stub):
+    shared = http_client.get_http_client()
+    for i in range(3):
+        response = client.post("/api/calculate-distance",
+                               json={**DISTANCE_PAYLOAD, "destination_lat": 41.0054 + i / 100})
+        assert response.status_code == 200
+
+    data = response.json()
+    assert 30 < data["distance_km"] < 60
+    assert data["origin_address"].startswith("Stub:")
+    assert len(maps_stub.requests) == 3
+    assert http_client.get_http_client() is shared
+
+
+def test_per_operation_timeouts(maps_stub):
+    client.post("/api/calculate-distance", json=DISTANCE_PAYLOAD)
+    client.post("/api/search-places", json={"query": "Pera Palace"})
+
+    distance_request, places_request = maps_stub.requests
+    assert distance_request.extensions["timeout"]["read"] == http_client.DISTANCE_MATRIX_TIMEOUT
+    assert places_request.extensions["timeout"]["read"] == http_client.PLACES_SEARCH_TIMEOUT
+    assert distance_request.extensions["timeout"]["connect"] == http_client.HTTP_CONNECT_TIMEOUT
+
+
+def test_search_places(maps_stub):
+    response = client.post("/api/search-places", json={"query": "pera palace", "location_lat": 41.0, "location_lng": 29.0})
+    assert response.status_code == 200
+    places = response.json()["places"]
+    assert places[0]["name"] == "Pera Palace"
+    assert maps_stub.requests[0].url.params["radius"] == "50000"
+
+
+def test_google_errors_map_to_400(distance_cache_db, monkeypatch):
+    def handler(request):
+        return httpx.Response(200, json={
+            "status": "OK",
+            "origin_addresses": ["a"],
+            "destination_addresses": ["b"],
+            "rows": [{"elements": [{"status": "ZERO_RESULTS"}]}]
+        })
+
+    monkeypatch.setattr(http_client, "_client", http_client.create_http_client(httpx.MockTransport(handler)))
+    response = client.post("/api/calculate-distance", json=DISTANCE_PAYLOAD)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Rota bulunamadı: ZERO_RESULTS"
+
+
+def test_connection_errors_map_to_502(distance_cache_db, monkeypatch):
+    def handler(request):
+        raise httpx.ConnectError("unreachable", request=request)
+
+    monkeypatch.setattr(http_client, "_client", http_client.create_http_client(httpx.MockTransport(handler)))
+    response = client.post("/api/search-places", json={"query": "Pera Palace"})
+    assert response.status_code == 502
+
+
+def test_lifespan_start_and_close(monkeypatch, maps_stub):
+    async def run():
+        started = await http_client.start_http_client(httpx.MockTransport(maps_stub))
+        assert http_client.get_http_client() is started
+        result = await GoogleMapsClient(api_key="test").calculate_distance_matrix(41.0, 28.9, 41.1, 29.0)
+        await http_client.close_http_client()
+        return started, result
+
+    started, result = asyncio.run(run())
+    assert started.is_closed
+    assert result["distance_meters"] > 0
+    assert http_client._client is None
@@ -0,0 +1,166 @@
+"""
+Tests for the Maps client circuit breaker, retries, hedging and deadline
+"""
+import asyncio
+import time
+import pytest
+from app.core.exceptions import GoogleMapsAPIError
+from app.utils import google_maps
+from app.utils.google_maps import GoogleMapsClient
+from app.utils.resilience import CircuitBreaker, RetryBudget, LatencyTracker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def maps(maps_stub, monkeypatch):
+    monkeypatch.setattr(google_maps, "MAPS_RETRY_BASE_DELAY", 0.001)
+    return GoogleMapsClient(api_key="test")
+
+
+def search(maps, query):
+    return asyncio.run(maps.search_places(query))
+
+
+def test_transient_failure_is_retried(maps, maps_stub):
+    maps_stub.fail_next = 1
+    assert search(maps, "Pera Palace")[0]["name"] == "Pera Palace"
+    assert len(maps_stub.requests) == 2
+    stats = maps.stats()["endpoints"]["search_places"]
+    assert stats["retries"] == 1
+    assert stats["failures"] == 1
+
+
+def test_client_errors_are_not_retried(maps, maps_stub):
+    maps_stub.fail_next, maps_stub.fail_status = 1, 403
+    with pytest.raises(GoogleMapsAPIError):
+        search(maps, "Pera Palace")
+    assert len(maps_stub.requests) == 1
+
+
+def test_retries_are_bounded(maps, maps_stub):
+    maps_stub.fail_next = 10
+    with pytest.raises(GoogleMapsAPIError, match="HTTP 503"):
+        search(maps, "Pera Palace")
+    assert len(maps_stub.requests) == google_maps.MAPS_RETRY_MAX + 1
+
+
+def test_breaker_fails_fast_and_recovers(maps, maps_stub, monkeypatch):
+    monkeypatch.setattr(google_maps, "MAPS_RETRY_MAX", 0)
+    clock = FakeClock()
+    breaker = CircuitBreaker("search_places", min_calls=4, window=4, open_seconds=30, clock=clock)
+    maps._endpoints["search_places"].breaker = breaker
+
+    maps_stub.fail_next = 4
+    for i in range(4):
+        with pytest.raises(GoogleMapsAPIError):
+            search(maps, f"hotel {i}")
+    assert breaker.state == "open"
+
+    with pytest.raises(GoogleMapsAPIError, match="circuit open"):
+        search(maps, "hotel 5")
+    assert len(maps_stub.requests) == 4
+    assert maps.stats()["endpoints"]["search_places"]["short_circuited"] == 1
+
+    # After the pause one trial call goes through and closes the circuit
+    clock.now = 31
+    assert breaker.state == "half_open"
+    assert search(maps, "hotel 6")
+    assert breaker.state == "closed"
+
+
+def test_slow_calls_open_the_breaker():
+    breaker = CircuitBreaker("test", slow_call_seconds=1.0, slow_call_rate=0.5, min_calls=4, window=4)
+    for elapsed in (0.1, 2.0, 2.0, 0.1):
+        token = breaker.allow()
+        breaker.record(token, failed=False, elapsed=elapsed)
+    assert breaker.state == "open"
+    assert breaker.allow() is None
+
+
+def test_calls_from_before_the_opening_are_ignored():
+    clock = FakeClock()
+    breaker = CircuitBreaker("test", min_calls=2, window=2, open_seconds=30, clock=clock)
+    straggler = breaker.allow()
+    for _ in range(2):
+        breaker.record(breaker.allow(), failed=True, elapsed=0.1)
+    assert breaker.state == "open"
+
+    clock.now = 31
+    trial = breaker.allow()
+    assert trial is not None and breaker.allow() is None
+    # Closed-state call finishing late neither closes the circuit nor frees the trial slot
+    breaker.record(straggler, failed=False, elapsed=0.1)
+    breaker.release(straggler)
+    assert breaker.state == "half_open"
+    assert breaker.allow() is None
+    assert breaker.stats()["stale_outcomes"] == 1
+
+    breaker.record(trial, failed=False, elapsed=0.1)
+    assert breaker.state == "closed"
+
+
+def test_retry_budget_limits_extra_attempts():
+    clock = FakeClock()
+    budget = RetryBudget(ratio=0.5, min_per_second=0, clock=clock)
+    assert budget.try_spend()
+    assert not budget.try_spend()
+    budget.deposit()
+    budget.deposit()
+    assert budget.try_spend()
+    assert budget.stats()["denied"] == 1
+
+
+def test_latency_percentile():
+    tracker = LatencyTracker()
+    for ms in range(1, 101):
+        tracker.add(ms / 1000)
+    assert tracker.percentile(95) == pytest.approx(0.095)
+
+
+def test_hedged_request_beats_a_straggler(maps, maps_stub, monkeypatch):
+    monkeypatch.setattr(google_maps, "MAPS_HEDGE_ENABLED", True)
+    monkeypatch.setattr(google_maps, "MAPS_HEDGE_MIN_SAMPLES", 1)
+    maps._endpoints["search_places"].latency.add(0.01)
+    maps_stub.slow_next, maps_stub.slow_seconds = 1, 2.0
+
+    start = time.perf_counter()
+    assert search(maps, "Pera Palace")[0]["name"] == "Pera Palace"
+    assert time.perf_counter() - start < 1.0
+    stats = maps.stats()["endpoints"]["search_places"]
+    assert stats["hedges"] == 1
+    assert stats["hedge_wins"] == 1
+
+
+def test_deadline_bounds_the_whole_call(maps, maps_stub, monkeypatch):
+    monkeypatch.setattr(google_maps, "MAPS_REQUEST_DEADLINE", 0.05)
+    maps_stub.latency_seconds = 1.0
+    with pytest.raises(GoogleMapsAPIError, match="no answer within"):
+        search(maps, "Pera Palace")
+    assert maps.stats()["endpoints"]["search_places"]["deadline_exceeded"] == 1
+
+
+def test_hung_upstream_opens_the_breaker(maps, maps_stub, monkeypatch):
+    monkeypatch.setattr(google_maps, "MAPS_REQUEST_DEADLINE", 0.05)
+    breaker = CircuitBreaker("search_places", min_calls=4, window=4, open_seconds=30)
+    maps._endpoints["search_places"].breaker = breaker
+    maps_stub.latency_seconds = 5.0
+
+    for i in range(4):
+        with pytest.raises(GoogleMapsAPIError, match="no answer within"):
+            search(maps, f"hotel {i}")
+    assert breaker.state == "open"
+    assert maps.stats()["endpoints"]["search_places"]["failures"] == 4
+
+    # Later calls fail fast without reaching upstream
+    start = time.perf_counter()
+    with pytest.raises(GoogleMapsAPIError, match="circuit open"):
+        search(maps, "hotel 5")
+    assert time.perf_counter() - start < 0.05
+    assert len(maps_stub.requests) == 4
@@ -0,0 +1,103 @@
+"""
+Tests for the local place search index
+"""
+import time
+from fastapi.testclient import TestClient
+from main import app
+from app.services.place_index import PlaceIndex, fold
+
+client = TestClient(app)
+
+
+def names(places):
+    return [place["name"] for place in places]
+
+
+def test_turkish_folding():
+    assert fold("İSTANBUL Havalimanı") == "istanbul havalimani"
+    assert fold("Kadıköy") == fold("KADIKÖY") == fold("kadikoy") == "kadikoy"
+    assert fold("Sabiha Gökçen (SAW)") == "sabiha gokcen saw"
+
+
+def test_seeded_locations():
+    index = PlaceIndex()
+    assert names(index.search("istanbul havalimani"))[0] == "İstanbul Havalimanı (IST)"
+    assert names(index.search("Istanbul Airport"))[0] == "İstanbul Havalimanı (IST)"
+    assert names(index.search("SAW"))[0] == "Sabiha Gökçen Havalimanı (SAW)"
+    place = index.search("üsküdar")[0]
+    assert 40.9 < place["lat"] < 41.1 and 28.9 < place["lng"] < 29.1
+
+
+def test_prefix_and_typos():
+    index = PlaceIndex()
+    assert names(index.search("sabiha gök"))[0] == "Sabiha Gökçen Havalimanı (SAW)"
+    assert names(index.search("sultanhmet"))[0] == "Sultanahmet (Fatih)"
+    assert names(index.search("bkirkoy"))[0] == "Bakırköy"
+    # Only the last token is a prefix
+    assert index.search("sab gokcen") is None
+
+
+def test_low_confidence_falls_through():
+    index = PlaceIndex()
+    assert index.search("hilton bomonti") is None
+    assert index.search("kadikoy moda") is None
+    assert index.search("ka") is None
+    assert index.stats()["fallbacks"] == 3
+
+
+def test_learned_places_and_eviction():
+    index = PlaceIndex(max_learned=2)
+    index.learn([
+        {"place_id": "g1", "name": "Hilton Istanbul Bomonti", "address": "Şişli", "lat": 41.06, "lng": 28.98},
+        {"place_id": "g2", "name": "Pera Palace Hotel", "address": "Beyoğlu", "lat": 41.03, "lng": 28.97},
+        {"place_id": "g3", "name": "Kadıköy", "address": "Kadıköy", "lat": 40.99, "lng": 29.03}
+    ])
+    assert index.stats()["learned"] == 2
+    assert names(index.search("hilton bomonti")) == ["Hilton Istanbul Bomonti"]
+
+    index.learn([{"place_id": "g4", "name": "Swissotel The Bosphorus", "address": "Beşiktaş", "lat": 41.04, "lng": 29.0}])
+    assert index.search("pera palace") is None
+    assert index.search("hilton") is not None
+    assert names(index.search("swissotel"))[0] == "Swissotel The Bosphorus"
+
+
+def test_autocomplete_is_fast():
+    index = PlaceIndex()
+    index.learn(
+        {"place_id": f"g{i}", "name": f"Hotel {i} Taksim", "address": "", "lat": 41.0, "lng": 29.0}
+        for i in range(2000)
+    )
+    start = time.perf_counter()
+    for _ in range(1000):
+        index.search("sabiha gok")
+    assert (time.perf_counter() - start) / 1000 < 0.001
+
+
+def test_endpoint_serves_local_results_and_learns(maps_stub):
+    response = client.post("/api/search-places", json={"query": "Kadikoy"})
+    assert names(response.json()["places"]) == ["Kadıköy"]
+    assert maps_stub.requests == []
+
+    first = client.post("/api/search-places", json={"query": "pera palace"}).json()["places"]
+    second = client.post("/api/search-places", json={"query": "Pera Palace"}).json()["places"]
+    assert len(maps_stub.requests) == 1
+    assert names(second)[0] == names(first)[0] == "Pera Palace"
+
+
+def test_location_breaks_ties_nearest_first():
+    index = PlaceIndex()
+    index.learn([
+        {"place_id": "g1", "name": "Marriott Hotel", "address": "Şişli", "lat": 41.06, "lng": 28.99},
+        {"place_id": "g2", "name": "Marriott Hotel", "address": "Ataşehir", "lat": 40.99, "lng": 29.12},
+    ])
+    assert [p["address"] for p in index.search("marriott hotel", (40.98, 29.10))] == ["Ataşehir", "Şişli"]
+    assert [p["address"] for p in index.search("marriott hotel", (41.07, 28.98))] == ["Şişli", "Ataşehir"]
+
+
+def test_endpoint_answers_locally_without_api_key(monkeypatch):
+    monkeypatch.setattr("main.GOOGLE_MAPS_API_KEY", None)
+    response = client.post("/api/search-places", json={"query": "Kadikoy"})
+    assert response.status_code == 200
+    assert names(response.json()["places"]) == ["Kadıköy"]
+
+    assert client.post("/api/search-places", json={"query": "hilton bomonti"}).status_code == 500
@@ -0,0 +1,95 @@
+"""
+Query-count tests for the pricing endpoints
+"""
+from contextlib import contextmanager
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from main import app
+from app.models.db_models import Vehicle, VehicleImage
+from app.services.pricing_snapshot import pricing_snapshot_store
+
+client = TestClient(app)
+
+PRICING_PAYLOAD = {
+    "origin_lat": 41.2753,
+    "origin_lng": 28.7519,
+    "origin_name": "Istanbul Airport",
+    "destination_lat": 40.9900,
+    "destination_lng": 29.0290,
+    "destination_name": "Kadikoy",
+    "distance_km": 45,
+    "duration_minutes": 50,
+    "passenger_count": 2
+}
+
+
+@contextmanager
+def count_queries(*engines):
+    """Collect every SQL statement executed on the engines"""
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", listener)
+    try:
+        yield statements
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", listener)
+
+
+def add_vehicles(session_factory, count):
+    """Add vehicles (each with images) to the fleet"""
+    db = session_factory()
+    try:
+        start = db.query(Vehicle).count()
+        for i in range(start, start + count):
+            vehicle = Vehicle(
+                vehicle_type=f"extra_{i}", name_en=f"Extra {i}", name_tr=f"Ekstra {i}",
+                capacity_min=1, capacity_max=4, baggage_capacity=2, features=[]
+            )
+            vehicle.images = [VehicleImage(image_path=f"images/extra_{i}_{j}.jpg") for j in range(3)]
+            db.add(vehicle)
+        for vehicle in db.query(Vehicle).all():
+            vehicle.images.append(VehicleImage(image_path=f"images/{vehicle.vehicle_type}.jpg"))
+        db.commit()
+    finally:
+        db.close()
+
+
+def cold_query_counts(*engines):
+    """Query counts for both endpoints with a freshly built snapshot"""
+    counts = {}
+    for name, call in (
+        ("vehicles", lambda: client.get("/api/pricing/vehicles")),
+        ("calculate", lambda: client.post("/api/pricing/calculate", json=PRICING_PAYLOAD)),
+    ):
+        pricing_snapshot_store.clear()
+        with count_queries(*engines) as statements:
+            response = call()
+        assert response.status_code == 200
+        counts[name] = len(statements)
+    return counts
+
+
+def test_query_count_constant_as_fleet_grows(snapshot_db, sqlite_engine, async_sqlite_engine):
+    """Building the snapshot costs the same number of queries for any fleet size"""
+    engines = (sqlite_engine, async_sqlite_engine.sync_engine)
+    add_vehicles(snapshot_db, 1)
+    small_fleet = cold_query_counts(*engines)
+
+    add_vehicles(snapshot_db, 20)
+    large_fleet = cold_query_counts(*engines)
+
+    assert small_fleet == large_fleet
+    assert small_fleet["vehicles"] <= 4
+
+
+def test_warm_endpoints_do_not_query(snapshot_db, sqlite_engine, async_sqlite_engine):
+    """With a snapshot in place neither endpoint touches the database"""
+    client.get("/api/pricing/vehicles")
+
+    with count_queries(sqlite_engine, async_sqlite_engine.sync_engine) as statements:
+        assert client.get("/api/pricing/vehicles").status_code == 200
+        assert client.post("/api/pricing/calculate", json=PRICING_PAYLOAD).status_code == 200
+
+    assert statements == []
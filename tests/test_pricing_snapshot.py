@@ -0,0 +1,91 @@
+"""
+Tests for the in-memory pricing snapshot
+"""
+import time
+from sqlalchemy import event
+from app.models.db_models import PricingConfig, Vehicle
+from app.models.pricing import VehicleType, PricingRules, load_pricing_rules
+from app.services.pricing_snapshot import PricingSnapshotStore
+
+
+def wait_for_version(store, version, timeout=5.0):
+    """Wait until the background rebuild has caught up with the version"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if store.get().version == version:
+            return
+        time.sleep(0.01)
+    raise AssertionError(f"Snapshot did not reach version {version}")
+
+
+def test_snapshot_contains_vehicles_and_rules(session_factory):
+    """Snapshot resolves vehicles and pricing rules from the database"""
+    store = PricingSnapshotStore(session_factory=session_factory)
+    snapshot = store.get()
+
+    assert VehicleType.VITO in snapshot.vehicles
+    assert snapshot.rules.round_trip_discount == 10.0
+    assert snapshot.rules.minimum_fare_for("vito") == 1900.0
+
+
+def test_snapshot_reads_do_not_query(session_factory, sqlite_engine):
+    """Once built, reading the snapshot issues no SQL"""
+    store = PricingSnapshotStore(session_factory=session_factory)
+    store.get()
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(sqlite_engine, "before_cursor_execute", listener)
+    try:
+        for _ in range(10):
+            store.get()
+    finally:
+        event.remove(sqlite_engine, "before_cursor_execute", listener)
+
+    assert statements == []
+
+
+def test_bump_version_rebuilds_snapshot(session_factory):
+    """Bumping the version swaps in a snapshot with the new data"""
+    store = PricingSnapshotStore(session_factory=session_factory)
+    assert store.get().vehicles[VehicleType.VITO].capacity == 7
+
+    db = session_factory()
+    try:
+        vito = db.query(Vehicle).filter(Vehicle.vehicle_type == "vito").first()
+        vito.capacity_max = 8
+        db.commit()
+    finally:
+        db.close()
+
+    version = store.bump_version()
+    wait_for_version(store, version)
+
+    assert store.get().vehicles[VehicleType.VITO].capacity == 8
+
+
+def test_global_minimum_fare_takes_precedence(session_factory):
+    """Global minimum fare wins over a vehicle-specific one"""
+    db = session_factory()
+    try:
+        db.add(PricingConfig(config_key="minimum_fare_vito", config_value=2500, vehicle_type="vito"))
+        db.commit()
+        rules = load_pricing_rules(db)
+
+        assert rules.minimum_fare_for("vito") == 1900.0
+
+        db.query(PricingConfig).filter(PricingConfig.config_key == "minimum_fare").delete()
+        db.commit()
+        rules = load_pricing_rules(db)
+    finally:
+        db.close()
+
+    assert rules.minimum_fare_for("vito") == 2500.0
+    assert rules.minimum_fare_for("sprinter") == 0
+
+
+def test_default_rules():
+    """Missing config rows fall back to the historical defaults"""
+    rules = PricingRules()
+    assert rules.round_trip_discount == 10.0
+    assert rules.minimum_fare_for("vito") == 0
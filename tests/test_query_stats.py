@@ -0,0 +1,92 @@
+"""
+Tests for per-request SQL query statistics
+"""
+import logging
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from main import app
+from app.middleware import query_stats
+from app.middleware.query_stats import (
+    QueryStatsMiddleware, RequestQueryStats, install_query_stats, query_stats_registry
+)
+from app.models.db_models import Vehicle
+
+
+def make_app(session_factory):
+    """Minimal app with an N+1 and a single-query endpoint"""
+    test_app = FastAPI()
+    test_app.add_middleware(QueryStatsMiddleware)
+
+    @test_app.get("/n-plus-one")
+    def n_plus_one():
+        db = session_factory()
+        try:
+            ids = [vehicle_id for (vehicle_id,) in db.query(Vehicle.id).all()]
+            return [db.query(Vehicle.name_en).filter(Vehicle.id == vehicle_id).scalar() for vehicle_id in ids]
+        finally:
+            db.close()
+
+    @test_app.get("/single")
+    def single():
+        db = session_factory()
+        try:
+            return [name for (name,) in db.query(Vehicle.name_en).all()]
+        finally:
+            db.close()
+
+    return test_app
+
+
+def test_n_plus_one_is_flagged(session_factory, sqlite_engine, monkeypatch, caplog):
+    install_query_stats(sqlite_engine)
+    monkeypatch.setattr(query_stats, "QUERY_STATS_HEADERS", True)
+    client = TestClient(make_app(session_factory))
+
+    with caplog.at_level(logging.WARNING, logger="app.middleware.query_stats"):
+        response = client.get("/n-plus-one")
+    assert response.status_code == 200
+    assert int(response.headers["X-DB-Query-Count"]) == 1 + len(response.json())
+    assert response.headers["X-DB-N-Plus-One"] == "1"
+    assert float(response.headers["X-DB-Time-Ms"]) > 0
+    assert "Probable N+1 in GET /n-plus-one" in caplog.text
+
+    response = client.get("/single")
+    assert response.headers["X-DB-Query-Count"] == "1"
+    assert response.headers["X-DB-N-Plus-One"] == "0"
+
+
+def test_headers_are_opt_in(session_factory, sqlite_engine):
+    install_query_stats(sqlite_engine)
+    response = TestClient(make_app(session_factory)).get("/single")
+    assert "X-DB-Query-Count" not in response.headers
+
+
+def test_async_queries_are_attributed(snapshot_db, sqlite_engine, async_sqlite_engine, monkeypatch):
+    install_query_stats(sqlite_engine, async_sqlite_engine)
+    monkeypatch.setattr(query_stats, "QUERY_STATS_HEADERS", True)
+    client = TestClient(app)
+
+    cold = client.get("/api/pricing/vehicles")
+    assert int(cold.headers["X-DB-Query-Count"]) > 0
+    warm = client.get("/api/pricing/vehicles")
+    assert warm.headers["X-DB-Query-Count"] == "0"
+
+    summary = query_stats_registry.summary()["GET /api/pricing/vehicles"]
+    assert summary["requests"] >= 2
+
+
+def test_identical_parameters_are_not_n_plus_one():
+    stats = RequestQueryStats()
+    for _ in range(5):
+        stats.record("SELECT 1 WHERE x = ?", (1,), 0.1)
+    assert stats.n_plus_one_suspects() == []
+    stats.record("SELECT 1 WHERE x = ?", (2,), 0.1)
+    assert stats.n_plus_one_suspects() == ["SELECT 1 WHERE x = ?"]
+
+
+def test_queries_outside_requests_are_ignored(sqlite_engine):
+    install_query_stats(sqlite_engine)
+    with sqlite_engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    assert query_stats.current_query_stats() is None
@@ -0,0 +1,115 @@
+"""
+Tests for the quote result cache
+"""
+from fastapi.testclient import TestClient
+from main import app
+from app.models.db_models import PricingConfig
+from app.models.pricing import PricingRequest
+from app.services.pricing_snapshot import pricing_snapshot_store
+from app.services.quote_cache import quote_cache
+from app.utils.cache import TTLCache
+
+client = TestClient(app)
+
+ITINERARY = {
+    "origin_lat": 41.2753,
+    "origin_lng": 28.7519,
+    "origin_name": "İstanbul Havalimanı (IST)",
+    "destination_lat": 41.0054,
+    "destination_lng": 28.9768,
+    "destination_name": "Taksim",
+    "distance_km": 45.5,
+    "duration_minutes": 50,
+    "passenger_count": 2,
+    "is_round_trip": False,
+    "is_airport_transfer": True,
+}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1
+
+
+def test_ttl_cache_expires_entries():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl_seconds=5, clock=clock)
+    cache.set("a", 1)
+    clock.now = 4.9
+    assert cache.get("a") == 1
+    clock.now = 5.0
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+    assert len(cache) == 0
+
+
+def test_key_buckets_equivalent_requests(snapshot_db):
+    snapshot = pricing_snapshot_store.get()
+    request = PricingRequest(**ITINERARY)
+    key = quote_cache.make_key(snapshot, request)
+
+    # Spelling variants normalize to the same place, same passenger bucket
+    variant = PricingRequest(**{**ITINERARY, "origin_name": "İstanbul Havalimanı IST",
+                                "distance_km": 45.52, "passenger_count": 3})
+    assert quote_cache.make_key(snapshot, variant) == key
+
+    for changes in ({"distance_km": 47.0}, {"passenger_count": 10},
+                    {"is_round_trip": True}, {"destination_name": "Beşiktaş"}):
+        other = PricingRequest(**{**ITINERARY, **changes})
+        assert quote_cache.make_key(snapshot, other) != key
+
+
+def test_repeated_quote_is_served_from_cache(snapshot_db):
+    first = client.post("/api/pricing/calculate", json=ITINERARY)
+    assert first.status_code == 200
+    before = client.get("/api/pricing/cache-stats").json()
+
+    second = client.post("/api/pricing/calculate", json=ITINERARY)
+    assert second.json() == first.json()
+    after = client.get("/api/pricing/cache-stats").json()
+    assert after["hits"] == before["hits"] + 1
+
+
+def test_cached_quote_keeps_request_route_info(snapshot_db):
+    client.post("/api/pricing/calculate", json=ITINERARY)
+    response = client.post("/api/pricing/calculate",
+                           json={**ITINERARY, "origin_name": "Istanbul Havalimani (IST)", "duration_minutes": 55})
+    route_info = response.json()["route_info"]
+    assert route_info["origin"] == "Istanbul Havalimani (IST)"
+    assert route_info["duration_minutes"] == 55
+
+
+def test_pricing_change_invalidates_cached_quotes(snapshot_db):
+    first = client.post("/api/pricing/calculate", json=ITINERARY).json()
+
+    db = snapshot_db()
+    try:
+        db.query(PricingConfig).filter(PricingConfig.config_key == "minimum_fare").update({"config_value": 5000})
+        db.commit()
+    finally:
+        db.close()
+    pricing_snapshot_store.bump_version()
+    pricing_snapshot_store.refresh()
+
+    second = client.post("/api/pricing/calculate", json=ITINERARY).json()
+    assert second != first
+    assert all(v["final_price"] == 5000 for v in second["vehicles"])
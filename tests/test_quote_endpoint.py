@@ -0,0 +1,72 @@
+"""
+Tests for the one-shot /api/quote endpoint
+"""
+from fastapi.testclient import TestClient
+from main import app
+from app.services.pricing_snapshot import pricing_snapshot_store
+
+client = TestClient(app)
+
+QUOTE = {
+    "origin_lat": 41.2753,
+    "origin_lng": 28.7519,
+    "origin_name": "İstanbul Havalimanı (IST)",
+    "destination_lat": 41.0054,
+    "destination_lng": 28.9768,
+    "destination_name": "Sultanahmet (Fatih)",
+    "passenger_count": 2,
+    "is_airport_transfer": True,
+}
+
+
+def test_quote_matches_two_step_flow(snapshot_db, maps_stub):
+    response = client.post("/api/quote", json=QUOTE)
+    assert response.status_code == 200
+    data = response.json()
+    assert len(maps_stub.requests) == 1
+    assert data["distance"]["source"] == "google"
+    assert data["route_info"]["distance_estimated"] is False
+
+    # Same numbers as /calculate-distance followed by /pricing/calculate
+    distance = client.post("/api/calculate-distance", json={
+        key: QUOTE[key] for key in ("origin_lat", "origin_lng", "destination_lat", "destination_lng")
+    }).json()
+    assert distance["distance_km"] == data["distance"]["distance_km"]
+    priced = client.post("/api/pricing/calculate", json={
+        **QUOTE, "distance_km": distance["distance_km"], "duration_minutes": distance["duration_minutes"]
+    }).json()
+    assert priced["vehicles"] == data["vehicles"]
+
+
+def test_fixed_route_skips_distance_lookup(snapshot_db, maps_stub, add_fixed_route):
+    add_fixed_route("istanbul airport", "sultanahmet", {"vito": 2000, "sprinter": 2000, "luxury_sedan": 2000})
+    pricing_snapshot_store.get()
+
+    data = client.post("/api/quote", json=QUOTE).json()
+    assert maps_stub.requests == []
+    assert data["route_info"]["is_fixed_route"] is True
+    assert data["distance"]["source"] == "estimate"
+    assert {v["final_price"] for v in data["vehicles"]} == {2000.0}
+
+
+def test_partial_fixed_route_still_needs_distance(snapshot_db, maps_stub, add_fixed_route):
+    add_fixed_route("istanbul airport", "sultanahmet", {"vito": 2000})
+    pricing_snapshot_store.get()
+
+    data = client.post("/api/quote", json=QUOTE).json()
+    assert len(maps_stub.requests) == 1
+    assert data["distance"]["source"] == "google"
+
+
+def test_cold_snapshot_loads_with_distance_lookup(snapshot_db, maps_stub):
+    assert not pricing_snapshot_store.is_warm
+    response = client.post("/api/quote", json={**QUOTE, "destination_name": "Kadıköy"})
+    assert response.status_code == 200
+    assert pricing_snapshot_store.is_warm
+
+
+def test_estimate_mode_never_calls_google(snapshot_db, maps_stub):
+    data = client.post("/api/quote", json={**QUOTE, "distance_mode": "estimate"}).json()
+    assert maps_stub.requests == []
+    assert data["distance"]["source"] == "estimate"
+    assert data["route_info"]["distance_estimated"] is True
@@ -0,0 +1,191 @@
+"""
+Tests for the streaming route catalog export
+"""
+import csv
+import io
+import os
+import time
+from datetime import datetime, timedelta
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from app.models.db_models import FixedRoute, Vehicle
+from app.services.data_manager import RouteTable
+from app.services.pricing_snapshot import pricing_snapshot_store
+from app.services.route_export import RouteExportCache, iter_sheet_rows, route_export_cache
+from app.services.route_sync import sync_fixed_routes
+
+client = TestClient(app)
+
+COLUMNS = ["ID", "Origin", "Destination", "Price_Sedan", "Price_Vito", "Price_VitoVIP",
+           "Price_Sprinter", "Active", "Discount", "Comp_Price", "Notes"]
+
+ROWS = [
+    [1, "Sabiha Gökçen", "Kadıköy", None, 900, None, None, False, 0, None, None],
+    [2, "Istanbul Airport", "Taksim", 1500, 1200, 1800, 2000, True, 5, 1300, "Rakip, 50 TL pahalı"],
+    [3, "Istanbul Airport", "Beşiktaş", None, 1100, None, 1900, True, 0, None, None],
+]
+
+
+@pytest.fixture
+def catalog(snapshot_db, tmp_path, monkeypatch):
+    db = snapshot_db()
+    try:
+        vehicle_ids = {v.vehicle_type: v.id for v in db.query(Vehicle).all()}
+        sync_fixed_routes(db, [RouteTable.from_frame(pd.DataFrame(ROWS, columns=COLUMNS))], vehicle_ids)
+    finally:
+        db.close()
+
+    monkeypatch.setattr(route_export_cache, "session_factory", snapshot_db)
+    monkeypatch.setattr(route_export_cache, "_directory", str(tmp_path / "exports"))
+    (tmp_path / "exports").mkdir()
+    monkeypatch.setattr(route_export_cache, "hits", 0)
+    monkeypatch.setattr(route_export_cache, "builds", 0)
+    return snapshot_db
+
+
+def test_rows_are_pivoted_per_pair(catalog):
+    db = catalog()
+    try:
+        rows = list(iter_sheet_rows(db, yield_per=2))
+    finally:
+        db.close()
+
+    assert [(r["ID"], r["Origin"], r["Destination"]) for r in rows] == [
+        (1, "Sabiha Gökçen", "Kadıköy"),
+        (2, "Istanbul Airport", "Taksim"),
+        (3, "Istanbul Airport", "Beşiktaş"),
+    ]
+    taksim = rows[1]
+    assert [taksim[c] for c in ("Price_Sedan", "Price_Vito", "Price_VitoVIP", "Price_Sprinter")] == [1500, 1200, 1800, 2000]
+    assert taksim["Comp_Price"] == 1300.0 and taksim["Discount"] == 5.0
+    assert rows[0]["Active"] is False and rows[0]["Notes"] == ""
+
+
+def test_export_keeps_sheet_order_and_appends_admin_routes(catalog):
+    db = catalog()
+    try:
+        vito = db.query(Vehicle).filter(Vehicle.vehicle_type == "vito").one()
+        # Admin paneli: sheet_order olmadan eklenen rota
+        db.add(FixedRoute(origin="Airport", destination="Bakırköy", vehicle_id=vito.id, price=800))
+        db.commit()
+        rows = list(iter_sheet_rows(db))
+
+        # Re-importing the export keeps precedence: nothing but the new route changes
+        vehicle_ids = {v.vehicle_type: v.id for v in db.query(Vehicle).all()}
+        exported = pd.DataFrame([[row[c] for c in COLUMNS] for row in rows], columns=COLUMNS)
+        result = sync_fixed_routes(db, [RouteTable.from_frame(exported)], vehicle_ids)
+        assert (result.inserted, result.updated, result.deleted) == (0, 1, 0)
+    finally:
+        db.close()
+
+    assert [r["Destination"] for r in rows] == ["Kadıköy", "Taksim", "Beşiktaş", "Bakırköy"]
+
+
+def test_xlsx_export_is_cached_until_version_changes(catalog):
+    response = client.get("/api/admin/export-routes")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/vnd.openxmlformats")
+    sheet = pd.read_excel(io.BytesIO(response.content))
+    assert list(sheet.columns) == COLUMNS
+    assert sheet["Destination"].tolist() == ["Kadıköy", "Taksim", "Beşiktaş"]
+
+    # Exported sheet imports back to the same routes
+    exported = RouteTable.from_frame(sheet)
+    assert exported.prices["price_sprinter"].tolist()[1:] == [2000.0, 1900.0]
+
+    assert client.get("/api/admin/export-routes").content == response.content
+    assert route_export_cache.stats() == {"hits": 1, "builds": 1}
+
+    pricing_snapshot_store.bump_version()
+    again = client.get("/api/admin/export-routes")
+    assert again.headers["x-route-data-version"].startswith(f"{pricing_snapshot_store.version}-")
+    assert route_export_cache.stats()["builds"] == 2
+
+
+def test_database_changes_from_elsewhere_rebuild_the_export(catalog):
+    first = client.get("/api/admin/export-routes", params={"format": "csv"})
+    version = pricing_snapshot_store.version
+
+    # Başka bir worker fiyatı değiştirdi: bu worker'ın versiyonu aynı kalır
+    db = catalog()
+    try:
+        route = db.query(FixedRoute).filter(FixedRoute.destination == "Taksim").first()
+        route.price = 1750
+        route.updated_at = datetime.now() + timedelta(minutes=1)
+        db.commit()
+    finally:
+        db.close()
+
+    second = client.get("/api/admin/export-routes", params={"format": "csv"})
+    assert pricing_snapshot_store.version == version
+    assert second.headers["x-route-data-version"] != first.headers["x-route-data-version"]
+    assert "1750" in second.content.decode("utf-8-sig")
+    assert route_export_cache.stats() == {"hits": 0, "builds": 2}
+
+    db = catalog()
+    try:
+        db.query(FixedRoute).filter(FixedRoute.destination == "Kadıköy").delete()
+        db.commit()
+    finally:
+        db.close()
+    third = client.get("/api/admin/export-routes", params={"format": "csv"})
+    assert "Kadıköy" not in third.content.decode("utf-8-sig")
+
+
+def test_csv_export_streams_then_serves_cached_copy(catalog):
+    response = client.get("/api/admin/export-routes", params={"format": "csv"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    text = response.content.decode("utf-8-sig")
+    rows = list(csv.reader(io.StringIO(text)))
+    assert rows[0] == COLUMNS
+    assert rows[2][1:4] == ["Istanbul Airport", "Taksim", "1500"]
+    assert rows[2][-1] == "Rakip, 50 TL pahalı"
+    assert rows[3][-2:] == ["", ""]
+    assert route_export_cache.stats() == {"hits": 0, "builds": 1}
+
+    cached = client.get("/api/admin/export-routes", params={"format": "csv"})
+    assert cached.content == response.content
+    assert route_export_cache.stats() == {"hits": 1, "builds": 1}
+
+
+def test_abandoned_csv_stream_is_not_cached(catalog, tmp_path):
+    cache = RouteExportCache(session_factory=catalog, directory=str(tmp_path / "exports"))
+    stream = cache.stream_csv("7-abc")
+    next(stream)
+    stream.close()
+
+    assert cache.cached("csv", "7-abc") is None
+    assert list((tmp_path / "exports").iterdir()) == []
+
+
+def test_prune_keeps_recent_and_in_use_artifacts(catalog, tmp_path, monkeypatch):
+    monkeypatch.setattr("app.services.route_export.ROUTE_EXPORT_KEEP", 1)
+    directory = tmp_path / "exports"
+    cache = RouteExportCache(session_factory=catalog, directory=str(directory))
+    old = time.time() - 3600
+    for age, key in enumerate(["a", "b", "c", "d"]):
+        path = directory / f"routes-{key}.csv"
+        path.write_bytes(b"x")
+        os.utime(path, (old - age, old - age))
+    # "d" en eski ama az önce indirilmeye başlandı
+    assert cache.cached("csv", "d")
+
+    list(cache.stream_csv("e"))
+    assert sorted(os.listdir(directory)) == ["routes-d.csv", "routes-e.csv"]
+
+
+def test_late_build_for_old_key_keeps_newer_artifact(catalog, tmp_path, monkeypatch):
+    monkeypatch.setattr("app.services.route_export.ROUTE_EXPORT_GRACE_SECONDS", 0)
+    directory = tmp_path / "exports"
+    cache = RouteExportCache(session_factory=catalog, directory=str(directory))
+
+    list(cache.stream_csv("new"))
+    list(cache.stream_csv("old"))
+    assert cache.cached("csv", "new") and cache.cached("csv", "old")
+
+
+def test_unknown_format_is_rejected(catalog):
+    assert client.get("/api/admin/export-routes", params={"format": "pdf"}).status_code == 422
@@ -0,0 +1,93 @@
+"""
+Tests for the precompiled fixed route matcher
+"""
+import random
+from app.core.constants import ISTANBUL_LOCATIONS
+from app.models.db_models import FixedRoute, Vehicle
+from app.models.pricing import VehicleType, normalize_location_name, check_fixed_route
+from app.services.route_matcher import FixedRouteMatcher
+
+
+def linear_scan(routes, origin, destination):
+    """Reference implementation: the original per-row scan"""
+    origin_norm = normalize_location_name(origin)
+    destination_norm = normalize_location_name(destination)
+
+    for route_origin, route_destination, _, _ in routes:
+        route_origin_norm = normalize_location_name(route_origin)
+        route_dest_norm = normalize_location_name(route_destination)
+
+        forward = (
+            (route_origin_norm in origin_norm or origin_norm in route_origin_norm)
+            and (route_dest_norm in destination_norm or destination_norm in route_dest_norm)
+        )
+        reverse = (
+            (route_dest_norm in origin_norm or origin_norm in route_dest_norm)
+            and (route_origin_norm in destination_norm or destination_norm in route_origin_norm)
+        )
+        if forward or reverse:
+            prices = {}
+            for o, d, vehicle_type, price in routes:
+                if (o, d) == (route_origin, route_destination):
+                    try:
+                        prices[VehicleType(vehicle_type)] = price
+                    except ValueError:
+                        continue
+            return prices or None
+    return None
+
+
+def test_forward_and_reverse_match():
+    """Routes match in both directions with Turkish/English names"""
+    routes = [
+        ("İstanbul Havalimanı (IST)", "Sultanahmet (Fatih)", "vito", 2000.0),
+        ("İstanbul Havalimanı (IST)", "Sultanahmet (Fatih)", "sprinter", 3000.0),
+    ]
+    matcher = FixedRouteMatcher(routes)
+
+    expected = {VehicleType.VITO: 2000.0, VehicleType.SPRINTER: 3000.0}
+    assert matcher.match("Istanbul Airport", "Sultanahmet") == expected
+    assert matcher.match("Sultanahmet", "İstanbul Havalimanı") == expected
+    assert matcher.match("Kadıköy", "Sultanahmet") is None
+
+
+def test_unknown_vehicle_types_only_returns_none():
+    """A matching route without quotable vehicle types yields None"""
+    matcher = FixedRouteMatcher([("Taksim", "Kadıköy", "vito_vip", 1500.0)])
+    assert matcher.match("Taksim", "Kadıköy") is None
+
+
+def test_matches_linear_scan_on_random_routes():
+    """Matcher agrees with the original linear scan"""
+    rnd = random.Random(42)
+    names = [name for name, _ in ISTANBUL_LOCATIONS] + ["Istanbul Airport", "Sabiha Gokcen Airport"]
+    vehicle_types = ["vito", "sprinter", "luxury_sedan", "vito_vip"]
+
+    routes = []
+    for _ in range(300):
+        origin, destination = rnd.sample(names, 2)
+        for vehicle_type in rnd.sample(vehicle_types, rnd.randint(1, 4)):
+            routes.append((origin, destination, vehicle_type, float(rnd.randint(500, 5000))))
+    matcher = FixedRouteMatcher(routes)
+
+    queries = names + ["Kadikoy", "Airport", "", "Beyoglu", "sultan", "köy", "xyz"]
+    for _ in range(1000):
+        origin, destination = rnd.choice(queries), rnd.choice(queries)
+        assert matcher.match(origin, destination) == linear_scan(routes, origin, destination)
+
+
+def test_check_fixed_route_with_session(session_factory):
+    """check_fixed_route builds the matcher from a given session with discounts applied"""
+    db = session_factory()
+    try:
+        vito = db.query(Vehicle).filter(Vehicle.vehicle_type == "vito").first()
+        db.add(FixedRoute(origin="Taksim (Beyoğlu)", destination="Kadıköy",
+                          vehicle_id=vito.id, price=2000, discount_percent=10, active=True))
+        db.add(FixedRoute(origin="Şişli", destination="Kadıköy",
+                          vehicle_id=vito.id, price=2000, active=False))
+        db.commit()
+
+        assert check_fixed_route("Taksim", "Kadikoy", db) == {VehicleType.VITO: 1800.0}
+        assert check_fixed_route("Sisli", "Kadikoy", db) is None
+    finally:
+        db.close()
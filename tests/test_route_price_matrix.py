@@ -0,0 +1,76 @@
+"""
+Tests for the precomputed fixed route price matrix
+"""
+import random
+from fastapi.testclient import TestClient
+from main import app
+from app.models.db_models import FixedRoute, Vehicle
+from app.models.pricing import PricingRules, VehicleInfo, VehicleType, calculate_vehicle_price
+from app.services.route_matcher import FixedRouteMatcher
+from app.services.route_price_matrix import FixedRoutePriceMatrix
+
+client = TestClient(app)
+
+
+def make_vehicle(vehicle_type):
+    return VehicleInfo(
+        type=vehicle_type, name=vehicle_type.value, name_tr=vehicle_type.value,
+        capacity=6, luggage_capacity=4, image_url="", features=[],
+        base_fare=50.0, per_km_rate=12.0, airport_fee=100.0
+    )
+
+
+def test_quotes_match_calculate_vehicle_price():
+    rnd = random.Random(3)
+    rules = PricingRules(round_trip_discount=12.5, global_minimum_fare=1900.0)
+    routes = [
+        (f"Origin {i:02d}.", f"Destination {i:02d}.", vehicle_type.value, round(rnd.uniform(500, 5000), 2) * (1 - rnd.choice([0, 5, 7.5]) / 100))
+        for i in range(40)
+        for vehicle_type in VehicleType
+    ]
+    matrix = FixedRoutePriceMatrix(FixedRouteMatcher(routes), rules)
+
+    for origin, destination, vehicle_type, price in routes:
+        row = matrix.match_row(destination, origin)  # reverse direction
+        vehicle = make_vehicle(VehicleType(vehicle_type))
+        for is_round_trip in (False, True):
+            for is_airport in (False, True):
+                expected = calculate_vehicle_price(vehicle, 30.0, is_round_trip, is_airport, fixed_price=price, rules=rules)
+                pricing = matrix.vehicle_pricing(row, vehicle, is_round_trip)
+                assert pricing.model_dump() == expected.model_dump()
+                assert matrix.final_price(row, vehicle_type, is_round_trip, is_airport) == expected.final_price
+
+
+def test_zero_price_falls_back_to_distance_pricing():
+    matrix = FixedRoutePriceMatrix(FixedRouteMatcher([
+        ("Taksim", "Sisli", "vito", 0),
+        ("Taksim", "Sisli", "sprinter", 2500),
+    ]), PricingRules())
+    row = matrix.match_row("Taksim", "Sisli")
+    assert matrix.vehicle_pricing(row, make_vehicle(VehicleType.VITO), False) is None
+    assert matrix.vehicle_pricing(row, make_vehicle(VehicleType.SPRINTER), False).final_price == 2500
+    assert matrix.catalog()[0]["prices"] == {"vito": 0, "sprinter": 2500}
+
+
+def test_fixed_routes_endpoint_lists_all_vehicle_types(snapshot_db):
+    db = snapshot_db()
+    try:
+        vehicles = {v.vehicle_type: v for v in db.query(Vehicle).all()}
+        db.add(Vehicle(vehicle_type="minibus", name_en="Minibus", name_tr="Minibüs",
+                       capacity_min=1, capacity_max=14, baggage_capacity=10))
+        db.flush()
+        minibus = db.query(Vehicle).filter(Vehicle.vehicle_type == "minibus").one()
+        db.add(FixedRoute(origin="istanbul airport", destination="taksim",
+                          vehicle_id=vehicles["vito"].id, price=2000, discount_percent=10))
+        db.add(FixedRoute(origin="istanbul airport", destination="taksim", vehicle_id=minibus.id, price=3000))
+        db.add(FixedRoute(origin="sabiha gokcen", destination="kadikoy",
+                          vehicle_id=vehicles["sprinter"].id, price=2800, active=False))
+        db.commit()
+    finally:
+        db.close()
+
+    response = client.get("/api/pricing/fixed-routes")
+    assert response.status_code == 200
+    assert response.json() == {"routes": [
+        {"origin": "Istanbul Airport", "destination": "Taksim", "prices": {"vito": 1800.0, "minibus": 3000.0}}
+    ]}
@@ -0,0 +1,188 @@
+"""
+Tests for the diff-based FixedRoute sync
+"""
+from decimal import Decimal
+import pandas as pd
+import pytest
+from app.models.db_models import FixedRoute, Vehicle
+from app.models.pricing import VehicleType
+from app.services.data_manager import RouteTable
+from app.services.init_db import init_routes_data
+from app.services.route_matcher import FixedRouteMatcher
+from app.services.route_sync import (
+    _copy_rows, bulk_insert_routes, reload_fixed_routes, supports_copy, sync_fixed_routes
+)
+
+COLUMNS = ["ID", "Origin", "Destination", "Price_Sedan", "Price_Vito", "Price_VitoVIP",
+           "Price_Sprinter", "Active", "Discount", "Comp_Price", "Notes"]
+
+ROWS = [
+    [1, "Istanbul Airport", "Taksim", 1500, 1200, None, 2000, True, 5, 1300, "Not"],
+    [2, "Sabiha Gökçen", "Kadıköy", None, 900, None, None, True, 0, None, None],
+]
+
+
+def table(rows):
+    return RouteTable.from_frame(pd.DataFrame(rows, columns=COLUMNS))
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def vehicle_ids(db):
+    return {v.vehicle_type: v.id for v in db.query(Vehicle).all()}
+
+
+def route_ids(db):
+    return {
+        (r.origin, r.destination, r.vehicle.vehicle_type): (r.id, r.price)
+        for r in db.query(FixedRoute).all()
+    }
+
+
+def test_first_sync_inserts_everything(db, vehicle_ids):
+    result = sync_fixed_routes(db, [table(ROWS)], vehicle_ids)
+    assert (result.inserted, result.updated, result.deleted, result.unchanged) == (4, 0, 0, 0)
+    assert result.sheet_rows == 2
+    assert set(result.timings_ms) == {"read_sheet", "diff", "insert", "update", "delete", "commit"}
+    assert len(route_ids(db)) == 4
+
+
+def test_resync_of_same_sheet_writes_nothing(db, vehicle_ids):
+    sync_fixed_routes(db, [table(ROWS)], vehicle_ids)
+    before = route_ids(db)
+
+    result = sync_fixed_routes(db, [table(ROWS)], vehicle_ids)
+    assert not result.changed
+    assert result.unchanged == 4
+    assert route_ids(db) == before
+
+
+def test_only_changed_rows_are_written(db, vehicle_ids):
+    sync_fixed_routes(db, [table(ROWS)], vehicle_ids)
+    before = route_ids(db)
+
+    changed = [
+        # Vito fiyatı değişti, Sprinter kaldırıldı
+        [1, "Istanbul Airport", "Taksim", 1500, 1250, None, None, True, 5, 1300, "Not"],
+        [2, "Sabiha Gökçen", "Kadıköy", None, 900, None, None, True, 0, None, None],
+        [3, "Taksim", "Sultanahmet", None, 600, None, None, True, 0, None, None],
+    ]
+    result = sync_fixed_routes(db, [table(changed[:2]), table(changed[2:])], vehicle_ids)
+    assert (result.inserted, result.updated, result.deleted, result.unchanged) == (1, 1, 1, 2)
+
+    db.expire_all()
+    after = route_ids(db)
+    airport_vito = ("Istanbul Airport", "Taksim", "vito")
+    assert after[airport_vito] == (before[airport_vito][0], Decimal("1250.00"))
+    assert ("Istanbul Airport", "Taksim", "sprinter") not in after
+    # Değişmeyen satırlar ID'lerini korur
+    sedan = ("Istanbul Airport", "Taksim", "luxury_sedan")
+    assert after[sedan] == before[sedan]
+
+
+def test_metadata_change_is_an_update(db, vehicle_ids):
+    sync_fixed_routes(db, [table(ROWS)], vehicle_ids)
+    rows = [ROWS[0], [2, "Sabiha Gökçen", "Kadıköy", None, 900, None, None, False, 0, None, "Pasif"]]
+
+    result = sync_fixed_routes(db, [table(rows)], vehicle_ids)
+    assert (result.updated, result.unchanged) == (1, 3)
+    route = db.query(FixedRoute).filter(FixedRoute.origin == "Sabiha Gökçen").one()
+    assert route.active is False and route.notes == "Pasif"
+
+
+def test_overlapping_routes_follow_sheet_order(db, vehicle_ids):
+    generic = [1, "Airport", "Taksim", None, 1000, None, None, True, 0, None, None]
+    specific = [2, "Istanbul Airport", "Taksim", None, 1500, None, None, True, 0, None, None]
+    sync_fixed_routes(db, [table([generic])], vehicle_ids)
+
+    # Later sync inserts the more specific route above the existing one
+    sync_fixed_routes(db, [table([specific, generic])], vehicle_ids)
+    assert FixedRouteMatcher.from_db(db).match("Istanbul Airport", "Taksim")[VehicleType.VITO] == 1500
+
+    # Reordering the sheet alone changes precedence
+    result = sync_fixed_routes(db, [table([generic, specific])], vehicle_ids)
+    assert (result.inserted, result.updated, result.deleted) == (0, 2, 0)
+    assert FixedRouteMatcher.from_db(db).match("Istanbul Airport", "Taksim")[VehicleType.VITO] == 1000
+
+
+def test_failed_sync_leaves_table_untouched(db, vehicle_ids):
+    sync_fixed_routes(db, [table(ROWS)], vehicle_ids)
+    before = route_ids(db)
+
+    def batches():
+        yield table(ROWS[:1])
+        raise RuntimeError("sheet read failed")
+
+    with pytest.raises(RuntimeError):
+        sync_fixed_routes(db, batches(), vehicle_ids)
+    assert route_ids(db) == before
+
+
+def test_init_routes_data_syncs_from_sheet(tmp_path, monkeypatch, db):
+    path = tmp_path / "routes.xlsx"
+    monkeypatch.setattr("app.services.data_manager.FILE_PATH", str(path))
+
+    pd.DataFrame(ROWS, columns=COLUMNS).to_excel(path, index=False)
+    assert init_routes_data(db).inserted == 4
+
+    pd.DataFrame(columns=COLUMNS).to_excel(path, index=False)
+    result = init_routes_data(db)
+    assert result.deleted == 4 and result.sheet_rows == 0
+    assert db.query(FixedRoute).count() == 0
+
+
+def test_bulk_insert_uses_executemany_batches(db, vehicle_ids):
+    rows = [
+        {"origin": f"Origin {i}", "destination": "Taksim", "vehicle_id": vehicle_ids["vito"],
+         "price": 1000 + i, "discount_percent": 0, "competitor_price": None, "notes": "", "active": True,
+         "sheet_order": i}
+        for i in range(25)
+    ]
+    assert not supports_copy(db)
+    assert bulk_insert_routes(db, rows, batch_size=10) == "executemany"
+    db.commit()
+    assert db.query(FixedRoute).count() == 25
+
+
+def test_full_reload_replaces_table(db, vehicle_ids):
+    sync_fixed_routes(db, [table(ROWS)], vehicle_ids)
+
+    result = reload_fixed_routes(db, [table(ROWS[1:])], vehicle_ids, batch_size=1)
+    assert (result.deleted, result.inserted, result.insert_method) == (4, 1, "executemany")
+    assert list(route_ids(db)) == [("Sabiha Gökçen", "Kadıköy", "vito")]
+
+
+def test_copy_stream_format():
+    captured = {}
+
+    class Cursor:
+        def copy_expert(self, sql, buffer):
+            captured["sql"], captured["data"] = sql, buffer.read()
+
+        def close(self):
+            pass
+
+    class RawConnection:
+        def cursor(self):
+            return Cursor()
+
+    class Connection:
+        connection = RawConnection()
+
+    class Session:
+        def connection(self):
+            return Connection()
+
+    _copy_rows(Session(), [
+        {"origin": "Taksim, Beyoğlu", "destination": 'Otel "Pera"', "vehicle_id": 1, "price": 1500.5,
+         "discount_percent": 0, "competitor_price": None, "notes": "", "active": False, "sheet_order": 3},
+    ])
+    assert captured["sql"].startswith("COPY fixed_routes (origin, destination, vehicle_id, price,")
+    assert "FORCE_NOT_NULL (notes)" in captured["sql"]
+    assert captured["data"] == '"Taksim, Beyoğlu","Otel ""Pera""",1,1500.5,0,,,f,3\r\n'
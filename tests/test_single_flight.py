@@ -0,0 +1,117 @@
+"""
+Tests for single-flight coalescing of outbound calls
+"""
+import asyncio
+from app.api import exchange_rates
+from app.utils import http_client
+from app.utils.google_maps import GoogleMapsClient
+from app.utils.maps_stub import StubMapsHandler, stub_maps_transport
+from app.utils.single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"value": 42}
+
+    async def run():
+        return await asyncio.gather(*(flight.do("key", fetch) for _ in range(10)))
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(result == {"value": 42} for result in results)
+    assert flight.stats()["collapsed"] == 9
+    assert flight.in_flight == 0
+
+    # Finished calls are not cached
+    asyncio.run(run())
+    assert len(calls) == 2
+
+
+def test_error_is_shared():
+    flight = SingleFlight("test")
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream down")
+
+    async def run():
+        return await asyncio.gather(*(flight.do("key", fetch) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert flight.stats()["executions"] == 1
+
+
+def test_cancelled_caller_does_not_cancel_others():
+    flight = SingleFlight("test")
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def run():
+        first = asyncio.ensure_future(flight.do("key", fetch))
+        second = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run()) == "done"
+
+
+def test_identical_place_searches_collapse(distance_cache_db, monkeypatch):
+    handler = StubMapsHandler(latency_seconds=0.02)
+    monkeypatch.setattr(http_client, "_client", http_client.create_http_client(stub_maps_transport(handler)))
+    maps = GoogleMapsClient(api_key="test")
+
+    async def run():
+        return await asyncio.gather(
+            maps.search_places("Sultanahmet"),
+            maps.search_places("  sultanahmet "),
+            maps.search_places("Taksim")
+        )
+
+    first, second, other = asyncio.run(run())
+    assert len(handler.requests) == 2
+    assert first == second
+    assert first is not second
+    assert other[0]["name"] == "Taksim"
+
+
+def test_identical_distance_lookups_collapse(distance_cache_db, monkeypatch):
+    handler = StubMapsHandler(latency_seconds=0.02)
+    monkeypatch.setattr(http_client, "_client", http_client.create_http_client(stub_maps_transport(handler)))
+    maps = GoogleMapsClient(api_key="test")
+
+    async def run():
+        return await asyncio.gather(*(
+            maps.calculate_distance_matrix(41.2753, 28.7519, 41.0054, 28.9768) for _ in range(5)
+        ))
+
+    results = asyncio.run(run())
+    assert len(handler.requests) == 1
+    assert all(result == results[0] for result in results)
+    assert maps.stats()["single_flight"][0]["collapsed"] == 4
+
+
+def test_exchange_rates_collapse(monkeypatch):
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"TRY": 1.0, "EUR": 0.03}
+
+    monkeypatch.setattr(exchange_rates, "_fetch_exchange_rates", fetch)
+
+    async def run():
+        return await asyncio.gather(*(exchange_rates.fetch_exchange_rates() for _ in range(4)))
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(rates == {"TRY": 1.0, "EUR": 0.03} for rates in results)